@@ -6,6 +6,9 @@ import networkx as nx
 
 class Identity(BaseEstimator, TransformerMixin):
 
+    # Output for each subject depends only on that subject's data
+    subject_independent = True
+
     def __init__(self):
         '''This loader simply flatten the input array and passed it along'''
         pass
@@ -60,6 +63,9 @@ def load_surf(surf):
 
 class SurfLabels(BaseEstimator, TransformerMixin):
 
+    # Output for each subject depends only on that subject's data
+    subject_independent = True
+
     def __init__(self, labels,
                  background_label=0,
                  mask=None,
@@ -210,8 +216,42 @@ class SurfLabels(BaseEstimator, TransformerMixin):
         else:
             self.strategy_ = self.strategy
 
+        # Pre-compute the label membership for vectorized strategies
+        self._fit_membership()
+
         return self
 
+    def _fit_membership(self):
+        '''For strategies which can be computed as a sparse matrix
+        product, store a sparse (n_labels, n_vertices) membership matrix.'''
+
+        vectorized = {'mean': 'mean', 'sum': 'sum',
+                      'standard_deviation': 'std', 'std': 'std',
+                      'variance': 'var', 'var': 'var'}
+
+        if not isinstance(self.strategy, str) or\
+           self.strategy not in vectorized:
+            self.vec_strategy_ = None
+            return
+
+        from scipy.sparse import csr_matrix
+        self.vec_strategy_ = vectorized[self.strategy]
+
+        # The index of each vertex's label, -1 for background
+        self.label_inds_ = np.full(len(self.labels_), -1)
+        sorter = np.argsort(self.non_bkg_unique_)
+        found = np.isin(self.labels_, self.non_bkg_unique_)
+        self.label_inds_[found] =\
+            sorter[np.searchsorted(self.non_bkg_unique_, self.labels_[found],
+                                   sorter=sorter)]
+
+        vertices = np.where(found)[0]
+        self.membership_ =\
+            csr_matrix((np.ones(len(vertices)),
+                        (self.label_inds_[found], vertices)),
+                       shape=(len(self.non_bkg_unique_), len(self.labels_)))
+        self.label_counts_ = np.asarray(self.membership_.sum(axis=1)).ravel()
+
     def fit_transform(self, X, y=None):
         return self.fit(X, y).transform(X)
 
@@ -220,7 +260,67 @@ class SurfLabels(BaseEstimator, TransformerMixin):
             raise ValueError('It seems that SurfLabels has not been fitted. '
                              'You must call fit() before calling transform()')
 
-    def transform(self, X):
+    def _vec_transform(self, X):
+        '''X is (n_subjects, [n_other], n_vertices), returns
+        (n_subjects, [n_other], n_labels)'''
+
+        # Flatten to 2D (n_rows, n_vertices)
+        o_shape = X.shape[:-1]
+        X = X.reshape((-1, X.shape[-1]))
+
+        # Sum per label as (n_labels, n_vertices) x (n_vertices, n_rows)
+        X_trans = (self.membership_ @ X.T).T
+
+        if self.vec_strategy_ != 'sum':
+            X_trans = X_trans / self.label_counts_
+
+        # For std / var, use the centered values per label
+        if self.vec_strategy_ in ['std', 'var']:
+
+            centered = X - X_trans[:, self.label_inds_]
+            centered[:, self.label_inds_ == -1] = 0
+
+            X_trans = (self.membership_ @ (centered ** 2).T).T
+            X_trans = X_trans / self.label_counts_
+
+            if self.vec_strategy_ == 'std':
+                X_trans = np.sqrt(X_trans)
+
+        return X_trans.reshape(o_shape + (X_trans.shape[-1],))
+
+    def transform_batch(self, X):
+        '''Transform a stacked batch of subjects at once, where
+        X is of shape (n_subjects, ...), with each X[i] as would be
+        passed to transform. Returns the stacked transformed outputs.'''
+
+        X = np.asarray(X)
+
+        # If not a vectorized strategy, transform one at a time
+        if getattr(self, 'vec_strategy_', None) is None:
+            return np.stack([self.transform(x) for x in X])
+
+        self._set_data_dim(X[0])
+
+        # If 2D w/ vertices first, put the vertices last
+        two_d = len(self.X_shape_) == 2
+        if two_d and self.data_dim_ == 0:
+            X = np.swapaxes(X, 1, 2)
+
+        X_trans = self._vec_transform(X)
+
+        # Output has labels in place of the vertices
+        if two_d and self.data_dim_ == 0:
+            X_trans = np.swapaxes(X_trans, 1, 2)
+
+        self.o_shape_ = X_trans.shape[1:]
+
+        # Return based on vectorize
+        if not self.vectorize:
+            return X_trans
+
+        return X_trans.reshape((len(X_trans), -1))
+
+    def _set_data_dim(self, X):
         ''' If X has the both the same dimensions, raise warning'''
 
         if len(X.shape) == 2 and (X.shape[0] == X.shape[1]):
@@ -234,6 +334,14 @@ class SurfLabels(BaseEstimator, TransformerMixin):
         self.data_dim_ = X.shape.index(len(self.labels_))
         self.X_shape_ = X.shape
 
+    def transform(self, X):
+
+        self._set_data_dim(X)
+
+        # Use the vectorized version if possible
+        if getattr(self, 'vec_strategy_', None) is not None:
+            return self.transform_batch(X[np.newaxis])[0]
+
         # Get the ROI value for each label
         X_trans = []
         for i in self.non_bkg_unique_:
@@ -285,6 +393,9 @@ try:
 
     class Connectivity(ConnectivityMeasure):
 
+        # Output for each subject depends only on that subject's data
+        subject_independent = True
+
         def proc_X(self, X):
 
             if not isinstance(X, list):
@@ -307,6 +418,10 @@ except ImportError:
 
 
 class Networks(BaseEstimator, TransformerMixin):
+
+    # Output for each subject depends only on that subject's data
+    subject_independent = True
+
     def __init__(self, threshold=.2, threshold_method='abs',
                  to_compute='avg_degree'):
 
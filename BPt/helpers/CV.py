@@ -3,16 +3,177 @@ CV.py
 ====================================
 Class for performing train test splits and other cross validation for BPt
 """
+import pickle as pkl
 import sklearn.model_selection as MS
 import numpy as np
+import pandas as pd
+from numbers import Integral
+from joblib import hash as joblib_hash
 from sklearn.base import BaseEstimator
 
+SPLITS_STORE_VERSION = 1
 
-def inds_from_names(original_subjects, subject_splits):
 
-    subject_inds = [[[original_subjects.get_loc(name) for name in s]
-                    for s in split] for split in subject_splits]
-    return subject_inds
+class CV_Splits():
+    '''Compact representation of a set of repeated splits of subjects,
+    stored as two int32 matrices of shape n_repeats x n_subjects,
+    from which either the subject or positional index view of each
+    split is computed only when requested.
+
+    Parameters
+    ----------
+    subjects : pandas Index
+        The subjects split.
+
+    assignments : numpy array
+        For each repeat, the fold in which each subject (by position) is
+        in the test set, or -1 if never in the test set, e.g., for
+        train only subjects.
+
+    orders : numpy array
+        For each repeat, the order of the subject positions, in which
+        the train and test subjects of each fold are returned.
+
+    n_folds : int
+        The number of folds per repeat.
+    '''
+
+    def __init__(self, subjects, assignments, orders, n_folds):
+
+        self.subjects = subjects
+        self.assignments = assignments
+        self.orders = orders
+        self.n_folds = n_folds
+
+    def __len__(self):
+        return len(self.assignments) * self.n_folds
+
+    def get_split(self, i, return_index=False):
+        '''Get the train and test subjects of the i'th split, across
+        all repeats, or if return_index, their positional index.'''
+
+        repeat, fold = divmod(i, self.n_folds)
+        order = self.orders[repeat]
+
+        is_test = self.assignments[repeat][order] == fold
+        train_inds, test_inds = order[~is_test], order[is_test]
+
+        if return_index:
+            return train_inds, test_inds
+
+        return self.subjects[train_inds], self.subjects[test_inds]
+
+    def view(self, return_index=False):
+        '''Get a list-like view of all splits, as tuples of train and
+        test subjects, or if return_index, positional indices.'''
+
+        return CV_Splits_View(self, return_index)
+
+
+class CV_Splits_View():
+    '''List-like view of CV_Splits, where each split is only computed
+    when accessed. Pickles as just the compact splits.'''
+
+    def __init__(self, splits, return_index=False):
+
+        self.splits = splits
+        self.return_index = return_index
+
+    def __len__(self):
+        return len(self.splits)
+
+    def __getitem__(self, i):
+
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('split index out of range')
+
+        return self.splits.get_split(i, self.return_index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+# Computed splits, stored in process by
+# the subjects, CV behavior and random state
+_SPLITS_STORE = {}
+
+# The max number of stored splits, past which
+# the least recently used are removed
+SPLITS_STORE_MAX_SIZE = 64
+
+
+def clear_splits_store():
+    '''Clear all stored computed splits.'''
+
+    _SPLITS_STORE.clear()
+
+
+def _store_splits(key, cv_splits):
+    '''Store cv_splits under key as the most recently used, removing
+    the least recently used if over SPLITS_STORE_MAX_SIZE.'''
+
+    _SPLITS_STORE.pop(key, None)
+    _SPLITS_STORE[key] = cv_splits
+
+    while len(_SPLITS_STORE) > SPLITS_STORE_MAX_SIZE:
+        del _SPLITS_STORE[next(iter(_SPLITS_STORE))]
+
+
+def save_splits_store(loc):
+    '''Save all stored computed splits to loc, such that they can be
+    loaded in another process with :func:`load_splits_store`.
+    Returns the number of saved splits.'''
+
+    with open(loc, 'wb') as f:
+        pkl.dump({'version': SPLITS_STORE_VERSION,
+                  'splits': _SPLITS_STORE}, f)
+
+    return len(_SPLITS_STORE)
+
+
+def load_splits_store(loc):
+    '''Load computed splits saved with :func:`save_splits_store`
+    into the store. Returns the number of loaded splits.'''
+
+    with open(loc, 'rb') as f:
+        saved = pkl.load(f)
+
+    if saved.get('version') != SPLITS_STORE_VERSION:
+        raise RuntimeError('The splits saved at ' + str(loc) + ' were '
+                           'saved with an incompatible version of BPt.')
+
+    for key, cv_splits in saved['splits'].items():
+        _store_splits(key, cv_splits)
+
+    return len(saved['splits'])
+
+
+def _hash_values(obj):
+    '''Hash any pandas or array-like obj by its values, for use in
+    a splits store key.'''
+
+    if obj is None:
+        return None
+
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        return pd.util.hash_pandas_object(obj, index=True).values
+
+    return pd.util.hash_pandas_object(pd.Index(obj), index=False).values
+
+
+def _init_repeat(original_subjects, subjects, train_only):
+    '''Get the positions of the subjects to split and the
+    train only subjects, along with an empty fold assignment.'''
+
+    split_inds = original_subjects.get_indexer(subjects)
+    train_only_inds = original_subjects.get_indexer(train_only)
+
+    assignment = np.full(len(original_subjects), -1, dtype='int32')
+
+    return split_inds, train_only_inds, assignment
 
 
 class CV(BaseEstimator):
@@ -71,23 +232,13 @@ class CV(BaseEstimator):
     def __str__(self):
         return self.__repr__()
 
-    def repeated_train_test_split(self, subjects, n_repeats, test_size=.2, 
+    def repeated_train_test_split(self, subjects, n_repeats, test_size=.2,
                                   random_state=None, return_index=False):
 
-        subject_splits = []
-        for n in range(n_repeats):
+        splits = self.get_splits(subjects, test_size, n_repeats,
+                                 random_state=random_state)
 
-            # If a specific random state is passed
-            # Make sure each repeat is provided a different random_state
-            if random_state is not None:
-                random_state += 1
-
-            subject_splits.append(self.train_test_split(subjects, 
-                                                        test_size=test_size,
-                                                        random_state=random_state,
-                                                        return_index=return_index))
-
-        return subject_splits
+        return list(splits.view(return_index))
 
     def train_test_split(self, subjects, test_size=.2, random_state=None, return_index=False):
         '''Define a train test split on input subjects, with a given target
@@ -120,6 +271,15 @@ class CV(BaseEstimator):
             The testing subjects as computed by the split
         '''
 
+        splits = self.get_splits(subjects, test_size, 1,
+                                 random_state=random_state, _increment=False)
+
+        return splits.get_split(0, return_index)
+
+    def _train_test_split_repeat(self, subjects, test_size, random_state):
+        '''Get the fold assignment and order of a single
+        train test split.'''
+
         original_subjects, subjects, train_only = self.get_train_only(subjects)
 
         if self.groups is not None:
@@ -140,16 +300,17 @@ class CV(BaseEstimator):
                                        random_state=random_state)
             [*inds] = splitter.split(subjects)
 
-        inds = inds[0]
+        train, test = inds[0]
 
-        train_subjects, test_subjects = subjects[inds[0]], subjects[inds[1]]
-        train_subjects = np.concatenate([train_subjects, train_only])
+        split_inds, train_only_inds, assignment =\
+            _init_repeat(original_subjects, subjects, train_only)
+        assignment[split_inds[test]] = 0
 
-        if return_index:
-            return ([original_subjects.get_loc(name) for name in train_subjects],
-                    [original_subjects.get_loc(name) for name in test_subjects])
+        # Train subjects in split order, then the train only, then test
+        order = np.concatenate([split_inds[train], train_only_inds,
+                                split_inds[test]])
 
-        return train_subjects, test_subjects
+        return assignment, order
 
     def repeated_k_fold(self, subjects, n_repeats, n_splits, random_state=None,
                         return_index=False):
@@ -194,18 +355,10 @@ class CV(BaseEstimator):
             The second contains the testing subjects.
         '''
 
-        subject_splits = []
-        for n in range(n_repeats):
+        splits = self.get_splits(subjects, n_splits, n_repeats,
+                                 random_state=random_state)
 
-            # If a specific random state is passed
-            # Make sure each repeat is provided a different random_state
-            if random_state is not None:
-                random_state += 1
-
-            subject_splits += self.k_fold(subjects, n_splits, random_state,
-                                          return_index)
-
-        return subject_splits
+        return list(splits.view(return_index))
 
     def k_fold(self, subjects, n_splits, random_state=None,
                return_index=False):
@@ -245,7 +398,17 @@ class CV(BaseEstimator):
             The second contains the testing subjects.
         '''
 
+        splits = self.get_splits(subjects, n_splits, 1,
+                                 random_state=random_state, _increment=False)
+
+        return list(splits.view(return_index))
+
+    def _k_fold_repeat(self, subjects, n_splits, random_state):
+        '''Get the fold assignment and order of a single k-fold.'''
+
         original_subjects, subjects, train_only = self.get_train_only(subjects)
+        split_inds, train_only_inds, assignment =\
+            _init_repeat(original_subjects, subjects, train_only)
 
         # Special implementation for group K fold,
         # just do KFold on unique groups, and recover subjects
@@ -258,12 +421,9 @@ class CV(BaseEstimator):
             splitter = MS.KFold(n_splits=n_splits, shuffle=True,
                                 random_state=random_state)
 
-            [*inds] = splitter.split(unique_groups)
-
-            subject_splits = [(
-                np.concatenate([groups.index[groups.isin(unique_groups[i[0]])],
-                               train_only]),
-                groups.index[groups.isin(unique_groups[i[1]])]) for i in inds]
+            for fold, (_, test) in enumerate(splitter.split(unique_groups)):
+                in_test = groups.isin(unique_groups[test]).to_numpy()
+                assignment[split_inds[in_test]] = fold
 
         else:
 
@@ -283,14 +443,13 @@ class CV(BaseEstimator):
                                     random_state=random_state)
                 [*inds] = splitter.split(subjects)
 
-            # Conv inds within subjects to subject names + train only subjects
-            subject_splits = [(np.concatenate([subjects[i[0]], train_only]),
-                               subjects[i[1]]) for i in inds]
+            for fold, (_, test) in enumerate(inds):
+                assignment[split_inds[test]] = fold
 
-        if return_index:
-            return inds_from_names(original_subjects, subject_splits)
+        # Subjects in split order, then any train only subjects
+        order = np.concatenate([split_inds, train_only_inds])
 
-        return subject_splits
+        return assignment, order
 
     def get_train_only(self, subjects, ignore_by_group=False):
 
@@ -324,28 +483,34 @@ class CV(BaseEstimator):
     def repeated_leave_one_group_out(self, subjects, n_repeats, groups_series,
                                      return_index=False):
 
-        subject_splits = []
-        for n in range(n_repeats):
-            subject_splits += self.leave_one_group_out(subjects, groups_series,
-                                                       return_index)
+        splits = self.get_splits(subjects, None, n_repeats,
+                                 splits_vals=groups_series)
 
-        return subject_splits
+        return list(splits.view(return_index))
 
     def leave_one_group_out(self, subjects, groups_series, return_index=False):
 
+        splits = self.get_splits(subjects, None, 1,
+                                 splits_vals=groups_series)
+
+        return list(splits.view(return_index))
+
+    def _leave_one_group_out_repeat(self, subjects, groups_series):
+        '''Get the fold assignment and order of leave one group out.'''
+
         original_subjects, subjects, train_only =\
             self.get_train_only(subjects, ignore_by_group=True)
+        split_inds, train_only_inds, assignment =\
+            _init_repeat(original_subjects, subjects, train_only)
 
         logo = MS.LeaveOneGroupOut()
-        [*inds] = logo.split(subjects, groups=groups_series.loc[subjects])
-
-        subject_splits = [(np.concatenate([subjects[i[0]], train_only]),
-                          subjects[i[1]]) for i in inds]
+        for fold, (_, test) in enumerate(
+          logo.split(subjects, groups=groups_series.loc[subjects])):
+            assignment[split_inds[test]] = fold
 
-        if return_index:
-            return inds_from_names(original_subjects, subject_splits)
+        order = np.concatenate([split_inds, train_only_inds])
 
-        return subject_splits
+        return assignment, order
 
     def get_num_groups(self, subjects, groups_series):
         '''Func to get number of leave one out groups'''
@@ -356,47 +521,121 @@ class CV(BaseEstimator):
 
         return len(np.unique(groups))
 
-    def get_cv(self, train_data_index, splits, n_repeats,
-               splits_vals=None, random_state=None, return_index=False):
-        '''Always return as list of tuples'''
+    def _get_splits_key(self, subjects, splits, n_repeats,
+                        splits_vals, random_state, _increment):
+        '''Get the key for storing the passed splits, or None if they
+        are not reproducible, i.e., random without a fixed random state.'''
 
-        if return_index == 'both':
-            no_index = self.get_cv(train_data_index, splits, n_repeats,
-                                   splits_vals=splits_vals,
-                                   random_state=random_state,
-                                   return_index=False)
+        if splits_vals is None and not isinstance(random_state, Integral):
+            return None
 
-            index = self.get_cv(train_data_index, splits, n_repeats,
-                                splits_vals=splits_vals,
-                                random_state=random_state,
-                                return_index=True)
+        return joblib_hash((_hash_values(subjects),
+                            _hash_values(self.groups),
+                            _hash_values(self.stratify),
+                            _hash_values(self.train_only),
+                            _hash_values(splits_vals),
+                            splits, n_repeats, random_state, _increment))
 
-            return no_index, index
+    def get_splits(self, train_data_index, splits, n_repeats,
+                   splits_vals=None, random_state=None, use_store=True,
+                   _increment=True):
+        '''Compute the repeated splits of train_data_index once, as
+        a compact :class:`CV_Splits`, from which either the subject or
+        positional index view of each split can be computed.
 
-        # If split_vals passed, then by group
-        if splits_vals is not None:
+        Parameters
+        ----------
+        train_data_index : array-like
+            The subjects to split.
 
-            return self.repeated_leave_one_group_out(train_data_index,
-                                                     n_repeats=n_repeats,
-                                                     groups_series=splits_vals,
-                                                     return_index=return_index)
+        splits : int, float or None
+            If an int, the number of folds in a k-fold, otherwise the
+            test size of a train test split.
 
-        # K-fold is splits is an int
-        elif isinstance(splits, int):
+        n_repeats : int
+            The number of times to repeat the split.
+
+        splits_vals : pandas Series or None, optional
+            If passed, then leave one group out, by these values.
+            (default = None)
+
+        random_state : int or None, optional
+            If passed, then each repeat is provided the next random state.
+            (default = None)
+
+        use_store : bool, optional
+            If True, then reproducible splits, i.e., leave one group out
+            or with a fixed random_state, are stored in process, such that
+            computing the same splits again, e.g., across
+            repeated Evaluate calls, just returns the stored splits.
+            Up to SPLITS_STORE_MAX_SIZE of the most recently used
+            splits are kept.
+            (default = True)
 
-            return self.repeated_k_fold(train_data_index, n_repeats,
-                                        n_splits=splits,
-                                        random_state=random_state,
-                                        return_index=return_index)
+        Returns
+        ----------
+        CV_Splits
+            The computed splits.
+        '''
+
+        subjects = pd.Index(train_data_index)
+
+        key = None
+        if use_store:
+            key = self._get_splits_key(subjects, splits, n_repeats,
+                                       splits_vals, random_state, _increment)
+            if key in _SPLITS_STORE:
+                cv_splits = _SPLITS_STORE[key]
+                _store_splits(key, cv_splits)
+                return cv_splits
+
+        # Leave one group out is the same each repeat
+        if splits_vals is not None:
+            repeats = [self._leave_one_group_out_repeat(subjects,
+                                                        splits_vals)]
+            repeats = repeats * n_repeats
+            n_folds = self.get_num_groups(subjects, splits_vals)
 
-        # Otherwise, as train test splits
         else:
 
-            return self.repeated_train_test_split(train_data_index, n_repeats,
-                                                  test_size=splits,
-                                                  random_state=random_state,
-                                                  return_index=return_index)
+            # Make sure each repeat is provided a different random_state
+            random_states = [random_state] * n_repeats
+            if random_state is not None:
+                random_states = [random_state + n + int(_increment)
+                                 for n in range(n_repeats)]
+
+            # K-fold is splits is an int, otherwise train test splits
+            if isinstance(splits, int):
+                repeats = [self._k_fold_repeat(subjects, splits, rs)
+                           for rs in random_states]
+                n_folds = splits
+
+            else:
+                repeats = [self._train_test_split_repeat(subjects, splits, rs)
+                           for rs in random_states]
+                n_folds = 1
+
+        assignments = np.array([repeat[0] for repeat in repeats],
+                               dtype='int32')
+        orders = np.array([repeat[1] for repeat in repeats], dtype='int32')
+
+        cv_splits = CV_Splits(subjects, assignments, orders, n_folds)
+        if key is not None:
+            _store_splits(key, cv_splits)
 
+        return cv_splits
 
-                                
+    def get_cv(self, train_data_index, splits, n_repeats,
+               splits_vals=None, random_state=None, return_index=False):
+        '''Always return as list of tuples. If return_index is 'both',
+        then return both the subject and index versions,
+        computed from the same splits.'''
+
+        cv_splits = self.get_splits(train_data_index, splits, n_repeats,
+                                    splits_vals=splits_vals,
+                                    random_state=random_state)
+
+        if return_index == 'both':
+            return list(cv_splits.view(False)), list(cv_splits.view(True))
 
+        return list(cv_splits.view(return_index))
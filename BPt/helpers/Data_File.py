@@ -1,6 +1,10 @@
 from joblib import Parallel, delayed
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from copy import deepcopy
+import os
 import numpy as np
+import pandas as pd
 
 
 class Data_File():
@@ -29,55 +33,168 @@ class Data_File():
         return Data_File(deepcopy(self.loc, memo), self.load_func)
 
 
-def mp_load(files, reduce_funcs):
+def prefetch_load(data_files, prefetch=0, prefetch_n_jobs=1):
+    '''Generator which yields the loaded data for each passed
+    Data_File in order. If prefetch is greater than 0, up to prefetch
+    files ahead of the current one are read in the background by a pool
+    of prefetch_n_jobs threads, such that reading from disk overlaps
+    with whatever is done with the currently yielded data.'''
+
+    if prefetch < 1:
+        for data_file in data_files:
+            yield data_file.load()
+        return
+
+    data_files = iter(data_files)
+    with ThreadPoolExecutor(max_workers=max(1, prefetch_n_jobs)) as ex:
+
+        # Fill the read-ahead queue
+        queue = deque()
+        for data_file in data_files:
+            queue.append(ex.submit(data_file.load))
+            if len(queue) == prefetch:
+                break
+
+        while len(queue) > 0:
+            data = queue.popleft().result()
+
+            # Submit the next, before yielding the current
+            for data_file in data_files:
+                queue.append(ex.submit(data_file.load))
+                break
+
+            yield data
+
+
+def mp_load(files, reduce_funcs, prefetch=0, prefetch_n_jobs=1):
 
     proxy = np.zeros((len(files), len(reduce_funcs)))
-    for f in range(len(files)):
-        data = files[f].load()
+    for f, data in enumerate(prefetch_load(files, prefetch,
+                                           prefetch_n_jobs)):
         for r in range(len(reduce_funcs)):
             proxy[f, r] = reduce_funcs[r](data)
 
     return proxy
 
 
+# In process store of reduced data file values, by the data file's
+# location, modification time, size and load func, and the reduce func,
+# see load_data_file_proxies
+_PROXY_STORE = {}
+
+# The max number of stored reduced values, past which
+# the least recently used are removed
+PROXY_STORE_MAX_SIZE = 100000
+
+
+def clear_proxy_store():
+    '''Clear all stored reduced data file values.'''
+
+    _PROXY_STORE.clear()
+
+
+def _get_file_stat(loc):
+    '''Get the modification time and size of the file at loc, such that
+    a file changed in place isn't matched to its stored values, or None
+    if loc is not a file.'''
+
+    try:
+        stat = os.stat(loc)
+    except (TypeError, ValueError, OSError):
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _get_proxy_key(data_file, file_stat, reduce_func):
+    return (data_file.loc, file_stat, data_file.load_func, reduce_func)
+
+
+def _store_proxy(key, value):
+    '''Store value under key as the most recently used, removing the
+    least recently used if over PROXY_STORE_MAX_SIZE.'''
+
+    _PROXY_STORE.pop(key, None)
+    _PROXY_STORE[key] = value
+
+    while len(_PROXY_STORE) > PROXY_STORE_MAX_SIZE:
+        del _PROXY_STORE[next(iter(_PROXY_STORE))]
+
+
 def load_data_file_proxies(data, reduce_funcs,
                            data_file_keys, file_mapping,
-                           n_jobs=1):
+                           n_jobs=1, prefetch=0, prefetch_n_jobs=1,
+                           use_store=True):
+    '''Compute a DataFrame of the same shape as data[data_file_keys],
+    for each reduce func, where each data file key is replaced by the
+    reduced value of the loaded file. Each file is loaded at most once,
+    with all reduce funcs applied to it. If use_store, then reduced values
+    are stored in process, by the file, its modification time and size,
+    and the reduce func, such that any later calls with the same unchanged
+    files and reduce funcs don't load them again.'''
 
-    data_file_proxies = [data[data_file_keys].copy()
-                         for _ in range(len(reduce_funcs))]
     data_files = data[data_file_keys]
 
-    if n_jobs == 1:
+    # Each unique data file key, and where they are within data_files
+    file_keys, inverse = np.unique(data_files.to_numpy(),
+                                   return_inverse=True)
+    files = [file_mapping[file_key] for file_key in file_keys]
 
-        for col in data_files:
-            for subject in data_files.index:
+    values = np.zeros((len(files), len(reduce_funcs)))
+    to_load, file_stats = [], {}
 
-                file_key = data_files.at[subject, col]
-                data = file_mapping[file_key].load()
+    # Fill in any stored values
+    for f, data_file in enumerate(files):
 
-                for r in range(len(reduce_funcs)):
-                    data_file_proxies[r].at[subject, col] =\
-                        reduce_funcs[r](data)
+        if not use_store:
+            to_load.append(f)
+            continue
 
-    else:
+        file_stats[f] = _get_file_stat(data_file.loc)
+        keys = [_get_proxy_key(data_file, file_stats[f], func)
+                for func in reduce_funcs]
 
-        col_names = list(data_files)
-        data_files = np.array(data_files)
-        for col in range(data_files.shape[1]):
-            splits = np.array_split(data_files[:, col], n_jobs)
+        if all([key in _PROXY_STORE for key in keys]):
+            values[f] = [_PROXY_STORE[key] for key in keys]
 
-            def change_to_map(x):
-                return file_mapping[x]
-            v_func = np.vectorize(change_to_map)
-            file_splits = [v_func(split) for split in splits]
+            # Mark as most recently used
+            for key, value in zip(keys, values[f]):
+                _store_proxy(key, value)
 
-            output = Parallel(n_jobs=n_jobs)(delayed(mp_load)(
-                files=files, reduce_funcs=reduce_funcs)
-                for files in file_splits)
-            output = np.vstack(output)
+        else:
+            to_load.append(f)
 
-            for i in range(len(reduce_funcs)):
-                data_file_proxies[i][col_names[col]] = output[:, i]
+    # Load the rest, each file once for all reduce funcs
+    if len(to_load) > 0:
+
+        load_files = [files[f] for f in to_load]
+        if n_jobs == 1:
+            loaded = mp_load(load_files, reduce_funcs, prefetch=prefetch,
+                             prefetch_n_jobs=prefetch_n_jobs)
+
+        else:
+            splits = np.array_split(np.arange(len(load_files)),
+                                    min(n_jobs, len(load_files)))
+            output = Parallel(n_jobs=n_jobs)(delayed(mp_load)(
+                files=[load_files[f] for f in split],
+                reduce_funcs=reduce_funcs, prefetch=prefetch,
+                prefetch_n_jobs=prefetch_n_jobs)
+                for split in splits)
+            loaded = np.vstack(output)
+
+        values[to_load] = loaded
+
+        if use_store:
+            for f, proxy in zip(to_load, loaded):
+                for func, value in zip(reduce_funcs, proxy):
+                    _store_proxy(_get_proxy_key(files[f], file_stats[f],
+                                                func), value)
+
+    # Back to the shape of data_files, for each reduce func
+    inverse = inverse.reshape(data_files.shape)
+    data_file_proxies = [pd.DataFrame(values[inverse, r],
+                                      index=data_files.index,
+                                      columns=data_files.columns)
+                         for r in range(len(reduce_funcs))]
 
     return data_file_proxies
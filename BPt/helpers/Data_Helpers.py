@@ -5,7 +5,6 @@ Various helper functions for loading and processing data for BPt.
 Specifically, these are non-class functions used in _Data.py and BPt_ML.py.
 """
 import numpy as np
-import numpy.ma as ma
 import random
 from sklearn.preprocessing import KBinsDiscretizer
 from sklearn.preprocessing import LabelEncoder
@@ -358,40 +357,6 @@ def filter_float_by_std(data, key, n_std,
     return data
 
 
-def filter_float_df_by_outlier(data, filter_outlier_percent,
-                               drop_val=999):
-
-    # For length of code / readability
-    fop = proc_fop(filter_outlier_percent)
-
-    if fop[0] is not None:
-        data[data < data.quantile(fop[0])] = drop_val
-    if fop[1] is not None:
-        data[data > data.quantile(fop[1])] = drop_val
-
-    return data
-
-
-def filter_float_df_by_std(data, n_std,
-                           drop_val=999):
-
-    if not isinstance(n_std, tuple):
-        n_std = (n_std, n_std)
-
-    mean = data.mean()
-    std = data.std()
-
-    if n_std[0] is not None:
-        l_scale = n_std[0] * std
-        data[data < mean - l_scale] = drop_val
-
-    if n_std[1] is not None:
-        u_scale = n_std[1] * std
-        data[data > mean + u_scale] = drop_val
-
-    return data
-
-
 def get_unique_combo_df(data, keys):
     '''Get the unique label combinations from a dataframe (data)
     given multiple column names.
@@ -447,6 +412,190 @@ def reverse_unique_combo_df(unique_combo, le):
     return col_split
 
 
+# The number of columns compared at a time in drop_duplicate_cols
+DUPLICATE_BLOCK_SIZE = 1024
+
+
+def _get_col_hash_key(col):
+
+    # Make sure -0.0 and 0.0, and all NaN, have the same bytes
+    col = col + 0.0
+    col[np.isnan(col)] = np.nan
+
+    return col.tobytes()
+
+
+def _drop_identical_cols(values):
+    '''Return a mask over the columns of values, False for any
+    column exactly identical to an earlier column, found by hashing.'''
+
+    keep = np.ones(values.shape[1], dtype='bool')
+
+    seen = set()
+    for i in range(values.shape[1]):
+        key = _get_col_hash_key(values[:, i])
+        if key in seen:
+            keep[i] = False
+        else:
+            seen.add(key)
+
+    return keep
+
+
+class _Duplicate_Tiles():
+    '''Computes, for tiles of columns at a time, which pairs
+    of columns are duplicates. Either, if exact, that the two columns are
+    equal on all rows where both are not NaN, or otherwise that the two
+    columns are correlated >= corr_thresh on all rows where both are not
+    NaN. Each is computed through a few matrix products.'''
+
+    def __init__(self, values, corr_thresh):
+
+        self.exact = corr_thresh == 1
+        self.corr_thresh = corr_thresh
+
+        self.mask = ~np.isnan(values)
+        self.has_nan = not self.mask.all()
+
+        # Exact compares the raw values
+        if self.exact:
+            self.values = values
+
+        # Otherwise, standardize once, as correlation is
+        # unchanged by shifting and scaling each column
+        else:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                std = np.nanstd(values, axis=0)
+                std[std == 0] = 1
+                self.values = (values - np.nanmean(values, axis=0)) / std
+
+        # Such that NaN's don't contribute to any sums
+        if self.has_nan:
+            self.values[~self.mask] = 0
+
+    def get_sq_sums(self, a, b):
+        '''Get for each pair, over the rows where both are
+        not NaN, the sum of a**2 and of b**2.'''
+
+        X_a, X_b = self.values[:, a], self.values[:, b]
+
+        if not self.has_nan:
+            return ((X_a ** 2).sum(axis=0)[:, None],
+                    (X_b ** 2).sum(axis=0)[None, :])
+
+        M_a = self.mask[:, a].astype('float')
+        M_b = self.mask[:, b].astype('float')
+
+        return (X_a ** 2).T @ M_b, M_a.T @ (X_b ** 2)
+
+    def get_sums(self, a, b):
+        '''Get for each pair, the number of rows where both are
+        not NaN, and over those rows, the sum of a and of b.'''
+
+        X_a, X_b = self.values[:, a], self.values[:, b]
+
+        if not self.has_nan:
+            n = np.full((len(a), len(b)), float(X_a.shape[0]))
+            return n, X_a.sum(axis=0)[:, None], X_b.sum(axis=0)[None, :]
+
+        M_a = self.mask[:, a].astype('float')
+        M_b = self.mask[:, b].astype('float')
+
+        return M_a.T @ M_b, X_a.T @ M_b, M_a.T @ X_b
+
+    def get_corrs(self, a, b):
+
+        n, sum_a, sum_b = self.get_sums(a, b)
+        sum_a2, sum_b2 = self.get_sq_sums(a, b)
+        sum_ab = self.values[:, a].T @ self.values[:, b]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sum_ab - (sum_a * sum_b / n)
+            var_a = sum_a2 - (sum_a ** 2 / n)
+            var_b = sum_b2 - (sum_b ** 2 / n)
+            corrs = cov / np.sqrt(var_a * var_b)
+
+        # No correlation when either is constant, or less than two rows
+        tol = n * 1e-12
+        corrs[(var_a <= tol) | (var_b <= tol) | (n < 2)] = np.nan
+
+        return corrs
+
+    def get_equal(self, a, b):
+
+        # The sum of squared differences over rows where both aren't NaN,
+        # is close to 0 for each candidate pair
+        sum_a2, sum_b2 = self.get_sq_sums(a, b)
+        sum_ab = self.values[:, a].T @ self.values[:, b]
+        candidates = sum_a2 + sum_b2 - 2 * sum_ab <=\
+            1e-8 * (sum_a2 + sum_b2)
+
+        # Then check each candidate exactly
+        for i, j in zip(*np.nonzero(candidates)):
+            overlap = self.mask[:, a[i]] & self.mask[:, b[j]]
+            candidates[i, j] =\
+                np.array_equal(self.values[overlap, a[i]],
+                               self.values[overlap, b[j]])
+
+        return candidates
+
+    def get_duplicates(self, a, b):
+        '''Get a boolean matrix, of len(a) by len(b), where True
+        means the pair of columns are duplicates.'''
+
+        if self.exact:
+            return self.get_equal(a, b)
+
+        with np.errstate(invalid='ignore'):
+            return self.get_corrs(a, b) >= self.corr_thresh
+
+
+def _get_duplicate_cols_mask(values, corr_thresh,
+                             block_size=DUPLICATE_BLOCK_SIZE):
+    '''Return a mask over the columns of values, where in order,
+    each column is kept only if not a duplicate of any kept earlier column.
+    Columns are processed a block at a time, first against all kept columns
+    from earlier blocks, then against each other.'''
+
+    n_cols = values.shape[1]
+    keep = np.ones(n_cols, dtype='bool')
+
+    tiles = _Duplicate_Tiles(values, corr_thresh)
+
+    for start in range(0, n_cols, block_size):
+        block = np.arange(start, min(start + block_size, n_cols))
+
+        # Drop any duplicates of kept columns from earlier blocks
+        kept = np.nonzero(keep[:start])[0]
+        if len(kept) > 0:
+            keep[block] = ~tiles.get_duplicates(block, kept).any(axis=1)
+
+        # Then in order within the block
+        is_dup = tiles.get_duplicates(block, block)
+        for i in range(len(block)):
+            if keep[block[i]]:
+                keep[block[i + 1:][is_dup[i, i + 1:]]] = False
+
+    return keep
+
+
+def _get_keep_cols_mask(values, corr_thresh):
+
+    if corr_thresh != 1:
+        return _get_duplicate_cols_mask(values, corr_thresh)
+
+    # Exactly identical columns are dropped by hash first
+    keep = _drop_identical_cols(values)
+
+    # If no NaN, only identical columns are equal, otherwise
+    # check the rest where both are not NaN
+    if np.isnan(values).any():
+        inds = np.nonzero(keep)[0]
+        keep[inds] = _get_duplicate_cols_mask(values[:, inds], corr_thresh)
+
+    return keep
+
+
 def drop_duplicate_cols(data, corr_thresh, _print=print):
     '''Drop duplicates columns within data based on
     if two data columns are >= to a certain correlation threshold.
@@ -473,36 +622,62 @@ def drop_duplicate_cols(data, corr_thresh, _print=print):
 
     if corr_thresh is not None and corr_thresh is not False:
 
-        dropped = []
+        values = data.to_numpy(dtype='float', copy=True)
+        keep = _get_keep_cols_mask(values, corr_thresh)
 
-        for col1 in data:
-            for col2 in data:
-                if col1 != col2 and col1 in list(data) and col2 in list(data):
+        dropped = list(data.columns[~keep])
+        data = data.loc[:, keep]
+
+        _print('Dropped', len(dropped), 'columns as duplicate cols!')
 
-                    A, B = data[col1], data[col2]
-                    a, b = ma.masked_invalid(A), ma.masked_invalid(B)
+    return data
 
-                    # Compute overlap
-                    overlap = (~a.mask & ~b.mask)
 
-                    # Two cases, if corr_thresh 1 (faster)
-                    if corr_thresh == 1:
+def _get_int_dtype(min_val, max_val):
+    '''Get the smallest integer dtype which fits from min_val to max_val,
+    unsigned if min_val is not negative.'''
 
-                        A_o, B_o = np.array(A[overlap]), np.array(B[overlap])
-                        if (A_o == B_o).all():
+    kind = 'u' if min_val >= 0 else 'i'
+    for itemsize in [1, 2, 4]:
+        info = np.iinfo(kind + str(itemsize))
+        if info.min <= min_val and max_val <= info.max:
+            return np.dtype(kind + str(itemsize))
 
-                            data = data.drop(col2, axis=1)
-                            dropped.append(col2)
+    return np.dtype(kind + '8')
 
-                    else:
-                        corr = np.corrcoef(A[overlap], B[overlap])[0][1]
-                        if corr >= corr_thresh:
-                            data = data.drop(col2, axis=1)
-                            dropped.append(col2)
 
-        _print('Dropped', len(dropped), 'columns as duplicate cols!')
+def compact_dtypes(data):
+    '''Convert each float column in data to float32, and each integer
+    column to the smallest integer dtype which fits its values.
 
-    return data
+    Parameters
+    ----------
+    data : pandas DataFrame
+        The df to convert.
+
+    Returns
+    ----------
+    pandas DataFrame
+        The df with compact dtypes.
+    '''
+
+    dtypes = {}
+    for col, dtype in data.dtypes.items():
+
+        if not isinstance(dtype, np.dtype):
+            continue
+
+        if dtype.kind == 'f' and dtype.itemsize > 4:
+            dtypes[col] = 'float32'
+
+        elif dtype.kind in 'iu' and len(data) > 0:
+            values = data[col].to_numpy()
+            dtypes[col] = _get_int_dtype(values.min(), values.max())
+
+    if len(dtypes) == 0:
+        return data
+
+    return data.astype(dtypes, copy=False)
 
 
 def get_r(val):
@@ -640,16 +815,119 @@ def get_common_name(keys):
         return top_strs[0]
 
 
+# The number of columns filtered at a time in filter_data_cols
+FILTER_CHUNK_SIZE = 1024
+
+
+def get_nan_quantiles(values, qs):
+    '''Compute the quantiles qs of each column of values, ignoring NaN,
+    with linear interpolation (as in pandas quantile). Columns with
+    the same number of non-NaN values are partitioned together, as
+    NaN are always partitioned to the end.
+
+    Parameters
+    ----------
+    values : numpy array
+        2D float array.
+
+    qs : list of float
+        The quantiles to compute, each between 0 and 1.
+
+    Returns
+    ----------
+    numpy array
+        With shape len(qs) by the number of columns, NaN for any
+        column of all NaN.
+    '''
+
+    quantiles = np.full((len(qs), values.shape[1]), np.nan)
+    n_vals = (~np.isnan(values)).sum(axis=0)
+
+    for n in np.unique(n_vals):
+        if n == 0:
+            continue
+
+        cols = np.nonzero(n_vals == n)[0]
+        if len(cols) == values.shape[1]:
+            cols = slice(None)
+
+        pos = np.array(qs) * (n - 1)
+        lower = np.floor(pos).astype('int')
+        upper = np.minimum(lower + 1, n - 1)
+        frac = pos - lower
+
+        kth = np.unique(np.concatenate([lower, upper]))
+        part = np.partition(values[:, cols], kth, axis=0)
+
+        # Interpolate the same as numpy
+        lower_vals, upper_vals = part[lower], part[upper]
+        diff = upper_vals - lower_vals
+        frac = frac[:, None]
+        quantiles[:, cols] = np.where(frac >= .5,
+                                      upper_vals - diff * (1 - frac),
+                                      lower_vals + diff * frac)
+
+    return quantiles
+
+
+def get_outlier_bounds(values, filter_outlier_percent, filter_outlier_std):
+    '''Get the lower and upper bounds of each column of values, outside of
+    which values are outliers, based on either an outlier percent or std.
+    Either bound is None if not filtered on that side.'''
+
+    if filter_outlier_percent is not None:
+        fop = proc_fop(filter_outlier_percent)
+
+        qs = [q for q in fop if q is not None]
+        quantiles = list(get_nan_quantiles(values, qs))
+
+        return [quantiles.pop(0) if q is not None else None for q in fop]
+
+    n_std = filter_outlier_std
+    if not isinstance(n_std, tuple):
+        n_std = (n_std, n_std)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0, ddof=1)
+
+    bounds = [None, None]
+    if n_std[0] is not None:
+        bounds[0] = mean - (n_std[0] * std)
+    if n_std[1] is not None:
+        bounds[1] = mean + (n_std[1] * std)
+
+    return bounds
+
+
+def get_outlier_mask(values, filter_outlier_percent, filter_outlier_std):
+    '''Get a boolean mask, the same shape as values, where True marks
+    an outlier value within its column.'''
+
+    lower, upper = get_outlier_bounds(values, filter_outlier_percent,
+                                      filter_outlier_std)
+
+    outliers = np.zeros(values.shape, dtype='bool')
+    with np.errstate(invalid='ignore'):
+        if lower is not None:
+            outliers |= values < lower
+        if upper is not None:
+            outliers |= values > upper
+
+    return outliers
+
+
 def filter_data_cols(data, filter_outlier_percent, filter_outlier_std,
                      drop_or_na='drop', seperate_keys=None,
                      subject_id='subject_id', _print=print):
-
-    # Seperate data from data files if applicable
-    if seperate_keys is not None:
-        sep_data = data[seperate_keys]
-        data = data.drop(seperate_keys, axis=1)
-    else:
-        sep_data = pd.DataFrame()
+    '''Filter outliers from each column of data, a chunk of
+    FILTER_CHUNK_SIZE columns at a time, such that only one chunk is ever
+    copied into memory at once (e.g., for memory mapped data).
+    If drop_or_na is 'drop', any row with an outlier in any column is
+    dropped, otherwise outliers are set to NaN. Both the lower and upper
+    bounds are computed from the original values, i.e., the upper bound
+    is not changed by the lower outliers.'''
 
     if filter_outlier_percent is None and filter_outlier_std is None:
         return data
@@ -658,26 +936,35 @@ def filter_data_cols(data, filter_outlier_percent, filter_outlier_std,
         raise RuntimeError('You may only pass one of filter outlier',
                            ' percent or std')
 
-    if drop_or_na == 'na':
-        drop_val = np.nan
-    else:
-        drop_val = get_unused_drop_val(data)
+    # Seperate data from data files if applicable
+    if seperate_keys is not None:
+        seperate_keys = [key for key in seperate_keys if key in data]
+        sep_data = data[seperate_keys]
+        data = data.drop(seperate_keys, axis=1)
 
-    # Filter based on outlier percent
-    if filter_outlier_percent is not None:
+    to_drop = np.zeros(len(data), dtype='bool')
+    chunks = []
 
-        data = filter_float_df_by_outlier(data, filter_outlier_percent,
-                                          drop_val=drop_val)
+    for start in range(0, data.shape[1], FILTER_CHUNK_SIZE):
+        chunk = data.iloc[:, start:start + FILTER_CHUNK_SIZE]
 
-    # Filter by std
-    if filter_outlier_std is not None:
+        outliers = get_outlier_mask(chunk.to_numpy(dtype='float'),
+                                    filter_outlier_percent,
+                                    filter_outlier_std)
 
-        data = filter_float_df_by_std(data, filter_outlier_std,
-                                      drop_val=drop_val)
+        if drop_or_na == 'na':
+            chunks.append(chunk.mask(outliers))
+        else:
+            to_drop |= outliers.any(axis=1)
+
+    if drop_or_na == 'na':
+        if len(chunks) > 0:
+            data = pd.concat(chunks, axis=1)
 
-    # Only remove if not NaN
-    if drop_val is not np.nan:
-        data = drop_from_filter(data, drop_val, _print=_print)
+    elif to_drop.any():
+        data = data[~to_drop]
+        _print('Dropped', to_drop.sum(), 'rows based on filter input',
+               'params, e.g. filter outlier percent, drop cat, ect...')
 
     # Re-merge, if seperated data files
     if seperate_keys is not None:
@@ -689,7 +976,8 @@ def filter_data_cols(data, filter_outlier_percent, filter_outlier_std,
 def filter_data_file_cols(data, reduce_funcs, filter_outlier_percent,
                           filter_outlier_std, data_file_keys,
                           file_mapping, subject_id='subject_id',
-                          n_jobs=1, _print=print):
+                          n_jobs=1, prefetch=0, prefetch_n_jobs=1,
+                          use_store=True, _print=print):
 
     if not isinstance(reduce_funcs, list):
         reduce_funcs = [reduce_funcs]
@@ -698,7 +986,10 @@ def filter_data_file_cols(data, reduce_funcs, filter_outlier_percent,
     # where the length of the list is == to the number of reduce funcs
     data_file_proxies = load_data_file_proxies(data, reduce_funcs,
                                                data_file_keys,
-                                               file_mapping, n_jobs)
+                                               file_mapping, n_jobs,
+                                               prefetch=prefetch,
+                                               prefetch_n_jobs=prefetch_n_jobs,
+                                               use_store=use_store)
 
     valid_subjects = set(data.index)
     for proxy in data_file_proxies:
@@ -712,7 +1003,7 @@ def filter_data_file_cols(data, reduce_funcs, filter_outlier_percent,
         # Only need to save from each calculation to the valid subjects
         valid_subjects = valid_subjects.intersection(proxy.index)
 
-    filtered_data = data.loc[list(valid_subjects)]
+    filtered_data = data[data.index.isin(valid_subjects)]
 
     # Remove any unused file mapping entries
     all_keys = set(list(file_mapping))
@@ -0,0 +1,141 @@
+"""
+Frame_Store.py
+====================================
+Directory based, columnar storage of DataFrames, where each dtype is
+saved as a single numpy block, such that it can be memory mapped on load.
+"""
+import os
+import pickle as pkl
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+# The number of columns written to disk at a time
+WRITE_CHUNK_SIZE = 1024
+
+
+def _is_block_dtype(dtype):
+    '''If columns of this dtype can be saved as a plain numpy block.'''
+
+    return isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM'
+
+
+def save_frame(df, dr):
+    '''Save a DataFrame to a new directory dr, where all columns of
+    each numpy dtype are saved together as one column-major .npy block,
+    and any remaining columns (e.g., category or object) are pickled.
+    The columns are written a chunk at a time, so at most
+    WRITE_CHUNK_SIZE extra columns are held in memory.'''
+
+    os.makedirs(dr, exist_ok=True)
+
+    # Group the column positions by dtype
+    groups, other = {}, []
+    for i, dtype in enumerate(df.dtypes):
+        if _is_block_dtype(dtype):
+            groups.setdefault(dtype, []).append(i)
+        else:
+            other.append(i)
+
+    blocks = []
+    for b, (dtype, locs) in enumerate(groups.items()):
+
+        name = 'block' + str(b) + '.npy'
+        blocks.append((name, locs))
+
+        # Empty arrays can't be memory mapped
+        if len(df) == 0:
+            np.save(os.path.join(dr, name),
+                    np.empty((0, len(locs)), dtype=dtype, order='F'))
+            continue
+
+        block = np.lib.format.open_memmap(
+            os.path.join(dr, name), mode='w+', dtype=dtype,
+            shape=(len(df), len(locs)), fortran_order=True)
+
+        for start in range(0, len(locs), WRITE_CHUNK_SIZE):
+            chunk = locs[start:start + WRITE_CHUNK_SIZE]
+            block[:, start:start + len(chunk)] =\
+                df.iloc[:, chunk].to_numpy(dtype=dtype)
+
+        block.flush()
+        del block
+
+    if len(other) > 0:
+        df.iloc[:, other].to_pickle(os.path.join(dr, 'other.pkl'))
+
+    meta = {'version': FORMAT_VERSION,
+            'index': df.index,
+            'columns': df.columns,
+            'blocks': blocks,
+            'other': other}
+
+    with open(os.path.join(dr, 'meta.pkl'), 'wb') as f:
+        pkl.dump(meta, f)
+
+
+def _load_block(loc, mmap):
+
+    # Empty arrays can't be memory mapped
+    if mmap:
+        try:
+            return np.load(loc, mmap_mode='c')
+        except ValueError:
+            pass
+
+    return np.load(loc)
+
+
+def _build_frame(blocks, other, index, columns):
+    '''Build the DataFrame from the loaded blocks, placed at their
+    original column positions. Other, if not None, is a tuple of the
+    DataFrame of any remaining columns and their positions. Each block
+    is wrapped without a copy, though if the columns of each dtype
+    were not already in order, re-ordering them makes a copy.'''
+
+    dfs = [pd.DataFrame(values, index=index, columns=locs, copy=False)
+           for values, locs in blocks]
+    if other is not None:
+        other_df, other_locs = other
+        dfs.append(other_df.set_axis(other_locs, axis=1))
+
+    # Just the one block
+    if len(dfs) == 1:
+        df = dfs[0]
+
+    else:
+        df = pd.concat(dfs, axis=1, copy=False)
+
+    locs = [loc for frame in dfs for loc in frame.columns]
+    if locs != sorted(locs):
+        df = df.iloc[:, np.argsort(locs, kind='stable')]
+
+    df.columns = columns
+
+    return df
+
+
+def load_frame(dr, mmap=True):
+    '''Load a DataFrame saved with :func:`save_frame`. If mmap,
+    the numpy blocks are memory mapped copy-on-write, such that
+    the data is only read from disk as needed, and any changes are
+    made only in memory. Note that the columns of a frame with
+    interleaved dtypes are re-ordered, and so read, on load.'''
+
+    with open(os.path.join(dr, 'meta.pkl'), 'rb') as f:
+        meta = pkl.load(f)
+
+    if meta['version'] > FORMAT_VERSION:
+        raise RuntimeError('Saved with a newer version of BPt, '
+                           'please upgrade to load.')
+
+    blocks = [(_load_block(os.path.join(dr, name), mmap), locs)
+              for name, locs in meta['blocks']]
+
+    other = None
+    if len(meta['other']) > 0:
+        other = (pd.read_pickle(os.path.join(dr, 'other.pkl')),
+                 meta['other'])
+
+    return _build_frame(blocks, other, meta['index'], meta['columns'])
@@ -0,0 +1,199 @@
+from joblib import hash as joblib_hash
+import numpy as np
+import tempfile
+import marshal
+import os
+
+
+def _get_func_name(func):
+
+    module = getattr(func, '__module__', None)
+    name = getattr(func, '__qualname__', getattr(func, '__name__', None))
+
+    if name is None:
+        return repr(func)
+
+    return str(module) + '.' + str(name)
+
+
+def _get_func_key(func):
+    '''Get a key identifying a load function, by its name and, if a python
+    function, its code, defaults and closure values, such that different
+    lambdas or closures with the same name are not confused. Returns
+    None if the function can't be identified.'''
+
+    name = _get_func_name(func)
+
+    code = getattr(func, '__code__', None)
+    if code is None:
+        return name
+
+    closure = [cell.cell_contents for cell in (func.__closure__ or [])]
+
+    try:
+        return joblib_hash((name, marshal.dumps(code), func.__defaults__,
+                            func.__kwdefaults__, closure))
+
+    # If any closure values can't be hashed
+    except Exception:
+        return None
+
+
+def _get_dr_size(dr):
+
+    entries, total = [], 0
+    for root, _, files in os.walk(dr):
+        for file in files:
+
+            if not file.endswith('.npy'):
+                continue
+
+            loc = os.path.join(root, file)
+            try:
+                stat = os.stat(loc)
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, loc))
+            total += stat.st_size
+
+    return entries, total
+
+
+def get_loader_key(transformer):
+    '''Get a hash identifying a loader class and its params.'''
+
+    name = _get_func_name(type(transformer))
+    return joblib_hash((name, transformer.get_params(deep=True)))
+
+
+class Loader_Cache():
+    '''Persistent on disk cache for the per-subject outputs of a loader.
+
+    Each loader configuration, as defined by the loader class and its
+    params, gets its own sub-directory within `cache_loc`. Within that
+    directory each cached output is stored as a single .npy file, keyed
+    by the path, modified time and size of the loaded file,
+    as well as the load function used.
+
+    Writes are made to a temporary file and then moved into place, so
+    that parallel workers can safely share the same cache.
+
+    Parameters
+    ----------
+    cache_loc : str or Path
+        The base directory in which to store the cache.
+
+    transformer : loader object
+        The un-fitted loader, used to define the
+        loader configuration.
+
+    max_size : float or None, optional
+        The maximum size of `cache_loc` in gigabytes. If exceeded,
+        the least recently used cached outputs are removed.
+        If None, the cache size is not limited.
+
+        (default = None)
+    '''
+
+    def __init__(self, cache_loc, transformer, max_size=None):
+
+        self.cache_loc = cache_loc
+        self.max_size = max_size
+
+        self.config_dr = os.path.join(str(cache_loc),
+                                      get_loader_key(transformer))
+        os.makedirs(self.config_dr, exist_ok=True)
+
+        self.hits, self.misses = 0, 0
+
+    def _get_loc(self, data_file):
+
+        try:
+            stat = os.stat(data_file.loc)
+            file_info = (stat.st_mtime, stat.st_size)
+
+        # If not a file on disk, just use the loc
+        except (OSError, TypeError, ValueError):
+            file_info = None
+
+        # Outputs from unidentifiable load funcs aren't cached
+        func_key = _get_func_key(data_file.load_func)
+        if func_key is None:
+            return None
+
+        key = joblib_hash((str(data_file.loc), file_info, func_key))
+
+        return os.path.join(self.config_dr, key + '.npy')
+
+    def get(self, data_file):
+        '''Return the cached output for the passed Data_File,
+        or None if not cached.'''
+
+        loc = self._get_loc(data_file)
+        if loc is None:
+            self.misses += 1
+            return None
+
+        try:
+            trans_data = np.load(loc)
+
+        # Not cached, or removed by another process
+        except (FileNotFoundError, ValueError, OSError):
+            self.misses += 1
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(loc)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return trans_data
+
+    def put(self, data_file, trans_data):
+        '''Save the output for the passed Data_File.'''
+
+        loc = self._get_loc(data_file)
+        if loc is None:
+            return
+
+        fd, temp_loc = tempfile.mkstemp(dir=self.config_dr, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, trans_data)
+            os.replace(temp_loc, loc)
+
+        except BaseException:
+            if os.path.exists(temp_loc):
+                os.remove(temp_loc)
+            raise
+
+    def evict(self):
+        '''If over max_size, remove the least recently
+        used entries across the whole cache_loc.'''
+
+        if self.max_size is None:
+            return
+
+        max_bytes = self.max_size * (1024 ** 3)
+
+        entries, total = _get_dr_size(str(self.cache_loc))
+        if total <= max_bytes:
+            return
+
+        for _, size, loc in sorted(entries):
+
+            try:
+                os.remove(loc)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+            if total <= max_bytes:
+                break
+
+    def get_stats(self):
+
+        return {'hits': self.hits, 'misses': self.misses}
@@ -461,9 +461,16 @@ def wrap_pipeline_objs(wrapper, objs, inds, random_state,
     else:
         cache_locs = [None for i in range(len(objs))]
 
+    # If passed any extra params per object, e.g., for loaders
+    if 'obj_params' in params:
+        obj_params = params.pop('obj_params')
+    else:
+        obj_params = [{} for i in range(len(objs))]
+
     wrapped_objs = []
-    for chunk, ind, cache_loc in zip(objs, inds,
-                                     cache_locs):
+    for chunk, ind, cache_loc, obj_param in zip(objs, inds,
+                                                cache_locs,
+                                                obj_params):
 
         name, obj = chunk
 
@@ -478,7 +485,8 @@ def wrap_pipeline_objs(wrapper, objs, inds, random_state,
         except AttributeError:
             pass
 
-        wrapped_obj = wrapper(obj, ind, cache_loc=cache_loc, **params)
+        wrapped_obj = wrapper(obj, ind, cache_loc=cache_loc,
+                              **obj_param, **params)
         wrapped_objs.append((name, wrapped_obj))
 
     return wrapped_objs
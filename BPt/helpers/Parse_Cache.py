@@ -0,0 +1,167 @@
+"""
+Parse_Cache.py
+====================================
+On disk cache of loaded and processed source tables, keyed by the
+file location, its modification time and the params used to load it,
+such that the same file is only ever parsed once.
+"""
+import os
+import shutil
+import time
+import pickle as pkl
+from uuid import uuid4
+import pandas as pd
+from joblib import hash as joblib_hash
+from .Frame_Store import save_frame, load_frame
+
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DR = os.path.join(os.path.expanduser('~'), '.cache',
+                                'BPt', 'parse_cache')
+
+
+def get_cache_key(loc, params):
+    '''Get the key for loading the file at loc with the passed params,
+    or None if loc is not a file, in which case it shouldn't be cached.'''
+
+    try:
+        stat = os.stat(loc)
+    except (TypeError, ValueError, OSError):
+        return None
+
+    return joblib_hash((CACHE_VERSION, os.path.abspath(loc),
+                        stat.st_mtime_ns, stat.st_size, params))
+
+
+def _get_entry_info(entry_dr):
+
+    with open(os.path.join(entry_dr, 'entry.pkl'), 'rb') as f:
+        return pkl.load(f)
+
+
+def load_cached(cache_dr, key):
+    '''Load the cached DataFrame under key, or return None if not cached.'''
+
+    if key is None:
+        return None
+
+    entry_dr = os.path.join(cache_dr, key)
+    if not os.path.exists(os.path.join(entry_dr, 'entry.pkl')):
+        return None
+
+    try:
+        data = load_frame(entry_dr, mmap=False)
+    except (OSError, EOFError, ValueError, pkl.UnpicklingError):
+        return None
+
+    # Mark as most recently used
+    try:
+        os.utime(os.path.join(entry_dr, 'entry.pkl'))
+    except OSError:
+        pass
+
+    return data
+
+
+def _get_dr_size(dr):
+
+    return sum(os.path.getsize(os.path.join(dr, file))
+               for file in os.listdir(dr))
+
+
+def save_cached(cache_dr, key, data, loc, max_size_mb=None):
+    '''Save a DataFrame to the cache under key, then if max_size_mb is
+    passed, evict the least recently used entries until the cache is at
+    most that size.'''
+
+    if key is None:
+        return
+
+    os.makedirs(cache_dr, exist_ok=True)
+
+    # Write to a temp directory first, so
+    # partially written entries are never read
+    entry_dr = os.path.join(cache_dr, key)
+    temp_dr = os.path.join(cache_dr, '.temp_' + uuid4().hex)
+
+    try:
+        save_frame(data, temp_dr)
+
+        info = {'loc': os.path.abspath(loc), 'shape': data.shape,
+                'created': time.time(),
+                'size_mb': _get_dr_size(temp_dr) / (1024 ** 2)}
+        with open(os.path.join(temp_dr, 'entry.pkl'), 'wb') as f:
+            pkl.dump(info, f)
+
+        os.rename(temp_dr, entry_dr)
+
+    # If already saved, e.g., by another process
+    except OSError:
+        pass
+
+    finally:
+        shutil.rmtree(temp_dr, ignore_errors=True)
+
+    if max_size_mb is not None:
+        evict(cache_dr, max_size_mb)
+
+
+def cache_info(cache_dr):
+    '''Return a DataFrame with one row per cached entry, and the columns
+    'loc', 'shape', 'size_mb', 'created' and 'last_used', indexed by
+    key and sorted from the most to least recently used.'''
+
+    columns = ['loc', 'shape', 'size_mb', 'created', 'last_used']
+
+    entries = {}
+    if os.path.exists(cache_dr):
+        for key in os.listdir(cache_dr):
+
+            # Skip any entries still being written
+            if key.startswith('.'):
+                continue
+
+            entry_dr = os.path.join(cache_dr, key)
+            try:
+                info = _get_entry_info(entry_dr)
+                info['last_used'] =\
+                    os.path.getmtime(os.path.join(entry_dr, 'entry.pkl'))
+            except (OSError, EOFError, pkl.UnpicklingError):
+                continue
+
+            entries[key] = info
+
+    info = pd.DataFrame.from_dict(entries, orient='index', columns=columns)
+    for col in ['created', 'last_used']:
+        info[col] = pd.to_datetime(info[col], unit='s')
+
+    return info.sort_values('last_used', ascending=False)
+
+
+def evict(cache_dr, max_size_mb):
+    '''Remove the least recently used entries until the total size of the
+    cache is at most max_size_mb.'''
+
+    info = cache_info(cache_dr)
+    total = info['size_mb'].sum()
+
+    for key in info.index[::-1]:
+        if total <= max_size_mb:
+            break
+
+        shutil.rmtree(os.path.join(cache_dr, key), ignore_errors=True)
+        total -= info.loc[key, 'size_mb']
+
+
+def clear_cache(cache_dr, loc=None):
+    '''Remove all cached entries, or if loc is passed,
+    just those from that file. Returns the number removed.'''
+
+    info = cache_info(cache_dr)
+    if loc is not None:
+        info = info[info['loc'] == os.path.abspath(loc)]
+
+    for key in info.index:
+        shutil.rmtree(os.path.join(cache_dr, key), ignore_errors=True)
+
+    return len(info)
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import tempfile
+import shutil
+import os
+
+
+class Shared_Array():
+    '''Light-weight, picklable handle to an array saved on disk.
+    Passing this handle to a worker in place of the array lets every
+    worker memory map the same single physical copy of the data,
+    rather than each getting its own pickled copy.
+
+    If index and columns are passed, the array is loaded as a
+    pandas DataFrame wrapped around the memory mapped values.
+    '''
+
+    def __init__(self, loc, index=None, columns=None):
+
+        self.loc = loc
+        self.index = index
+        self.columns = columns
+
+    def load(self):
+
+        values = np.load(self.loc, mmap_mode='r')
+
+        if self.columns is None:
+            return values
+
+        return pd.DataFrame(values, index=self.index,
+                            columns=self.columns, copy=False)
+
+
+def get_temp_dr():
+    '''Make a new temporary directory to store shared arrays in.'''
+
+    return tempfile.mkdtemp(prefix='BPt_')
+
+
+def remove_temp_dr(temp_dr):
+
+    if temp_dr is not None and os.path.exists(temp_dr):
+        shutil.rmtree(temp_dr, ignore_errors=True)
+
+
+def to_shared(X, temp_dr, name='X', dtype=None):
+    '''Save X to temp_dr, returning a :class:`Shared_Array` handle.
+    X can be either a numpy array or a pandas DataFrame, in which
+    case the index and columns are kept with the handle.'''
+
+    index, columns = None, None
+    if isinstance(X, pd.DataFrame):
+        index, columns = X.index, X.columns
+        X = X.to_numpy(dtype=dtype)
+
+    elif dtype is not None:
+        X = np.asarray(X, dtype=dtype)
+
+    loc = os.path.join(temp_dr, name + '.npy')
+    np.save(loc, np.ascontiguousarray(X))
+
+    return Shared_Array(loc, index=index, columns=columns)
+
+
+def from_shared(X):
+    '''Return the loaded array if X is a :class:`Shared_Array`,
+    otherwise return X unchanged.'''
+
+    if isinstance(X, Shared_Array):
+        return X.load()
+
+    return X
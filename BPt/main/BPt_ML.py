@@ -7,14 +7,83 @@ import pandas as pd
 import shutil
 import os
 import pickle as pkl
+from uuid import uuid4
 
 from ..helpers.Docstring_Helpers import get_new_docstring
+from ..helpers.Frame_Store import save_frame, load_frame
 # from ..helpers.Params_Classes import ML_Params
 from ..helpers.CV import CV
 
 
+def _save_dr(ML, loc):
+    '''Save ML to the directory loc, with each non-empty DataFrame
+    attribute saved with save_frame, and everything else pickled.'''
+
+    state = ML.__dict__.copy()
+    frames = [name for name in state if isinstance(state[name], pd.DataFrame)
+              and state[name].size > 0]
+
+    # Write to a new directory, then swap with any existing,
+    # so that any frames memory mapped from loc stay valid
+    temp_loc = str(loc).rstrip(os.sep) + '.' + uuid4().hex
+    os.makedirs(temp_loc)
+
+    try:
+        for name in frames:
+            save_frame(state.pop(name), os.path.join(temp_loc, 'frames', name))
+
+        with open(os.path.join(temp_loc, 'BPt_ML.pkl'), 'wb') as f:
+            pkl.dump({'frames': frames, 'state': state}, f)
+
+    except BaseException:
+        shutil.rmtree(temp_loc, ignore_errors=True)
+        raise
+
+    old_loc = None
+    if os.path.exists(loc):
+        old_loc = temp_loc + '.old'
+        os.rename(loc, old_loc)
+
+    os.rename(temp_loc, loc)
+
+    # Either a saved directory, or a single pickle file
+    if old_loc is not None:
+        if os.path.isdir(old_loc):
+            shutil.rmtree(old_loc, ignore_errors=True)
+        else:
+            os.remove(old_loc)
+
+
+def _load_dr(loc, frames, lazy, mmap):
+    '''Load a BPt_ML object saved with _save_dr.'''
+
+    with open(os.path.join(loc, 'BPt_ML.pkl'), 'rb') as f:
+        saved = pkl.load(f)
+
+    ML = BPt_ML.__new__(BPt_ML)
+    ML.__dict__.update(saved['state'])
+
+    # Any not requested frames are left empty
+    if frames is None:
+        frames = saved['frames']
+
+    ML._lazy_frames = {}
+    for name in saved['frames']:
+        if name in frames:
+            ML._lazy_frames[name] =\
+                (os.path.join(os.path.abspath(loc), 'frames', name), mmap)
+        else:
+            setattr(ML, name, pd.DataFrame())
+
+    if not lazy:
+        ML._load_lazy_frames()
+
+    return ML
+
+
 def Load(loc, exp_name='default', log_dr='default', existing_log='default',
-         verbose='default', notebook='default', random_state='default'):
+         verbose='default', notebook='default', random_state='default',
+         frames=None, lazy=True, mmap=True):
     '''
     This function is designed to load in a saved previously created
     BPt_ML object.
@@ -47,10 +116,44 @@ def Load(loc, exp_name='default', log_dr='default', existing_log='default',
         remaining params, even if a value is passed, it will not be
         applied. If the user really wishes to change one of these params,
         they can change it manually via self.name_of_param = whatever.
+
+    frames : list of str or None, optional
+        Only used when loading from a directory, saved with
+        `as_dr` = True. If passed a list of DataFrame attribute names,
+        e.g., ['all_data'], then only these DataFrames are loaded, and the
+        rest are left empty. If None, then all are loaded.
+
+        ::
+
+            default = None
+
+    lazy : bool, optional
+        Only used when loading from a directory.
+        If True, each DataFrame, e.g., self.all_data, is only
+        loaded from disk the first time it is accessed.
+
+        ::
+
+            default = True
+
+    mmap : bool, optional
+        Only used when loading from a directory.
+        If True, the values of each DataFrame are memory mapped
+        (copy-on-write, so any changes are made only in memory, not to
+        the saved files) rather than read into memory, such that only the
+        parts used are ever read from disk. In this case the saved
+        directory should not be removed while the object is in use.
+
+        ::
+
+            default = True
     '''
 
-    with open(loc, 'rb') as f:
-        ML = pkl.load(f)
+    if os.path.isdir(loc):
+        ML = _load_dr(loc, frames=frames, lazy=lazy, mmap=mmap)
+    else:
+        with open(loc, 'rb') as f:
+            ML = pkl.load(f)
 
     if exp_name != 'default':
         ML.exp_name = exp_name
@@ -291,9 +394,30 @@ class BPt_ML():
         self.file_mapping = {}
         self.data_file_keys = []
 
+        # No cache of parsed source files by default
+        self.parse_cache = None
+
         self._print('BPt_ML object initialized')
 
-    def Save(self, loc, low_memory=False):
+    def __getattr__(self, name):
+
+        # If loaded with lazy frames, load on first access
+        lazy_frames = self.__dict__.get('_lazy_frames', None)
+        if lazy_frames is not None and name in lazy_frames:
+            frame = load_frame(*lazy_frames.pop(name))
+            setattr(self, name, frame)
+            return frame
+
+        raise AttributeError("'" + type(self).__name__ +
+                             "' object has no attribute '" + name + "'")
+
+    def _load_lazy_frames(self):
+        '''Load any not yet loaded lazy frames.'''
+
+        for name in list(self.__dict__.get('_lazy_frames', {})):
+            getattr(self, name)
+
+    def Save(self, loc, low_memory=False, as_dr=False):
         '''This class method is used to save an existing BPt_ML
         object for further use.
 
@@ -314,11 +438,29 @@ class BPt_ML():
             be deleted as the user will not need to work with them directly
             any more.
 
+            ::
+
+                default = False
+
+        as_dr : bool, optional
+            If True, then rather than a single pickle, the object is
+            saved as a directory at loc, where each DataFrame
+            (e.g., self.all_data, self.data, ...) is saved
+            in a columnar format, with one .npy file per dtype,
+            and everything else is pickled. This is much faster to
+            save and load for large datasets, and lets
+            :func:`Load <BPt.main.BPt_ML.Load>` memory map the
+            DataFrames, load them lazily on first access, or
+            load only some of them, e.g., just self.all_data.
+
             ::
 
                 default = False
         '''
 
+        # Any not yet loaded frames must be loaded to be saved
+        self._load_lazy_frames()
+
         if low_memory:
             self.data, self.covars = pd.DataFrame(), pd.DataFrame()
             self.targets, self.strat = pd.DataFrame(), pd.DataFrame()
@@ -328,6 +470,10 @@ class BPt_ML():
             except AttributeError:
                 pass
 
+        if as_dr:
+            _save_dr(self, loc)
+            return
+
         with open(loc, 'wb') as f:
             pkl.dump(self, f)
 
@@ -435,11 +581,23 @@ class BPt_ML():
                         Clear_Inclusions,
                         Get_Nan_Subjects,
                         _get_targets_key,
+                        Set_Parse_Cache,
+                        Get_Parse_Cache_Info,
+                        Clear_Parse_Cache,
+                        _get_parse_cache,
+                        _get_parse_cache_key,
+                        _load_parse_cached,
+                        _save_parse_cached,
                         _load_datasets,
+                        _get_load_worker,
                         _load_user_passed,
                         _load_dataset,
+                        _get_default_drop_cols,
+                        _get_usecols,
                         _common_load,
                         _load,
+                        _read_csv,
+                        _get_raw_col_name,
                         _set_overlap,
                         _merge_existing,
                         _proc_df,
@@ -482,6 +640,9 @@ class BPt_ML():
     from ._Validation import (_get_CV,
                               Define_Validation_Strategy,
                               Train_Test_Split,
+                              Save_CV_Splits,
+                              Load_CV_Splits,
+                              Clear_CV_Splits,
                               _add_strat_u_name,
                               _get_info_on)
 
@@ -496,6 +657,7 @@ class BPt_ML():
                       _preproc_problem_spec,
                       _get_split_vals,
                       _get_subjects_to_use,
+                      _get_fold_n_jobs,
                       _init_evaluator,
                       _handle_scores,
                       _print_summary_score,
@@ -173,7 +173,9 @@ class Piece(Params, Check):
 class Loader(Piece):
 
     def __init__(self, obj, params=0, scope='data files',
-                 cache_loc=None, extra_params=None):
+                 cache_loc=None, cache_max_size=None,
+                 max_memory=None, memmap_dr=None,
+                 prefetch=0, prefetch_n_jobs=1, extra_params=None):
         ''' Loader refers to transformations which operate on loaded Data_Files.
         (See :func:`Load_Data_Files`).
         They in essence take in saved file locations, and after some series
@@ -240,6 +242,81 @@ class Loader(Piece):
         cache_loc : str, Path or None, optional
             Optional location in which to cache loader transformations.
 
+            If passed, the output of the loader for each
+            subject's file is saved to disk, and re-used by any
+            later call with the same loader and params, e.g., across
+            CV folds, hyper-parameter search candidates or
+            different calls to Evaluate or Test.
+            Cached outputs are tied to the loaded file's location,
+            size and time of last modification, so changing the file on disk
+            will cause it to be re-loaded.
+
+            The same `cache_loc` can be safely shared between
+            different loaders, and between parallel jobs.
+
+            ::
+
+                default = None
+
+        cache_max_size : float or None, optional
+            If a `cache_loc` is passed, this parameter
+            can optionally set the maximum size in gigabytes of
+            the directory `cache_loc`. If exceeded, the least recently
+            used cached outputs will be removed.
+
+            If left as None, the size of the cache will not be limited.
+
+            ::
+
+                default = None
+
+        max_memory : float or None, optional
+            The approximate maximum memory in gigabytes to use at once
+            for holding loaded files and their transformed outputs.
+            If passed, files are loaded and transformed in batches of
+            subjects, sized according to the first loaded file,
+            and each batch is written directly into the output
+            feature matrix.
+
+            If left as None, all files are loaded and
+            transformed in a single batch.
+
+            ::
+
+                default = None
+
+        memmap_dr : str, Path or None, optional
+            If passed, the output feature matrix from this loader
+            is stored as a memory mapped array within
+            a temporary file in this directory, rather than held
+            in memory. This can be useful along with `max_memory`
+            when the loaded features themselves are very large.
+
+            ::
+
+                default = None
+
+        prefetch : int, optional
+            The number of files to read ahead in the background, while
+            the current file is being transformed. This can help
+            when files are stored on a slow, e.g., network, file system,
+            where otherwise time is spent waiting on each file to load.
+
+            If 0, then files are loaded one at a time.
+
+            ::
+
+                default = 0
+
+        prefetch_n_jobs : int, optional
+            The number of threads used to read files ahead, if
+            `prefetch` is greater than 0. Note that this is per
+            loading job, if the loader is run with multiple jobs.
+
+            ::
+
+                default = 1
+
         extra_params : :ref`extra params dict<Extra Params>`, optional
 
             See :ref:`Extra Params`
@@ -253,6 +330,11 @@ class Loader(Piece):
         self.params = params
         self.scope = scope
         self.cache_loc = cache_loc
+        self.cache_max_size = cache_max_size
+        self.max_memory = max_memory
+        self.memmap_dr = memmap_dr
+        self.prefetch = prefetch
+        self.prefetch_n_jobs = prefetch_n_jobs
         self.extra_params = extra_params
 
         self.check_args()
@@ -889,6 +971,13 @@ class Param_Search(Params):
                  mp_context='default',
                  n_jobs='default',
                  dask_ip=None,
+                 cache_evals=True,
+                 warm_start=0,
+                 cache_loc=None,
+                 successive_halving=False,
+                 halving_factor=3,
+                 min_folds=1,
+                 prefix_cache_size=32,
                  _random_state=None,
                  _splits_vals=None,
                  _CV=None,
@@ -1113,6 +1202,107 @@ class Param_Search(Params):
             ::
 
                 default = None
+
+        cache_evals : bool, optional
+            If True, then the score on each internal CV fold of
+            every evaluated set of hyper-parameters is stored, such that if
+            the same hyper-parameters are suggested again
+            (which can happen often, for example, with
+            categorical choices), they are not re-computed.
+            Stored scores are only re-used when the data, internal CV
+            splits, scorer and base pipeline are the same, e.g., across
+            repeated calls to Evaluate with the same splits. The data is
+            identified by the subjects and all of their values.
+
+            The stored scores of the 64 most recently run searches are
+            kept in memory for the current python session, and optionally
+            saved to disk, see `cache_loc`.
+
+            ::
+
+                default = True
+
+        warm_start : int, optional
+            If greater than 0, then the search is warm started
+            by first evaluating up to this many of the best
+            previously evaluated hyper-parameters, as found
+            from any earlier search with the same base pipeline
+            and params to search over. For example, this allows later
+            outer CV folds within Evaluate to start from the best choices
+            found in earlier folds.
+
+            This requires `cache_evals` to be True.
+
+            ::
+
+                default = 0
+
+        cache_loc : str, Path or None, optional
+            If passed along with `cache_evals`, then the stored scores and
+            history of evaluated hyper-parameters are also saved in
+            this directory, and loaded from it in future searches, e.g.,
+            across different python sessions.
+
+            ::
+
+                default = None
+
+        successive_halving : bool, optional
+            If True, then rather than scoring every candidate set of
+            hyper-parameters on all internal CV folds, candidates are
+            evaluated in brackets of successive halving. Each candidate
+            in a bracket is first scored on only a subset of the internal
+            folds (see `min_folds`), then only the best
+            1 / `halving_factor` of them are scored on more folds,
+            and so on, until the remaining candidates
+            are scored on all folds. This allows many more candidates
+            to be tried (i.e., a higher `n_iter`) in the same amount of time.
+
+            If the internal CV is just a single split, candidates are instead
+            first scored after training on only 1 / `halving_factor` ** 2, then
+            1 / `halving_factor` of the training subjects.
+
+            The best hyper-parameters are selected only from those
+            candidates evaluated on all folds.
+
+            ::
+
+                default = False
+
+        halving_factor : int, optional
+            Only used if `successive_halving` is True. The factor by which
+            the number of candidates is reduced, and the number of
+            folds each is scored on increased, at each step.
+
+            ::
+
+                default = 3
+
+        min_folds : int, optional
+            Only used if `successive_halving` is True. The number of internal
+            CV folds each candidate is first scored on.
+
+            ::
+
+                default = 1
+
+        prefix_cache_size : int, optional
+            Candidates which differ only in the params of later pipeline
+            steps, e.g., just the final model's hyper-parameters,
+            share the same fitted earlier steps, e.g., imputers, scalers,
+            transformers and feature selectors. To avoid re-fitting these
+            steps, the fitted steps and their outputs on each internal
+            fold are memoized in memory, with up to this many stored (per
+            process) and the least recently used removed first.
+
+            As each stored step includes the transformed training data
+            of a fold, on very large datasets this may need to be lowered.
+            Set to 0 to disable. This is also disabled if the
+            :class:`Model_Pipeline` `cache` param is set.
+
+            ::
+
+                default = 32
         '''
 
         self.search_type = search_type
@@ -1126,6 +1316,13 @@ class Param_Search(Params):
         self.mp_context = mp_context
         self.n_jobs = n_jobs
         self.dask_ip = dask_ip
+        self.cache_evals = cache_evals
+        self.warm_start = warm_start
+        self.cache_loc = cache_loc
+        self.successive_halving = successive_halving
+        self.halving_factor = halving_factor
+        self.min_folds = min_folds
+        self.prefix_cache_size = prefix_cache_size
 
         self._random_state = _random_state
         self._splits_vals = _splits_vals
@@ -1163,6 +1360,8 @@ class Param_Search(Params):
         if isinstance(self.weight_scorer, list):
             raise IOError(
                 'weight_scorer within Param Search cannot be list-like')
+        if self.halving_factor < 2:
+            raise IOError('halving_factor must be at least 2')
 
 
 class Shap_Params(Params):
@@ -1177,7 +1376,8 @@ class Shap_Params(Params):
                  kernel_nkmean=20,
                  kernel_link='default',
                  kernel_nsamples='auto',
-                 kernel_l1_reg='auto'):
+                 kernel_l1_reg='auto',
+                 max_subjects=None):
         '''
         There are a number of parameters associated
         with using shap to determine
@@ -1337,6 +1537,21 @@ class Shap_Params(Params):
 
                 default = 'auto'
 
+        max_subjects : int or None, optional
+            An optional budget on the number of subjects to explain
+            per fold. If set, and less than the number of subjects
+            in a fold, then shap values are computed only for a random sample
+            of this many subjects, and the global feature importances
+            are approximated from just that sample. Local feature importances
+            are then only set for the sampled subjects.
+
+            This is most useful with kernel based shap, where
+            the time taken scales directly with the number of subjects.
+
+            ::
+
+                default = None
+
         '''
 
         try:
@@ -1355,13 +1570,15 @@ class Shap_Params(Params):
         self.kernel_link = kernel_link
         self.kernel_nsamples = kernel_nsamples
         self.kernel_l1_reg = kernel_l1_reg
+        self.max_subjects = max_subjects
 
 
 class Feat_Importance(Params):
 
     def __init__(self, obj, scorer='default',
                  shap_params='default', n_perm=10,
-                 inverse_global=False, inverse_local=False):
+                 inverse_global=False, inverse_local=False,
+                 perm_groups=None):
         '''
         There are a number of options for creating Feature Importances in BPt.
         See :ref:`Feat Importances` to learn more about feature importances generally.
@@ -1447,6 +1664,21 @@ class Feat_Importance(Params):
 
                 default = False
 
+        perm_groups : list of list of str or None, optional
+            Only used with 'perm' based feature importances. Optionally
+            passed groups of feature names, e.g., of highly correlated
+            features, where all features in a group are permuted together,
+            rather than each by itself. Each feature in a group is then
+            assigned the importance of the whole group. Any features not
+            in a group are permuted by themselves.
+
+            Note that the feature names refer to the features input to the
+            final model, e.g., after any loaders or transformers.
+
+            ::
+
+                default = None
+
         '''
 
         self.obj = obj
@@ -1463,6 +1695,7 @@ class Feat_Importance(Params):
         self.n_perm = n_perm
         self.inverse_global = inverse_global
         self.inverse_local = inverse_local
+        self.perm_groups = perm_groups
 
         # For compatibility
         self.params = 0
@@ -6,11 +6,16 @@ the ML class.
 """
 import pandas as pd
 import numpy as np
-from joblib import wrap_non_picklable_objects
+import os
+from joblib import wrap_non_picklable_objects, Parallel, delayed
+from copy import copy
 
 from ..helpers.VARS import is_f2b
 from ..helpers.Data_Scopes import Data_Scopes
 from ..helpers.Data_File import Data_File
+from ..helpers.Parse_Cache import (DEFAULT_CACHE_DR, get_cache_key,
+                                   load_cached, save_cached,
+                                   cache_info, clear_cache, evict)
 from ..helpers.Data_Helpers import (auto_data_type,
                                     process_binary_input,
                                     process_ordinal_input,
@@ -20,6 +25,7 @@ from ..helpers.Data_Helpers import (auto_data_type,
                                     filter_float_by_outlier,
                                     filter_float_by_std,
                                     drop_duplicate_cols,
+                                    compact_dtypes,
                                     get_top_substrs,
                                     proc_datatypes,
                                     proc_args,
@@ -275,6 +281,145 @@ def _get_data_file_cnt(self):
         return 0
 
 
+def Set_Parse_Cache(self, cache_dr='default', max_size_mb=10000):
+    '''Turn on a cache of parsed source files, such that
+    the first time a file is loaded with
+    :func:`Load_Data <BPt_ML.Load_Data>`,
+    :func:`Load_Covars <BPt_ML.Load_Covars>`,
+    :func:`Load_Targets <BPt_ML.Load_Targets>` or
+    :func:`Load_Strat <BPt_ML.Load_Strat>`, the loaded and
+    processed (e.g., with subject names processed,
+    NaN values replaced and filtered by eventname) DataFrame is saved to
+    a fast binary format within cache_dr. Any later loads of the same,
+    unchanged, file with the same load params, including from
+    different scripts, then read from the cache instead.
+
+    Parameters
+    ----------
+    cache_dr : str, Path, 'default' or None, optional
+        The directory in which to store the cache, which can be
+        shared between experiments. If 'default', then
+        a directory within the user's home directory, '~/.cache/BPt/'
+        is used. If None, then the cache is turned off (but not cleared).
+
+        (default = 'default')
+
+    max_size_mb : float or None, optional
+        The max size of the cache on disk in MB. Once
+        exceeded, the least recently used entries are removed.
+        If None, then entries are never removed.
+
+        (default = 10000)
+    '''
+
+    if cache_dr is None:
+        self.parse_cache = None
+        self._print('Parse cache turned off.')
+        return
+
+    if cache_dr == 'default':
+        cache_dr = DEFAULT_CACHE_DR
+
+    self.parse_cache = {'cache_dr': os.path.abspath(cache_dr),
+                        'max_size_mb': max_size_mb}
+    self._print('Parse cache set at:', self.parse_cache['cache_dr'])
+
+    # Apply the max size to any existing cache
+    if max_size_mb is not None:
+        evict(self.parse_cache['cache_dr'], max_size_mb)
+
+
+def Get_Parse_Cache_Info(self):
+    '''Get info on the entries in the parse cache,
+    see :func:`Set_Parse_Cache <BPt_ML.Set_Parse_Cache>`.
+
+    Returns
+    ----------
+    pandas DataFrame
+        With one row per cached entry, indexed by key, with columns
+        'loc', 'shape', 'size_mb', 'created' and 'last_used', sorted
+        from most to least recently used.
+    '''
+
+    if self._get_parse_cache() is None:
+        raise RuntimeError('No parse cache set, see Set_Parse_Cache.')
+
+    return cache_info(self.parse_cache['cache_dr'])
+
+
+def Clear_Parse_Cache(self, loc=None):
+    '''Remove entries from the parse cache,
+    see :func:`Set_Parse_Cache <BPt_ML.Set_Parse_Cache>`.
+
+    Parameters
+    ----------
+    loc : str, Path or None, optional
+        If passed, only remove the entries loaded from this file,
+        otherwise remove all entries.
+
+        (default = None)
+    '''
+
+    if self._get_parse_cache() is None:
+        raise RuntimeError('No parse cache set, see Set_Parse_Cache.')
+
+    n_removed = clear_cache(self.parse_cache['cache_dr'], loc=loc)
+    self._print('Removed', n_removed, 'entries from the parse cache.')
+
+
+def _get_parse_cache(self):
+
+    # Objects saved before the parse cache was added won't have it set
+    try:
+        return self.parse_cache
+    except AttributeError:
+        return None
+
+
+def _get_parse_cache_key(self, loc, dataset_type, load_params,
+                         read_params=None):
+    '''Get the parse cache key for loading from loc, or None
+    if no parse cache is set.'''
+
+    if self._get_parse_cache() is None:
+        return None
+
+    # Everything which changes the loaded and processed df
+    params = {'dataset_type': dataset_type,
+              'load_params': {key: load_params[key] for key in
+                              ['subject_id', 'eventname', 'eventname_col',
+                               'na_values']},
+              'read_params': read_params,
+              'subject_id': self.subject_id,
+              'name_map': self.name_map,
+              'use_abcd_subject_ids': self.use_abcd_subject_ids,
+              'exclusions': sorted(self.exclusions),
+              'inclusions': sorted(self.inclusions)}
+
+    return get_cache_key(loc, params)
+
+
+def _load_parse_cached(self, cache_key, loc):
+
+    if cache_key is None:
+        return None
+
+    data = load_cached(self.parse_cache['cache_dr'], cache_key)
+    if data is not None:
+        self._print('Loaded', loc, 'from the parse cache.')
+
+    return data
+
+
+def _save_parse_cached(self, cache_key, data, loc):
+
+    if cache_key is None:
+        return
+
+    save_cached(self.parse_cache['cache_dr'], cache_key, data, loc,
+                max_size_mb=self.parse_cache['max_size_mb'])
+
+
 def Load_Name_Map(self, name_map=None, loc=None, dataset_type='default',
                   source_name_col="NDAR name",
                   target_name_col="REDCap name/NDA alias",
@@ -360,7 +505,9 @@ def Load_Data(self, loc=None, df=None, dataset_type='default', drop_keys=None,
               filter_outlier_percent=None, filter_outlier_std=None,
               unique_val_drop=None, unique_val_warn=.05,
               drop_col_duplicates=None,
-              clear_existing=False, ext=None):
+              clear_existing=False, ext=None,
+              chunksize=None, compact_dtypes=False, engine='c',
+              n_jobs=1):
     """Class method for loading ROI-style data, assuming all loaded
     columns are continuous / float datatype.
 
@@ -435,7 +582,8 @@ def Load_Data(self, loc=None, df=None, dataset_type='default', drop_keys=None,
         If drop_or_na == 'drop', then all rows/subjects with >= 1
         value(s) found outside of the percent will be dropped.
         Otherwise, if drop_or_na = 'na', then any outside values
-        will be set to NaN.
+        will be set to NaN. Both the lower and upper bounds
+        are computed from the original values of each column.
 
         (default = None)
 
@@ -453,7 +601,9 @@ def Load_Data(self, loc=None, df=None, dataset_type='default', drop_keys=None,
 
         If drop_or_na == 'drop', then all rows/subjects with >= 1
         value(s) found will be dropped. Otherwise, if drop_or_na = 'na',
-        then any outside values will be set to NaN.
+        then any outside values will be set to NaN. The mean and
+        standard deviation are computed from the original values
+        of each column.
 
         (default = None)
 
@@ -513,6 +663,50 @@ def Load_Data(self, loc=None, df=None, dataset_type='default', drop_keys=None,
         name mapping.
 
         (default = None)
+
+    chunksize : int or None, optional
+        When loading from a file, only the columns kept after
+        the dataset type default drops, `drop_keys` and `inclusion_keys`
+        are ever read. If chunksize is passed, then the file
+        is further read this many rows at a time, where
+        any rows not matching the passed eventname are dropped
+        from each chunk as it is read, such that the
+        full file is never held in memory at once.
+
+        (default = None)
+
+    compact_dtypes : bool, optional
+        If True, then when loading from a file, each loaded float
+        column is stored as float32 rather than float64, and each
+        integer column as the smallest integer type which fits its values.
+        This can greatly reduce the memory used by large datasets,
+        at the cost of float32 precision.
+
+        (default = False)
+
+    engine : {'c', 'pyarrow'}, optional
+        The pandas read_csv engine used to load from a file. The 'pyarrow'
+        engine, which requires pyarrow to be installed, can be much
+        faster, and is multi-threaded, but does not support
+        chunksize (the whole file, with only the kept columns, is read at
+        once). It is also not used with
+        dataset type 'basic', as the second row of these files must be
+        skipped, which that engine does not support, in which case
+        the 'c' engine is used.
+
+        (default = 'c')
+
+    n_jobs : int, optional
+        When a list of locs is passed, the number of files to load
+        at once, each in its own process. By default, files are loaded
+        one at a time.
+
+        Note that when loading from multiple files,
+        as long as no column names or subjects are repeated,
+        the loaded files are joined all at once, rather than merged
+        one at a time.
+
+        (default = 1)
     """
 
     # Clear existing if requested, otherwise append to
@@ -522,8 +716,14 @@ def Load_Data(self, loc=None, df=None, dataset_type='default', drop_keys=None,
     # Get the common load params as a mix of user-passed + default values
     load_params = self._make_load_params(args=locals())
 
+    # Params for reading from files
+    read_params = {'drop_keys': drop_keys, 'inclusion_keys': inclusion_keys,
+                   'ext': ext, 'chunksize': chunksize,
+                   'compact_dtypes': compact_dtypes, 'engine': engine}
+
     # Load in the raw dataframe - based on dataset type and/or passed user df
-    data = self._load_datasets(loc, df, load_params, ext=ext)
+    data = self._load_datasets(loc, df, load_params, ext=ext,
+                               read_params=read_params, n_jobs=n_jobs)
     self._print()
 
     # Set to only overlap subjects if passed
@@ -2102,7 +2302,8 @@ def Filter_Data_Cols(self, filter_outlier_percent=None,
         If drop_or_na == 'drop', then all rows/subjects with >= 1
         value(s) found outside of the percent will be dropped.
         Otherwise, if drop_or_na = 'na', then any outside values
-        will be set to NaN.
+        will be set to NaN. Both the lower and upper bounds
+        are computed from the original values of each column.
 
         (default = None)
 
@@ -2117,6 +2318,8 @@ def Filter_Data_Cols(self, filter_outlier_percent=None,
         If a single number is passed, that number is applied to both the lower
         and upper range.  If a tuple with None on one side is passed, e.g.
         (None, 3), then nothing will be taken off that lower or upper bound.
+        The mean and standard deviation are computed from the original
+        values of each column.
 
         (default = None)
 
@@ -2139,7 +2342,9 @@ def Filter_Data_Cols(self, filter_outlier_percent=None,
 def Filter_Data_Files_Cols(self, reduce_func=np.mean,
                            filter_outlier_percent=None,
                            filter_outlier_std=None,
-                           overlap_subjects='default'):
+                           overlap_subjects='default',
+                           prefetch=0, prefetch_n_jobs=1,
+                           use_stored_proxies=True):
 
     '''Perform filtering on all loaded data-files based on an outlier percent,
     or filtering by std.
@@ -2199,6 +2404,35 @@ def Filter_Data_Files_Cols(self, reduce_func=np.mean,
 
     overlap_subjects :
 
+    prefetch : int, optional
+        The number of files to read ahead in the background, while
+        the reduce func(s) are applied to the current file.
+        If 0, files are loaded one at a time.
+
+        ::
+
+            default = 0
+
+    prefetch_n_jobs : int, optional
+        The number of threads used to read files ahead, if
+        `prefetch` is greater than 0.
+
+        ::
+
+            default = 1
+
+    use_stored_proxies : bool, optional
+        The reduced value of each data file, by reduce func, is stored
+        in memory the first time it is computed. If True, then
+        any stored values are re-used, such that, e.g., calling
+        this function again with a different `filter_outlier_percent`
+        doesn't load any files again. Set to False if any of the
+        files have changed on disk since.
+
+        ::
+
+            default = True
+
     '''
 
     load_params = self._make_load_params(args=locals())
@@ -2211,6 +2445,9 @@ def Filter_Data_Files_Cols(self, reduce_func=np.mean,
                               file_mapping=self.file_mapping,
                               subject_id=self.subject_id,
                               n_jobs=self.n_jobs,
+                              prefetch=prefetch,
+                              prefetch_n_jobs=prefetch_n_jobs,
+                              use_store=use_stored_proxies,
                               _print=self._print)
 
 
@@ -2718,7 +2955,8 @@ def _get_targets_key(self, key, base_key=False):
     return self.targets_keys[ind]
 
 
-def _load_datasets(self, locs, df, load_params, ext=None):
+def _load_datasets(self, locs, df, load_params, ext=None, read_params=None,
+                   n_jobs=1):
     '''Helper function to load in multiple datasets with default
     load and drop behavior based on type. And calls proc_df on each
     before merging.
@@ -2734,6 +2972,16 @@ def _load_datasets(self, locs, df, load_params, ext=None):
     load_params : dict
         load params
 
+    ext : str or None, optional
+        Extension added to each col name
+
+    read_params : dict or None, optional
+        If passed, only the columns which will be kept are read from each
+        file, see _get_usecols, and any further params for reading.
+
+    n_jobs : int, optional
+        The number of files to load in parallel.
+
     Returns
     ----------
     pandas DataFrame
@@ -2756,8 +3004,18 @@ def _load_datasets(self, locs, df, load_params, ext=None):
         else:
             dataset_types = load_params['dataset_type']
 
-        dfs = [self._load_dataset(locs[i], dataset_types[i],
-               load_params) for i in range(len(locs))]
+        # Load multiple files in parallel, if requested
+        n_jobs = min(n_jobs, len(locs))
+        if n_jobs > 1:
+            worker = self._get_load_worker()
+            dfs = Parallel(n_jobs=n_jobs)(
+                delayed(worker._load_dataset)(locs[i], dataset_types[i],
+                                              load_params, read_params)
+                for i in range(len(locs)))
+
+        else:
+            dfs = [self._load_dataset(locs[i], dataset_types[i],
+                   load_params, read_params) for i in range(len(locs))]
 
     # Load from user-passed df
     if df is not None:
@@ -2777,6 +3035,10 @@ def _load_datasets(self, locs, df, load_params, ext=None):
             col_mapping = {col: col + ext for col in dfs[d]}
             dfs[d] = dfs[d].rename(col_mapping, axis=1)
 
+    # If no repeat col names or subjects, join all at once
+    if len(dfs) > 1 and _can_concat(dfs):
+        return pd.concat(dfs, axis=1, join=load_params['merge'])
+
     # Set first df
     data = dfs[0]
 
@@ -2796,6 +3058,33 @@ def _load_datasets(self, locs, df, load_params, ext=None):
     return data
 
 
+def _can_concat(dfs):
+    '''If a list of dfs can be joined with a single concat
+    on their index, rather than merged one at a time, i.e.,
+    if no column names are repeated and each index is unique.'''
+
+    n_cols = sum(len(df.columns) for df in dfs)
+    all_cols = set().union(*[df.columns for df in dfs])
+    if len(all_cols) != n_cols:
+        return False
+
+    return all([df.index.is_unique for df in dfs])
+
+
+def _get_load_worker(self):
+    '''Get a shallow copy of this object, without any already loaded data,
+    to send to each job when loading multiple datasets in parallel.'''
+
+    worker = copy(self)
+    worker.data, worker.covars = pd.DataFrame(), pd.DataFrame()
+    worker.targets, worker.strat = pd.DataFrame(), pd.DataFrame()
+    worker.all_data = None
+    worker.file_mapping = {}
+    worker._lazy_frames = None
+
+    return worker
+
+
 def _load_user_passed(self, df, na_values):
 
     self._print('Loading from df or files')
@@ -2807,7 +3096,7 @@ def _load_user_passed(self, df, na_values):
     return df
 
 
-def _load_dataset(self, loc, dataset_type, load_params):
+def _load_dataset(self, loc, dataset_type, load_params, read_params=None):
     '''Helper function to load in a dataset with default
     load and drop behavior based on type. And calls proc_df.
 
@@ -2819,6 +3108,14 @@ def _load_dataset(self, loc, dataset_type, load_params):
     dataset_type : {'default', 'basic', 'explorer', 'custom'}
         The type of dataset to load from.
 
+    load_params : dict
+        load params
+
+    read_params : dict or None, optional
+        If passed, then the default drops by dataset type,
+        along with any drop or inclusion keys, are resolved before
+        reading, such that only the kept columns are read.
+
     Returns
     ----------
     pandas DataFrame
@@ -2826,29 +3123,113 @@ def _load_dataset(self, loc, dataset_type, load_params):
         minimally proc'ed data.
     '''
 
-    data = self._load(loc, dataset_type, load_params['na_values'])
+    # Use the parse cache, if any
+    cache_key = self._get_parse_cache_key(loc, dataset_type, load_params,
+                                          read_params)
+    data = self._load_parse_cached(cache_key, loc)
+    if data is not None:
+        return data
+
+    # Read only the kept columns
+    if read_params is not None:
+        read_params = read_params.copy()
+        read_params['usecols'], read_params['usecol_names'] =\
+            self._get_usecols(loc, dataset_type, load_params, read_params)
+        read_params['eventname'] = load_params['eventname']
+        read_params['eventname_col'] = load_params['eventname_col']
+
+        data = self._load(loc, dataset_type, load_params['na_values'],
+                          read_params=read_params)
+
+    else:
+        data = self._load(loc, dataset_type, load_params['na_values'])
+        data = data.drop(self._get_default_drop_cols(list(data),
+                                                     dataset_type), axis=1)
+
+    data = self._proc_df(data, load_params)
+    self._save_parse_cached(cache_key, data, loc)
+
+    return data
+
+
+def _get_default_drop_cols(self, column_names, dataset_type):
+    '''Get the columns dropped by default based on dataset type.'''
+
+    to_drop = []
 
     # If dataset type is basic or explorer, drop some cols by default
     if dataset_type == 'basic' or dataset_type == 'explorer':
 
         if dataset_type == 'basic':
-            non_data_cols = list(data)[:4] + list(data)[5:8]
+            non_data_cols = column_names[:4] + column_names[5:8]
         else:
-            non_data_cols = list(data)[:2]
-
-        data = data.drop(non_data_cols, axis=1)
+            non_data_cols = column_names[:2]
 
         # Drop extra by presence of extra drop keys
         extra_drop_keys = ['visitid', 'collection_title', 'study_cohort_name']
-        to_drop = [name for name in list(data) for drop_key in extra_drop_keys
+        to_drop = [name for name in column_names
+                   if name not in non_data_cols for drop_key in extra_drop_keys
                    if drop_key in name]
-        data = data.drop(to_drop, axis=1)
 
-        self._print('dropped', non_data_cols + to_drop, 'columns by default',
+        to_drop = non_data_cols + to_drop
+        self._print('dropped', to_drop, 'columns by default',
                     ' due to dataset type')
 
-    data = self._proc_df(data, load_params)
-    return data
+    return to_drop
+
+
+def _get_usecols(self, loc, dataset_type, load_params, read_params):
+    '''Resolve the default drops by dataset type, and any
+    drop_keys or inclusion_keys, as applied to each column name after
+    the name map and ext, to the positions and names of the columns
+    in the file at loc to read.'''
+
+    column_names = list(self._read_csv(loc, dataset_type, None, nrows=0))
+    to_drop = set(self._get_default_drop_cols(column_names, dataset_type))
+
+    # Always keep the subject id and eventname cols, by either name
+    keep = set()
+    for name in [load_params['subject_id'], self.subject_id,
+                 load_params['eventname_col']]:
+        keep.add(name)
+        keep.add(self.name_map.get(name, name))
+
+    drop_keys = read_params['drop_keys']
+    inclusion_keys = read_params['inclusion_keys']
+    if isinstance(drop_keys, str):
+        drop_keys = [drop_keys]
+    if isinstance(inclusion_keys, str):
+        inclusion_keys = [inclusion_keys]
+
+    ext = read_params['ext']
+
+    usecols = []
+    for i, raw_name in enumerate(column_names):
+
+        name = self.name_map.get(raw_name, raw_name)
+        if raw_name in keep or name in keep:
+            usecols.append(i)
+            continue
+
+        if raw_name in to_drop:
+            continue
+
+        if ext is not None:
+            name = name + ext
+
+        if drop_keys is not None and\
+           any(drop_key in name for drop_key in drop_keys):
+            continue
+
+        if inclusion_keys is not None and\
+           not any(key in name for key in inclusion_keys):
+            continue
+
+        usecols.append(i)
+
+    self._print('Reading', len(usecols), 'of', len(column_names), 'columns')
+
+    return usecols, [column_names[i] for i in usecols]
 
 
 def _common_load(self, loc, df, dataset_type, load_params,
@@ -2859,17 +3240,25 @@ def _common_load(self, loc, df, dataset_type, load_params,
     if loc is None and df is None:
         raise AssertionError('Either loc or df must be passed!')
 
-    # Reads raw data based on dataset type
+    # Reads raw data based on dataset type, or from the parse cache
     if loc is not None:
-        data = self._load(loc, load_params['dataset_type'],
-                          load_params['na_values'])
+        cache_key = self._get_parse_cache_key(loc,
+                                              load_params['dataset_type'],
+                                              load_params)
+        data = self._load_parse_cached(cache_key, loc)
+
+        if data is None:
+            data = self._load(loc, load_params['dataset_type'],
+                              load_params['na_values'])
+            data = self._proc_df(data, load_params)
+            self._save_parse_cached(cache_key, data, loc)
 
     # User passed
     if df is not None:
         data = self._load_user_passed(df, load_params['na_values'])
 
-    # Perform proc common operations
-    data = self._proc_df(data, load_params)
+        # Perform proc common operations
+        data = self._proc_df(data, load_params)
 
     # Set to only overlap subjects if passed
     data = self._set_overlap(data, load_params['overlap_subjects'])
@@ -2892,7 +3281,7 @@ def _common_load(self, loc, df, dataset_type, load_params,
     return data, list(data)
 
 
-def _load(self, loc, dataset_type, na_values):
+def _load(self, loc, dataset_type, na_values, read_params=None):
     '''Base load helper function, for simply loading file
     into memory based on dataset type.
 
@@ -2918,6 +3307,11 @@ def _load(self, loc, dataset_type, na_values):
 
     na_values
 
+    read_params : dict or None, optional
+        If passed, the 'usecols' and 'usecol_names' to read, and
+        the 'chunksize', 'engine', 'compact_dtypes', 'eventname' and
+        'eventname_col' to read them with, see Load_Data.
+
     Returns
     ----------
     pandas DataFrame
@@ -2926,17 +3320,95 @@ def _load(self, loc, dataset_type, na_values):
 
     self._print('Loading', loc, ' with dataset type:', dataset_type)
 
-    if dataset_type == 'basic':
-        data = pd.read_csv(loc, sep='\t', skiprows=[1],
-                           na_values=na_values,
-                           low_memory=self.low_memory_mode)
+    if read_params is None:
+        return self._read_csv(loc, dataset_type, na_values)
+
+    engine = read_params['engine']
+    if engine == 'pyarrow' and dataset_type == 'basic':
+        engine = 'c'
+
+    # Read either all at once, or a chunk at a time
+    chunksize = read_params['chunksize']
+    if engine == 'pyarrow':
+        chunksize = None
+
+    # The pyarrow engine only selects columns by name
+    usecols = read_params['usecols']
+    if engine == 'pyarrow':
+        usecols = read_params['usecol_names']
+
+    chunks = self._read_csv(loc, dataset_type, na_values, usecols=usecols,
+                            chunksize=chunksize, engine=engine)
+    if chunksize is None:
+        chunks = [chunks]
+
+    # Filter each chunk as read
+    eventname_col = self._get_raw_col_name(read_params['eventname_col'],
+                                           read_params['usecol_names'])
+    eventname = read_params['eventname']
+    if eventname is not None and not isinstance(eventname, list):
+        eventname = [eventname]
+
+    dfs, n_dropped = [], 0
+    for chunk in chunks:
+
+        if eventname is not None and eventname_col in chunk:
+            keep = chunk[eventname_col].isin(eventname)
+            n_dropped += len(keep) - keep.sum()
+            chunk = chunk[keep.to_numpy()]
+
+        # Skip any fully dropped chunks, unless none are left
+        if len(chunk) == 0:
+            empty = chunk
+            continue
+
+        dfs.append(chunk)
+
+    if n_dropped > 0:
+        self._print(n_dropped, 'data points have been dropped',
+                    'based on the passed eventname params.')
+
+    if len(dfs) == 0:
+        data = empty
+    elif len(dfs) == 1:
+        data = dfs[0]
     else:
-        data = pd.read_csv(loc, na_values=na_values,
-                           low_memory=self.low_memory_mode)
+        data = pd.concat(dfs, ignore_index=True, copy=False)
+
+    # Compact once, such that the dtypes are the same as if read at once
+    if read_params['compact_dtypes']:
+        data = compact_dtypes(data)
 
     return data
 
 
+def _read_csv(self, loc, dataset_type, na_values, **kwargs):
+    '''Call pd.read_csv according to dataset type.'''
+
+    if kwargs.get('engine', 'c') != 'pyarrow':
+        kwargs['low_memory'] = self.low_memory_mode
+
+    if dataset_type == 'basic':
+        return pd.read_csv(loc, sep='\t', skiprows=[1],
+                           na_values=na_values, **kwargs)
+
+    return pd.read_csv(loc, na_values=na_values, **kwargs)
+
+
+def _get_raw_col_name(self, name, column_names):
+    '''Get the name of a column as loaded, before
+    any name mapping.'''
+
+    if name in self.name_map or name in column_names:
+        return name
+
+    for raw_name in column_names:
+        if self.name_map.get(raw_name, None) == name:
+            return raw_name
+
+    return name
+
+
 def _set_overlap(self, data, overlap_subjects):
 
     if overlap_subjects:
@@ -22,6 +22,7 @@ from ..main.Params_Classes import (Feat_Importance, Model_Pipeline,
 from ..pipeline.Model_Pipeline import get_pipe
 import pandas as pd
 import copy
+from joblib import cpu_count
 
 
 def Set_Default_ML_Verbosity(
@@ -272,7 +273,10 @@ def Evaluate(self,
              feat_importances=None,
              return_raw_preds=False,
              return_models=False,
-             run_name='default'):
+             run_name='default',
+             fold_n_jobs=1,
+             fold_backend='loky',
+             trace=False):
     ''' The Evaluate function is one of the main interfaces
     for building and evaluating :class:`Model_Pipeline` on the loaded data.
     Specifically, Evaluate is designed to try and estimate the out of sample
@@ -467,9 +471,18 @@ def Evaluate(self,
 
             default = None
 
-    return_raw_preds : bool, optional
+    return_raw_preds : bool or str, optional
         If True, return the raw predictions from each fold.
 
+        If passed a str, then the raw predictions are returned,
+        and also saved to this location. If the location ends
+        with '.parquet', then they are saved as a parquet file
+        (which requires pyarrow), otherwise as a numpy .npz file, with
+        keys 'index', 'columns', and then 'col0', 'col1', ...
+        for each column. As the .npz file holds object arrays,
+        it must be loaded with allow_pickle=True, or just with
+        BPt.pipeline.Evaluator.Raw_Preds.load.
+
         ::
 
             default = False
@@ -501,6 +514,56 @@ def Evaluate(self,
 
             default = 'default'
 
+    fold_n_jobs : int, optional
+        The number of evaluation folds to train and score in parallel.
+        If left as 1, each fold is computed one after another.
+        If set to -1, then the number of folds
+        run in parallel is set to the `n_jobs` of the passed
+        :class:`Problem_Spec`.
+
+        When greater than 1, the `n_jobs` of the
+        passed :class:`Problem_Spec` is treated as a total budget,
+        and divided between the folds, such that each fold is run with
+        `n_jobs // fold_n_jobs` (with a minimum of 1). Results
+        are always recorded in fold order, so the returned results are the
+        same as if computed sequentially.
+
+        ::
+
+            default = 1
+
+    fold_backend : {'loky', 'multiprocessing', 'threading', 'dask'}, optional
+        The joblib backend used to compute the folds in parallel
+        when `fold_n_jobs` is greater than 1.
+
+        If 'dask', then the passed `model_pipeline` must
+        have a :class:`Param_Search` with `dask_ip` set, and
+        the folds will be submitted to that same dask cluster.
+
+        ::
+
+            default = 'loky'
+
+    trace : bool or str, optional
+        If True, record the wall time, CPU time, peak memory and
+        output shape of each step of the pipeline
+        (e.g., the fit and transform of each loader, transformer,
+        feature selector, scoped model and parameter search), within
+        each fold, returned under 'trace' in the results
+        as a Trace object. See Trace.summary() for totals by step,
+        and Trace.to_json() or Trace.to_chrome_trace() to export,
+        where the latter can be viewed in chrome://tracing.
+
+        If passed a str, then the trace is returned,
+        and also saved to this location in the Chrome trace format.
+
+        Note that when the parameter search is run with more than
+        one job, only the search as a whole is recorded.
+
+        ::
+
+            default = False
+
     Returns
     ----------
     results : dict
@@ -520,9 +583,10 @@ def Evaluate(self,
         the first element the raw training score in this same format,
         and then the raw testing scores.
         'raw_preds', A pandas dataframe containing the raw predictions
-        for each subject, in the test set, and
+        for each subject, in the test set,
         'FIs' a list where each element corresponds
-        to a passed feature importance.
+        to a passed feature importance, and 'trace', the Trace if
+        `trace` is set, otherwise None.
 
     Notes
     ----------
@@ -568,6 +632,9 @@ def Evaluate(self,
     # Pre-proc problem spec, set as copy ps, right before print
     ps = self._preproc_problem_spec(problem_spec)
 
+    # Split the n_jobs budget between parallel folds
+    ps, fold_n_jobs = self._get_fold_n_jobs(ps, fold_n_jobs)
+
     # Run checks before print
     model_pipeline._proc_checks()
 
@@ -587,6 +654,11 @@ def Evaluate(self,
         self._print('len(train_subjects) =', len(_train_subjects),
                     '(before overlap w/ problem_spec.subjects)')
         self._print('run_name =', run_name)
+        self._print('fold_n_jobs =', fold_n_jobs)
+        if fold_n_jobs > 1:
+            self._print('fold_backend =', fold_backend)
+        if trace:
+            self._print('trace =', trace)
         self._print()
 
     # Init the Model_Pipeline object with modeling params
@@ -596,7 +668,10 @@ def Evaluate(self,
         CV=CV_obj,
         feat_importances=feat_importances,
         return_raw_preds=return_raw_preds,
-        return_models=return_models)
+        return_models=return_models,
+        fold_n_jobs=fold_n_jobs,
+        fold_backend=fold_backend,
+        trace=trace)
 
     # Get the Eval splits
     _, splits_vals, _ = self._get_split_vals(splits)
@@ -663,7 +738,8 @@ def Test(self,
          feat_importances=None,
          return_raw_preds=False,
          return_models=False,
-         run_name='default'):
+         run_name='default',
+         trace=False):
     ''' The test function is one of the main interfaces for testing a specific
     :class:`Model_Pipeline`. Test is conceptually different from
     :func:`Evaluate<BPt_ML.Evaluate>`
@@ -812,9 +888,18 @@ def Test(self,
 
             default = None
 
-    return_raw_preds : bool, optional
+    return_raw_preds : bool or str, optional
         If True, return the raw predictions from each fold.
 
+        If passed a str, then the raw predictions are returned,
+        and also saved to this location. If the location ends
+        with '.parquet', then they are saved as a parquet file
+        (which requires pyarrow), otherwise as a numpy .npz file, with
+        keys 'index', 'columns', and then 'col0', 'col1', ...
+        for each column. As the .npz file holds object arrays,
+        it must be loaded with allow_pickle=True, or just with
+        BPt.pipeline.Evaluator.Raw_Preds.load.
+
         ::
 
             default = False
@@ -846,14 +931,35 @@ def Test(self,
 
             default = 'default'
 
+    trace : bool or str, optional
+        If True, record the wall time, CPU time, peak memory and
+        output shape of each step of the pipeline
+        (e.g., the fit and transform of each loader, transformer,
+        feature selector, scoped model and parameter search), within
+        the train / test fit, returned under 'trace' in the results
+        as a Trace object. See Trace.summary() for totals by step,
+        and Trace.to_json() or Trace.to_chrome_trace() to export,
+        where the latter can be viewed in chrome://tracing.
+
+        If passed a str, then the trace is returned,
+        and also saved to this location in the Chrome trace format.
+
+        Note that when the parameter search is run with more than
+        one job, only the search as a whole is recorded.
+
+        ::
+
+            default = False
+
     Returns
     ----------
     results : dict
         Dictionary containing:
         'scores', the score on the test set by each scorer,
         'raw_preds', A pandas dataframe containing the raw predictions
-        for each subject, in the test set, and 'FIs' a list where
-        each element corresponds to a passed feature importance.
+        for each subject, in the test set, 'FIs' a list where
+        each element corresponds to a passed feature importance, and
+        'trace', the Trace if `trace` is set, otherwise None.
     '''
 
     # Perform pre-modeling check
@@ -895,6 +1001,8 @@ def Test(self,
                     '(before overlap w/ problem_spec.subjects)')
         self._print('feat_importances =', feat_importances)
         self._print('run_name =', run_name)
+        if trace:
+            self._print('trace =', trace)
         self._print()
 
     # Init the Model_Pipeline object with modeling params
@@ -904,7 +1012,8 @@ def Test(self,
         CV=self.CV,
         feat_importances=feat_importances,
         return_raw_preds=return_raw_preds,
-        return_models=return_models)
+        return_models=return_models,
+        trace=trace)
 
     # Train the model w/ selected parameters and test on test subjects
     train_scores, scores, results =\
@@ -1274,8 +1383,31 @@ def get_pipeline(self, model_pipeline, problem_spec,
                     verbose=self.default_ML_verbosity['pipeline_verbose'])
 
 
+def _get_fold_n_jobs(self, ps, fold_n_jobs):
+    '''Return the number of folds to run in parallel, and ps, or if
+    more than one, a copy of ps with n_jobs set as the n_jobs per fold.'''
+
+    if fold_n_jobs == 1:
+        return ps, 1
+
+    n_jobs = ps.n_jobs
+    if n_jobs == -1:
+        n_jobs = cpu_count()
+
+    if fold_n_jobs == -1:
+        fold_n_jobs = n_jobs
+
+    fold_n_jobs = max(1, int(fold_n_jobs))
+
+    ps = copy.copy(ps)
+    ps.n_jobs = max(1, n_jobs // fold_n_jobs)
+
+    return ps, fold_n_jobs
+
+
 def _init_evaluator(self, model_pipeline, ps,
-                    CV, feat_importances, return_raw_preds, return_models):
+                    CV, feat_importances, return_raw_preds, return_models,
+                    fold_n_jobs=1, fold_backend='loky', trace=False):
 
     # Make copies of the passed pipeline
     # and only make changes and pass along the copies
@@ -1297,7 +1429,10 @@ def _init_evaluator(self, model_pipeline, ps,
                   return_raw_preds=return_raw_preds,
                   return_models=return_models,
                   verbosity=self.default_ML_verbosity,
-                  _print=self._ML_print)
+                  _print=self._ML_print,
+                  fold_n_jobs=fold_n_jobs,
+                  fold_backend=fold_backend,
+                  trace=trace)
 
 
 def _handle_scores(self, scores, name, weight_scorer, n_repeats, run_name,
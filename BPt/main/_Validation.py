@@ -8,6 +8,8 @@ import numpy as np
 import os
 
 from ..helpers.Data_Helpers import get_unique_combo_df, reverse_unique_combo_df
+from ..helpers.CV import (clear_splits_store, save_splits_store,
+                          load_splits_store)
 
 
 def _get_CV(self, CV_params, show=False, show_original=True, return_df=False):
@@ -402,6 +404,58 @@ def Train_Test_Split(self, test_size=None,
                     f.write(str(subject) + '\n')
 
 
+def Save_CV_Splits(self, loc):
+    '''Save all of the CV splits computed so far in this process to disk,
+    such that they can be re-used in another process with
+    :func:`Load_CV_Splits <BPt_ML.Load_CV_Splits>`.
+
+    Any splits which are reproducible, i.e., leave one group out or
+    with a fixed random state, are stored when first computed,
+    by the subjects split, the validation strategy, the splits,
+    n_repeats and random state. Any later Evaluate, Test or
+    hyper-parameter search computing the same splits then re-uses
+    the stored splits, rather than computing them again.
+
+    Only the 64 most recently used splits are kept, such that the
+    store doesn't keep growing over a long session, so at most
+    these are saved. Likewise, if more are loaded with
+    :func:`Load_CV_Splits <BPt_ML.Load_CV_Splits>`, only the last
+    64 loaded are kept.
+
+    Parameters
+    ----------
+    loc : str or Path
+        The location of the file in which to save the splits.
+    '''
+
+    n_saved = save_splits_store(loc)
+    self._print('Saved', n_saved, 'computed CV splits to:', loc)
+
+
+def Load_CV_Splits(self, loc):
+    '''Load CV splits saved with
+    :func:`Save_CV_Splits <BPt_ML.Save_CV_Splits>`, such that any of
+    the same splits are re-used, rather than computed.
+
+    Parameters
+    ----------
+    loc : str or Path
+        The location of the file with the saved splits.
+    '''
+
+    n_loaded = load_splits_store(loc)
+    self._print('Loaded', n_loaded, 'computed CV splits from:', loc)
+
+
+def Clear_CV_Splits(self):
+    '''Clear all of the CV splits stored in this process, i.e., up to
+    the 64 most recently used, see
+    :func:`Save_CV_Splits <BPt_ML.Save_CV_Splits>`.'''
+
+    clear_splits_store()
+    self._print('Cleared stored CV splits')
+
+
 def _add_strat_u_name(self, in_vals):
 
     if in_vals is None:
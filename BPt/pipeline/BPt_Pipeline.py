@@ -1,12 +1,108 @@
 from sklearn.pipeline import Pipeline
+from sklearn.utils.validation import check_memory
+from joblib import hash as joblib_hash
+from collections import OrderedDict
 import numpy as np
 from ..helpers.VARS import ORDERED_NAMES
+from .Trace import get_trace, get_shape, trace_step, start_step, end_step
 
 
 def f_array(in_array):
     return np.array(in_array).astype(float)
 
 
+# In process LRU store of fitted transformer steps, by prefix key,
+# see BPt_Pipeline.set_prefix_memo
+_PREFIX_MEMO = OrderedDict()
+
+
+def clear_prefix_memo():
+    '''Clear all memo'ed fitted pipeline prefixes.'''
+
+    _PREFIX_MEMO.clear()
+
+
+class _Prefix_Memory():
+    '''Stands in for a joblib Memory object within the sklearn Pipeline,
+    such that each fitted transformer step, and its output,
+    is stored in process by a key built from the passed memo key
+    (e.g., a search and fold) and the params of all steps up to
+    and including the current one.'''
+
+    def __init__(self, memo_key, max_size):
+
+        self.key = memo_key
+        self.max_size = max_size
+
+    def cache(self, func):
+
+        def cached_func(transformer, X, y, weight, **fit_params):
+
+            # Mapping and train index are set by the fold
+            # and prior steps, so only key on any other fit params
+            other_params = {key: fit_params[key] for key in fit_params
+                            if key not in ['mapping', 'train_data_index',
+                                           'message_clsname', 'message']}
+            self.key = joblib_hash((self.key, transformer, other_params))
+
+            mapping = fit_params.get('mapping', None)
+            if self.key in _PREFIX_MEMO:
+                _PREFIX_MEMO.move_to_end(self.key)
+                X_trans, fitted, new_mapping = _PREFIX_MEMO[self.key]
+
+                # Update the mapping in place, as if fit
+                if mapping is not None:
+                    mapping.clear()
+                    mapping.update(new_mapping)
+
+                return X_trans.copy(), fitted
+
+            X_trans, fitted = func(transformer, X, y, weight, **fit_params)
+
+            if mapping is not None:
+                mapping = mapping.copy()
+            _PREFIX_MEMO[self.key] = (X_trans.copy(), fitted, mapping)
+
+            while len(_PREFIX_MEMO) > self.max_size:
+                _PREFIX_MEMO.popitem(last=False)
+
+            return X_trans, fitted
+
+        return cached_func
+
+
+class _Traced_Memory():
+    '''Wraps the memory used by the sklearn Pipeline, such that
+    the fit of each transformer step is recorded to the active trace,
+    by step name.'''
+
+    def __init__(self, memory, names):
+
+        self.memory = check_memory(memory)
+        self.names = list(names)
+
+    def cache(self, func):
+
+        cached_func = self.memory.cache(func)
+
+        def traced_func(transformer, X, y, weight, **fit_params):
+
+            # Steps are fit in order
+            name = type(transformer).__name__
+            if len(self.names) > 0:
+                name = self.names.pop(0)
+
+            with trace_step('BPt_Pipeline.' + name + '.fit_transform',
+                            shape=get_shape(X)) as event:
+                X_trans, fitted = cached_func(transformer, X, y, weight,
+                                              **fit_params)
+                event['shape'] = get_shape(X_trans)
+
+            return X_trans, fitted
+
+        return traced_func
+
+
 class BPt_Pipeline(Pipeline):
 
     needs_mapping = True
@@ -31,6 +127,16 @@ class BPt_Pipeline(Pipeline):
         super()._set_params('steps', **kwargs)
         return self
 
+    def set_prefix_memo(self, memo_key, max_size):
+        '''For just the next call to fit, memoize the fitted transformer
+        steps, i.e., all steps but the last, in process. Pipelines fit with the
+        same memo_key (which should identify the data fit on) and the same
+        params for the first n steps then re-use those fitted steps,
+        rather than re-fitting them. At most max_size fitted steps are
+        stored, with the least recently used removed first.'''
+
+        self._prefix_memo = (memo_key, max_size)
+
     def fit(self, X, y=None, mapping=None,
             train_data_index=None, **fit_params):
 
@@ -54,9 +160,57 @@ class BPt_Pipeline(Pipeline):
         for name in self.needs_index:
             fit_params[name + '__train_data_index'] = train_data_index
 
-        super().fit(X, y, **fit_params)
+        # If set, and not already caching, use the prefix memo
+        prefix_memo = getattr(self, '_prefix_memo', None)
+        self._prefix_memo = None
+
+        memory = self.memory
+        if prefix_memo is not None and self.memory is None and\
+           prefix_memo[1] > 0:
+            memory = _Prefix_Memory(*prefix_memo)
+
+        # If tracing, record each step
+        tracing = get_trace() is not None
+        if tracing:
+            memory = _Traced_Memory(memory, self._get_transformer_names())
+
+        if memory is self.memory:
+            super().fit(X, y, **fit_params)
+            return self
+
+        original_memory = self.memory
+        try:
+            self.memory = memory
+
+            with trace_step('BPt_Pipeline.fit', shape=get_shape(X)):
+                super().fit(X, y, **fit_params)
+
+                # Record the end of the final step, started in _fit
+                if tracing:
+                    end_step(self._final_step_event)
+
+        finally:
+            self.memory = original_memory
+            self._final_step_event = None
+
         return self
 
+    def _fit(self, X, y=None, **fit_params_steps):
+
+        Xt = super()._fit(X, y, **fit_params_steps)
+
+        # All that remains is to fit the final step
+        self._final_step_event =\
+            start_step('BPt_Pipeline.' + self.steps[-1][0] + '.fit',
+                       shape=get_shape(Xt))
+
+        return Xt
+
+    def _get_transformer_names(self):
+
+        return [name for name, trans in self.steps[:-1]
+                if trans is not None and trans != 'passthrough']
+
     def _get_objs_by_name(self):
 
         if self.names is None:
@@ -2,13 +2,102 @@ import pandas as pd
 
 import numpy as np
 import time
+import os
 
+from joblib import Parallel, delayed, parallel_backend
 from ..helpers.ML_Helpers import conv_to_list
+from ..helpers.Shared_Array import (to_shared, from_shared,
+                                    get_temp_dr, remove_temp_dr)
 from .Feat_Importances import get_feat_importances_and_params
 from .Scorers import process_scorers
-from copy import deepcopy
+from .Loaders import set_loader_memo, clear_loader_memo
+from .Trace import Trace, fold_trace, trace_step
+from copy import copy, deepcopy
 from os.path import dirname, abspath, exists
 from sklearn.base import clone
+from uuid import uuid4
+
+
+def _print_nothing(*args, **kwargs):
+    pass
+
+
+def _compute_worker_fold(worker, data, train_subjects, test_subjects,
+                         fold_ind):
+    '''Compute a fold with a separate deep copy of the worker, as computing
+    a fold sets the fitted model and other per fold state on the
+    evaluator, which must not be shared between folds computed in
+    threads at the same time.'''
+
+    try:
+        return deepcopy(worker)._compute_fold(data, train_subjects,
+                                              test_subjects, fold_ind)
+
+    # Don't keep loader outputs in worker processes once done, while
+    # threads share the memo with the parent, which clears it
+    finally:
+        if os.getpid() != worker._parent_pid:
+            clear_loader_memo()
+
+
+class Raw_Preds():
+    '''Column oriented buffer of raw predictions, where each column is a
+    preallocated numpy array, written to by integer subject position, and
+    only materialized as a DataFrame once, see to_df.'''
+
+    def __init__(self, subjects):
+
+        self.index = pd.Index(subjects)
+        self.columns = {}
+
+    def get_positions(self, subjects):
+
+        positions = self.index.get_indexer(subjects)
+        if (positions == -1).any():
+            raise KeyError('Subjects missing from raw preds index')
+
+        return positions
+
+    def set(self, positions, col, values, dtype=float):
+
+        if col not in self.columns:
+            self.columns[col] = np.full(len(self.index), np.nan, dtype=dtype)
+
+        self.columns[col][positions] = values
+
+    def to_df(self):
+
+        return pd.DataFrame(self.columns, index=self.index, copy=False)
+
+    def save(self, loc):
+        '''Save as either parquet, if ending in .parquet,
+        otherwise as a numpy .npz file. Note that the .npz file holds
+        object arrays, e.g., the fold of each subject, so must be
+        loaded with allow_pickle=True, see load.'''
+
+        if str(loc).endswith('.parquet'):
+            self.to_df().to_parquet(loc)
+            return
+
+        columns = list(self.columns)
+        np.savez(loc, index=np.asarray(self.index),
+                 columns=np.array(columns, dtype=object),
+                 **{'col' + str(i): self.columns[col]
+                    for i, col in enumerate(columns)})
+
+    @staticmethod
+    def load(loc):
+        '''Load raw predictions saved with save, as the same
+        DataFrame returned by to_df.'''
+
+        if str(loc).endswith('.parquet'):
+            return pd.read_parquet(loc)
+
+        with np.load(loc, allow_pickle=True) as data:
+            columns = list(data['columns'])
+            return pd.DataFrame({col: data['col' + str(i)]
+                                 for i, col in enumerate(columns)},
+                                index=pd.Index(data['index']))
 
 
 class Evaluator():
@@ -18,7 +107,8 @@ class Evaluator():
 
     def __init__(self, model, problem_spec, CV, all_keys,
                  feat_importances, return_raw_preds, return_models,
-                 verbosity, _print=print):
+                 verbosity, _print=print, fold_n_jobs=1,
+                 fold_backend='loky', trace=False):
 
         # Save passed params
         self.model = model
@@ -31,6 +121,9 @@ class Evaluator():
         self.compute_train_score = verbosity['compute_train_score']
         self.progress_loc = verbosity['progress_loc']
         self._print = _print
+        self.fold_n_jobs = fold_n_jobs
+        self.fold_backend = fold_backend
+        self.trace = trace
         self.models = []
 
         # Default params
@@ -47,6 +140,11 @@ class Evaluator():
     def _set_default_params(self):
 
         self.n_splits_ = None
+        self._loader_memo_key = None
+        self.raw_preds_ = None
+        self.trace_ = None
+        self._final_mask = None
+        self._subject_ranks = None
 
         self.flags = {'linear': False,
                       'tree': False}
@@ -71,21 +169,33 @@ class Evaluator():
         return []
 
     def _get_subjects_overlap(self, subjects):
-        '''Computer overlapping subjects with self.ps._final_subjects'''
+        '''Computer overlapping subjects with self.ps._final_subjects,
+        in sorted order.'''
 
-        if self.ps._final_subjects is None:
-            overlap = set(subjects)
-        else:
-            overlap = self.ps._final_subjects.intersection(set(subjects))
+        subjects = pd.Index(subjects).unique()
+
+        if self.ps._final_subjects is not None:
+            subjects = subjects[subjects.isin(self.ps._final_subjects)]
 
-        return np.array(list(overlap))
+        try:
+            subjects = subjects.sort_values()
+        except TypeError:
+            pass
+
+        return np.asarray(subjects)
 
     def _get_results(self):
 
         results = {}
 
         # If raw_preds off, will just return None
-        results['raw_preds'] = self.raw_preds_df
+        results['raw_preds'] = None
+        if self.raw_preds_ is not None:
+            results['raw_preds'] = self.raw_preds_.to_df()
+
+            # If passed a location, also save
+            if isinstance(self.return_raw_preds, str):
+                self.raw_preds_.save(self.return_raw_preds)
 
         # If no feature importances will just be empty list
         results['FIs'] = self.feat_importances
@@ -93,6 +203,11 @@ class Evaluator():
         # If return models off, will just be empty list
         results['models'] = self.models
 
+        # If trace off, will just be None
+        results['trace'] = self.trace_
+        if self.trace_ is not None and isinstance(self.trace, str):
+            self.trace_.save(self.trace)
+
         return results
 
     def Evaluate(self, data, train_subjects, splits, n_repeats, splits_vals):
@@ -120,11 +235,17 @@ class Evaluator():
             as the number of scorers.
         '''
 
+        # Materialize the data used as float once
+        data = self._get_eval_data(data)
+
         # Set train_subjects according to self.ps._final_subjects
         train_subjects = self._get_subjects_overlap(train_subjects)
 
-        # Init raw_preds_df
-        self._init_raw_preds_df(train_subjects)
+        # Init raw preds buffer
+        self._init_raw_preds(train_subjects)
+
+        # Init the trace, if any
+        self._init_trace()
 
         # Setup the desired eval splits
         subject_splits =\
@@ -132,7 +253,6 @@ class Evaluator():
                                   n_repeats, splits_vals)
 
         all_train_scores, all_scores = [], []
-        fold_ind = 0
 
         # Init progress bar if any
         if self.progress_bar is not None:
@@ -150,58 +270,64 @@ class Evaluator():
 
         self.n_test_per_fold = []
 
-        # For each split with the repeated K-fold
-        for train_subjects, test_subjects in subject_splits:
-
-            self.n_test_per_fold.append(len(test_subjects))
-
-            # Fold name verbosity
-            repeat = str((fold_ind // self.n_splits_) + 1)
-            fold = str((fold_ind % self.n_splits_) + 1)
-            self._print(level='name')
-            self._print('Repeat: ', repeat, '/', n_repeats, ' Fold: ',
-                        fold, '/', self.n_splits_, sep='', level='name')
-
-            if self.progress_bar is not None:
-                repeats_bar.n = int(repeat) - 1
-                repeats_bar.refresh()
-
-                folds_bar.n = int(fold) - 1
-                folds_bar.refresh()
-
-            # Run actual code for this evaluate fold
-            start_time = time.time()
-            train_scores, scores = self.Test(data, train_subjects,
-                                             test_subjects, fold_ind)
+        # Subject independent loaders are computed once per subject
+        # within this call, rather than once per fold
+        self._loader_memo_key = uuid4().hex
 
-            # Time by fold verbosity
-            elapsed_time = time.time() - start_time
-            time_str = time.strftime("%H:%M:%S", time.gmtime(elapsed_time))
-            self._print('Time Elapsed:', time_str, level='time')
+        try:
+            # Each fold is computed, potentially in parallel, then
+            # the results recorded one at a time in fold order
+            fold_results = self._get_fold_results(data, subject_splits)
+            for fold_ind, fold_result in enumerate(fold_results):
+
+                # Fold name verbosity
+                repeat = str((fold_ind // self.n_splits_) + 1)
+                fold = str((fold_ind % self.n_splits_) + 1)
+                self._print(level='name')
+                self._print('Repeat: ', repeat, '/', n_repeats, ' Fold: ',
+                            fold, '/', self.n_splits_, sep='', level='name')
+
+                if self.progress_bar is not None:
+                    repeats_bar.n = int(repeat) - 1
+                    repeats_bar.refresh()
+
+                    folds_bar.n = int(fold)
+                    folds_bar.refresh()
+
+                # Record the results from this evaluate fold
+                train_scores, scores = self._record_fold(data, fold_result,
+                                                         fold_ind)
+
+                # Time by fold verbosity
+                time_str = time.strftime("%H:%M:%S",
+                                         time.gmtime(fold_result['time']))
+                self._print('Time Elapsed:', time_str, level='time')
+
+                # Score by fold verbosity
+                if self.compute_train_score:
+                    for i in range(len(self.scorer_strs)):
+                        self._print('train ', self.scorer_strs[i], ': ',
+                                    train_scores[i], sep='', level='score')
 
-            # Score by fold verbosity
-            if self.compute_train_score:
                 for i in range(len(self.scorer_strs)):
-                    self._print('train ', self.scorer_strs[i], ': ',
-                                train_scores[i], sep='', level='score')
+                    self._print('val ', self.scorer_strs[i], ': ',
+                                scores[i], sep='', level='score')
 
-            for i in range(len(self.scorer_strs)):
-                self._print('val ', self.scorer_strs[i], ': ',
-                            scores[i], sep='', level='score')
+                # If progress loc
+                if self.progress_loc is not None:
 
-            # If progress loc
-            if self.progress_loc is not None:
+                    if not exists(dirname(abspath(self.progress_loc))):
+                        raise SystemExit('Folder where progress is stored '
+                                         ' was removed!')
 
-                if not exists(dirname(abspath(self.progress_loc))):
-                    raise SystemExit('Folder where progress is stored '
-                                     ' was removed!')
+                    with open(self.progress_loc, 'a') as f:
+                        f.write('fold\n')
 
-                with open(self.progress_loc, 'a') as f:
-                    f.write('fold\n')
+                all_train_scores.append(train_scores)
+                all_scores.append(scores)
 
-            all_train_scores.append(train_scores)
-            all_scores.append(scores)
-            fold_ind += 1
+        finally:
+            clear_loader_memo()
 
         if self.progress_bar is not None:
             repeats_bar.n = n_repeats
@@ -240,6 +366,93 @@ class Evaluator():
 
         return subject_splits
 
+    def _get_eval_data(self, data):
+        '''Select just the columns used in modelling, and cast
+        to a single contiguous float array once, rather than per fold,
+        such that each fold can be selected by position.'''
+
+        data = pd.DataFrame(data[self.all_keys].to_numpy(dtype=float),
+                            index=data.index, columns=self.all_keys,
+                            copy=False)
+
+        # Mask of rows in the final subjects, if any
+        if self.ps._final_subjects is None:
+            self._final_mask = None
+        else:
+            self._final_mask = data.index.isin(self.ps._final_subjects)
+
+        # Rank of each row by subject, such that the rows
+        # of each fold can be put in sorted subject order
+        self._subject_ranks = np.empty(len(data), dtype=int)
+        try:
+            order = data.index.argsort()
+        except TypeError:
+            order = np.arange(len(data))
+        self._subject_ranks[order] = np.arange(len(data))
+
+        return data
+
+    def _get_fold_results(self, data, subject_splits):
+        '''Yield the computed results for each fold in order, where
+        if self.fold_n_jobs is greater than 1, the folds are computed
+        in parallel according to self.fold_backend.'''
+
+        # Sequential case, compute each fold only when requested
+        if self.fold_n_jobs == 1:
+            for fold_ind, (train_subjects, test_subjects) in\
+                  enumerate(subject_splits):
+                yield self._compute_fold(data, train_subjects,
+                                         test_subjects, fold_ind)
+            return
+
+        # Pass a copy w/o the print function to each worker, as it is
+        # a bound method of the parent BPt_ML object, and w/o any
+        # recorded results, which are only needed in the parent.
+        worker = copy(self)
+        worker._print = _print_nothing
+        worker.models, worker.raw_preds_, worker.trace_ = [], None, None
+        worker._parent_pid = os.getpid()
+
+        # If dask, re-use the dask_ip from the param search
+        client, temp_dr = None, None
+        if self.fold_backend == 'dask':
+            client = self._get_dask_client()
+
+        # Otherwise, share one on disk copy of the data w/ each worker
+        elif self.fold_backend != 'threading':
+            temp_dr = get_temp_dr()
+            data = to_shared(data, temp_dr, 'data')
+
+        try:
+            with parallel_backend(self.fold_backend):
+                fold_results =\
+                    Parallel(n_jobs=self.fold_n_jobs)(
+                        delayed(_compute_worker_fold)(
+                            worker, data, train_subjects, test_subjects,
+                            fold_ind)
+                        for fold_ind, (train_subjects, test_subjects)
+                        in enumerate(subject_splits))
+
+        finally:
+            remove_temp_dr(temp_dr)
+
+            if client is not None:
+                client.close()
+
+        for fold_result in fold_results:
+            yield fold_result
+
+    def _get_dask_client(self):
+
+        dask_ip = getattr(getattr(self.model, 'param_search', None),
+                          'dask_ip', None)
+        if dask_ip is None:
+            raise RuntimeError('fold_backend dask requires a Param_Search '
+                               'with dask_ip set!')
+
+        from dask.distributed import Client
+        return Client(dask_ip)
+
     def Test(self, data, train_subjects, test_subjects, fold_ind='test'):
         '''Method to test given input data, training a model on train_subjects
         and testing the model on test_subjects.
@@ -272,74 +485,202 @@ class Evaluator():
                 with open(self.progress_loc, 'w') as f:
                     f.write('test\n')
 
-        # Ensure train and test subjects are just the requested overlap
-        train_subjects = self._get_subjects_overlap(train_subjects)
+        # Materialize the data used as float once
+        data = self._get_eval_data(data)
 
-        # Remove any train subjects with NaN targets
-        train_targets = data.loc[train_subjects, self.ps.target]
-        if pd.isna(train_targets).any():
-            valid = train_targets[~pd.isna(train_targets)].index
-            train_subjects = self._get_subjects_overlap(valid)
-
-        # For test subjects set to overlap
-        all_test_subjects = self._get_subjects_overlap(test_subjects)
-
-        # Get another version of the test_subjects w/o NaN
-        test_targets = data.loc[all_test_subjects, self.ps.target]
-        if pd.isna(test_targets).any():
-            valid = test_targets[~pd.isna(test_targets)].index
-            test_subjects = self._get_subjects_overlap(valid)
-        else:
-            test_subjects = all_test_subjects
+        # Share subject independent loaders between train and test
+        self._loader_memo_key = uuid4().hex
 
-        # Ensure data being used is just the selected col / feats
-        data = data[self.all_keys]
+        try:
+            fold_result = self._compute_fold(data, train_subjects,
+                                             test_subjects, fold_ind)
+        finally:
+            clear_loader_memo()
 
-        # Init raw_preds_df
+        # Init raw preds buffer + trace
         if fold_ind == 'test':
+            self._init_trace()
 
             # For raw preds df, keep NaNs, so use all_test_subjects
+            all_test_subjects = fold_result['all_test_subjects']
             if self.compute_train_score:
-                self._init_raw_preds_df(np.concatenate([train_subjects,
-                                                        all_test_subjects]))
+                self._init_raw_preds(
+                    np.concatenate([fold_result['train_subjects'],
+                                    all_test_subjects]))
             else:
-                self._init_raw_preds_df(all_test_subjects)
+                self._init_raw_preds(all_test_subjects)
 
-        # Assume the train_subjects here are final
-        train_data = data.loc[train_subjects]
+        train_scores, scores = self._record_fold(data, fold_result, fold_ind)
 
-        self._print('Train shape:', train_data.shape, level='size')
-        self._print('Val/Test shape:', data.loc[test_subjects].shape,
-                    level='size')
-        if len(test_subjects) != len(all_test_subjects):
-            self._print('Making predictions for additional target NaN '
-                        'subjects:',
-                        len(all_test_subjects) - len(test_subjects),
-                        level='size')
+        # Return differently based on if test
+        if fold_ind == 'test':
+            results = self._get_results()
+            return (train_scores, scores, results)
+
+        return train_scores, scores
+
+    def _get_rows(self, data, subjects):
+        '''Get the positional rows of the passed subjects within data,
+        in sorted subject order, and only those in
+        self.ps._final_subjects.'''
+
+        rows = data.index.get_indexer(pd.unique(np.asarray(subjects)))
+        rows = rows[rows != -1]
+
+        if self._final_mask is not None:
+            rows = rows[self._final_mask[rows]]
+
+        return rows[np.argsort(self._subject_ranks[rows], kind='stable')]
+
+    def _get_target_cols(self, data):
+
+        return data.columns.get_indexer(conv_to_list(self.ps.target))
+
+    def _get_X_y_rows(self, data, rows):
+        '''Get X and y as numpy arrays for just the passed rows, by
+        indexing the underlying values directly.'''
+
+        values = data.to_numpy()
+
+        target_cols = self._get_target_cols(data)
+        feat_cols = np.setdiff1d(np.arange(data.shape[1]), target_cols)
+
+        X = values[np.ix_(rows, feat_cols)]
+        y = values[np.ix_(rows, target_cols)]
+
+        if not isinstance(self.ps.target, list):
+            y = y[:, 0]
+
+        return X, y
+
+    def _get_fold_rows(self, data, train_subjects, test_subjects):
+
+        # Targets as array, to check for NaN by row
+        target = data.to_numpy()[:, self._get_target_cols(data)]
+
+        # Remove any train subjects with NaN targets
+        train_rows = self._get_rows(data, train_subjects)
+        train_rows = train_rows[~np.isnan(target[train_rows]).any(axis=1)]
+
+        # Get another version of the test rows w/o NaN
+        all_test_rows = self._get_rows(data, test_subjects)
+        test_rows =\
+            all_test_rows[~np.isnan(target[all_test_rows]).any(axis=1)]
+
+        return train_rows, test_rows, all_test_rows
+
+    def _compute_fold(self, data, train_subjects, test_subjects, fold_ind):
+        '''Train the model for a single fold, then compute the scores, raw
+        predictions and feature importances. Nothing is recorded here,
+        so that folds can be computed in parallel, and then recorded
+        in order with self._record_fold.'''
+
+        start_time = time.time()
+
+        # If tracing, record each step in this fold, also in workers
+        with fold_trace(bool(self.trace), fold_ind) as trace:
+            fold_result = self._compute_fold_steps(
+                data, train_subjects, test_subjects, fold_ind)
+
+        fold_result['trace'] = [] if trace is None else trace.events
+        fold_result['time'] = time.time() - start_time
+        return fold_result
+
+    def _compute_fold_steps(self, data, train_subjects, test_subjects,
+                            fold_ind):
+
+        # If passed as shared, load as memory mapped
+        data = from_shared(data)
+
+        # Activate the subject independent loader memo, also in workers
+        set_loader_memo(self._loader_memo_key)
+
+        # Ensure data being used is just the selected col / feats
+        if list(data.columns) != list(self.all_keys):
+            data = data[self.all_keys]
+
+        # Get the positional rows of the subjects in this fold
+        train_rows, test_rows, all_test_rows =\
+            self._get_fold_rows(data, train_subjects, test_subjects)
+        train_subjects = data.index[train_rows]
 
         # Train the model(s)
-        self._train_model(train_data)
+        X_train, y_train = self._get_X_y_rows(data, train_rows)
+        with trace_step('Evaluator.train_model', shape=[len(train_rows)]):
+            self._train_model(X_train, y_train, train_subjects)
+
+        fold_result = {'model': self.model_,
+                       'train_subjects': np.asarray(train_subjects),
+                       'test_subjects': np.asarray(data.index[test_rows]),
+                       'all_test_subjects':
+                       np.asarray(data.index[all_test_rows])}
 
         # Proc the different feat importances,
         # Pass only test subjects w/o missing targets here
-        self._proc_feat_importance(train_data, data.loc[test_subjects],
-                                   fold_ind)
+        fold_result['fis'] = []
+        if len(self.feat_importances) > 0:
+            with trace_step('Evaluator.feat_importances'):
+                fold_result['fis'] =\
+                    self._compute_feat_importances(data.iloc[train_rows],
+                                                   data.iloc[test_rows],
+                                                   fold_ind)
 
         # Get the scores
         if self.compute_train_score:
-            train_scores = self._get_scores(train_data, 'train_', fold_ind)
-        else:
-            train_scores = 0
+            with trace_step('Evaluator.train_scores',
+                            shape=[len(train_rows)]):
+                fold_result['train_'] =\
+                    self._compute_scores(X_train, y_train, train_subjects)
 
-        # Pass test_data w/ Nans to get_scores, in order to
+        # Pass test data w/ Nans to get_scores, in order to
         # still record predictions for targets w/ a missing
         # ground truth.
-        scores = self._get_scores(data.loc[all_test_subjects], '', fold_ind)
+        X_test, y_test = self._get_X_y_rows(data, all_test_rows)
+        with trace_step('Evaluator.scores', shape=[len(all_test_rows)]):
+            fold_result[''] =\
+                self._compute_scores(X_test, y_test,
+                                     fold_result['all_test_subjects'])
 
-        # Return differently based on if test
-        if fold_ind == 'test':
-            results = self._get_results()
-            return (train_scores, scores, results)
+        return fold_result
+
+    def _record_fold(self, data, fold_result, fold_ind):
+        '''Record the results from self._compute_fold, where
+        the results must be recorded in fold order.'''
+
+        self._print('Train shape:',
+                    (len(fold_result['train_subjects']), len(self.all_keys)),
+                    level='size')
+        self._print('Val/Test shape:',
+                    (len(fold_result['test_subjects']), len(self.all_keys)),
+                    level='size')
+
+        n_nan_targets = len(fold_result['all_test_subjects']) -\
+            len(fold_result['test_subjects'])
+        if n_nan_targets != 0:
+            self._print('Making predictions for additional target NaN '
+                        'subjects:', n_nan_targets, level='size')
+
+        if fold_ind != 'test':
+            self.n_test_per_fold.append(len(fold_result['test_subjects']))
+
+        # Set the fitted model
+        self._record_model(fold_result['model'])
+
+        # Add this fold's steps to the trace
+        if self.trace_ is not None:
+            self.trace_.extend(fold_result['trace'])
+
+        # Record the feat importances
+        self._record_feat_importances(data, fold_result['fis'], fold_ind)
+
+        # Record the scores + raw preds
+        if self.compute_train_score:
+            train_scores =\
+                self._record_scores(fold_result['train_'], 'train_', fold_ind)
+        else:
+            train_scores = 0
+
+        scores = self._record_scores(fold_result[''], '', fold_ind)
 
         return train_scores, scores
 
@@ -374,61 +715,57 @@ class Evaluator():
         except AttributeError:
             pass
 
-    def _proc_feat_importance(self, train_data, test_data, fold_ind):
+    def _get_split_data(self, split, train_data, test_data):
+
+        if split == 'test':
+            return test_data
+        elif split == 'train':
+            return train_data
+        elif split == 'all':
+            return pd.concat([train_data, test_data])
+
+        # Error if here
+        return None
+
+    def _compute_feat_importances(self, train_data, test_data, fold_ind):
+        '''Compute, but do not record, each of the feature importances,
+        along with any data needed to init the feat importance.'''
 
         # Ensure model flags are set / there are feat importances to proc
         if len(self.feat_importances) > 0:
             self._set_model_flags()
         else:
-            return
+            return []
 
-        # Process each feat importance
+        # Get base fitted model
+        base_model = self._get_base_fitted_model()
+
+        fold_fis = []
         for feat_imp in self.feat_importances:
 
             split = feat_imp.split
+            fold_fi = {}
 
             # Init global feature df
             if fold_ind == 0 or fold_ind == 'test':
-
-                X, y = self._proc_X_test(train_data, fs=False)
-                feat_imp.init_global(X, y)
+                fold_fi['global'] = self._proc_X_test(train_data, fs=False)
 
             # Local init - Test
             if fold_ind == 'test':
 
-                if split == 'test':
-                    X, y = self._proc_X_test(test_data, fs=False)
-
-                elif split == 'train':
-                    X, y = self._proc_X_test(train_data, fs=False)
-
-                elif split == 'all':
-                    X, y =\
-                        self._proc_X_test(pd.concat([train_data, test_data]),
-                                          fs=False)
-
-                # Error if here
+                split_data = self._get_split_data(split, train_data,
+                                                  test_data)
+                if split_data is None:
+                    fold_fi['local'] = None, None
                 else:
-                    X, y = None, None
-
-                feat_imp.init_local(X, y, test=True, n_splits=None)
+                    fold_fi['local'] = self._proc_X_test(split_data,
+                                                         fs=False)
 
             # Local init - Evaluate
             elif fold_ind % self.n_splits_ == 0:
-
-                X, y = self._proc_X_test(pd.concat([train_data, test_data]),
-                                         fs=False)
-                feat_imp.init_local(X, y, n_splits=self.n_splits_)
-
-            # Error if reaches here
-            else:
-                X, y = None, None
-
-            self._print('Calculate', feat_imp.name, 'feat importances',
-                        level='name')
-
-            # Get base fitted model
-            base_model = self._get_base_fitted_model()
+                fold_fi['local'] =\
+                    self._proc_X_test(pd.concat([train_data, test_data]),
+                                      fs=False)
 
             # Optionally proc train, though train is always train
             if feat_imp.get_data_needed_flags(self.flags):
@@ -436,31 +773,64 @@ class Evaluator():
             else:
                 X_train = None
 
-            # Test depends on scope
-            if split == 'test':
-                test = test_data
-            elif split == 'train':
-                test = train_data
-            elif split == 'all':
-                test = pd.concat([train_data, test_data])
+            # Test depends on scope, always proc test.
+            X_test, y_test =\
+                self._proc_X_test(self._get_split_data(split, train_data,
+                                                       test_data))
+
+            # Compute the feature importance, provide all needed
+            fold_fi['X_test'] = X_test
+            fold_fi['fis'] =\
+                feat_imp.compute_importances(
+                    base_model, X_test, y_test=y_test,
+                    X_train=X_train, random_state=self.ps.random_state)
+
+            fold_fis.append(fold_fi)
+
+        return fold_fis
+
+    def _record_feat_importances(self, data, fold_fis, fold_ind):
 
-            # Always proc test.
-            X_test, y_test = self._proc_X_test(test)
+        if len(self.feat_importances) > 0:
+            self._set_model_flags()
+        else:
+            return
+
+        # Grab the names of all input features
+        feat_names = list(data[self.all_keys])
+        feat_names.remove(self.ps.target)
+
+        # Process each feat importance
+        for feat_imp, fold_fi in zip(self.feat_importances, fold_fis):
+
+            # Make sure flags are set / checked
+            feat_imp.get_data_needed_flags(self.flags)
+
+            # Init global feature df
+            if 'global' in fold_fi:
+                feat_imp.init_global(*fold_fi['global'])
+
+            # Local init - Test
+            if fold_ind == 'test':
+                X, y = fold_fi['local']
+                feat_imp.init_local(X, y, test=True, n_splits=None)
+
+            # Local init - Evaluate
+            elif 'local' in fold_fi:
+                X, y = fold_fi['local']
+                feat_imp.init_local(X, y, n_splits=self.n_splits_)
+
+            self._print('Calculate', feat_imp.name, 'feat importances',
+                        level='name')
 
             try:
                 fold = fold_ind % self.n_splits_
             except TypeError:
                 fold = 'test'
 
-            # Process the feature importance, provide all needed
-            fis =\
-                feat_imp.proc_importances(base_model, X_test, y_test=y_test,
-                                          X_train=X_train, fold=fold,
-                                          random_state=self.ps.random_state)
-
-            # Grab the names of all input features
-            feat_names = list(train_data)
-            feat_names.remove(self.ps.target)
+            # Add the computed feature importance
+            fis = fold_fi['fis']
+            feat_imp.add_importances(fold_fi['X_test'], fis, fold)
 
             # Inverse transform FIs back to original feat_space is requested
             self._inverse_transform_FIs(feat_imp, fis, feat_names)
@@ -527,20 +897,26 @@ class Evaluator():
             y = data[self.ps.target]
 
         if not X_as_df:
-            X = np.array(X).astype(float)
+            X = np.asarray(X, dtype=float)
 
-        y = np.array(y).astype(float)
+        y = np.asarray(y, dtype=float)
 
         return X, y
 
-    def _train_model(self, train_data):
+    def _train_model(self, X, y, train_data_index):
         '''Helper method to train a models given
         a str indicator and training data.
 
         Parameters
         ----------
-        train_data : pandas DataFrame
-            BPt formatted, training data.
+        X : numpy array
+            The training data.
+
+        y : numpy array
+            The training target.
+
+        train_data_index : pandas Index
+            The subjects of each row in X.
 
         Returns
         ----------
@@ -548,12 +924,15 @@ class Evaluator():
             The trained model.
         '''
 
-        # Data, score split
-        X, y = self._get_X_y(train_data)
-
         # Fit the model
         self.model_ = clone(self.model)
-        self.model_.fit(X, y, train_data_index=train_data.index)
+        self.model_.fit(X, y, train_data_index=train_data_index)
+
+        return self.model_
+
+    def _record_model(self, model):
+
+        self.model_ = model
 
         # If return models, save model
         if self.return_models:
@@ -624,37 +1003,29 @@ class Evaluator():
 
         return params, to_show
 
-    def _get_scores(self, test_data, eval_type, fold_ind):
+    def _compute_scores(self, X_test, y_test, subjects):
         '''Helper method to get the scores of
         the trained model saved in the class on input test data.
-        For all metrics/scorers.
+        For all metrics/scorers, along with the raw predictions.
 
         Parameters
         ----------
-        test_data : pandas DataFrame
-            BPt formatted test data.
+        X_test : numpy array
+            The test data.
 
-        eval_type : {'train_', ''}
+        y_test : numpy array
+            The test target.
 
-        fold_ind : int or 'test'
+        subjects : pandas Index
+            The subjects of each row in X_test.
 
         Returns
         ----------
-        float
-            The score of the trained model on the given test data.
+        dict
+            With the scores of the trained model on the given test data,
+            along with the info needed to record raw predictions.
         '''
 
-        # Data, score split
-        X_test, y_test = self._get_X_y(test_data)
-
-        # For book-keeping set num y classes
-        self._set_classes(y_test)
-
-        # Add raw preds to raw_preds_df
-        self._add_raw_preds(X_test, y_test,
-                            test_data.index, eval_type,
-                            fold_ind)
-
         # Only compute scores on Non-Nan y
         non_nan_mask = ~np.isnan(y_test)
 
@@ -664,19 +1035,52 @@ class Evaluator():
                          y_test[non_nan_mask])
                   for scorer in self.scorers]
 
-        return np.array(scores)
+        return {'scores': np.array(scores),
+                'classes': self._get_classes(y_test),
+                'subjects': subjects,
+                'y': y_test,
+                'preds': self._get_raw_preds(X_test)}
+
+    def _record_scores(self, score_result, eval_type, fold_ind):
 
-    def _set_classes(self, y_test):
+        # For book-keeping set num y classes
+        self.classes = score_result['classes']
+
+        # Add raw preds to the raw preds buffer
+        self._add_raw_preds(score_result['preds'], score_result['y'],
+                            score_result['subjects'], eval_type,
+                            fold_ind)
+
+        return score_result['scores']
+
+    def _get_classes(self, y_test):
 
         # Get non-nan classes
-        self.classes = np.unique(y_test[~np.isnan(y_test)])
+        classes = np.unique(y_test[~np.isnan(y_test)])
 
         # Catch case where there is only one class present in y_test
         # Assume in this case that it should be binary, 0 and 1
-        if len(self.classes) == 1:
-            self.classes = np.array([0, 1])
+        if len(classes) == 1:
+            classes = np.array([0, 1])
 
-    def _add_raw_preds(self, X_test, y_test, subjects, eval_type, fold_ind):
+        return classes
+
+    def _get_raw_preds(self, X_test):
+
+        # If return_raw_preds set to false, skip
+        if not self.return_raw_preds:
+            return None
+
+        try:
+            raw_prob_preds = self.model_.predict_proba(X_test)
+        except AttributeError:
+            raw_prob_preds = None
+
+        raw_preds = self.model_.predict(X_test)
+
+        return raw_prob_preds, raw_preds
+
+    def _add_raw_preds(self, preds, y_test, subjects, eval_type, fold_ind):
 
         # If return_raw_preds set to false, skip
         if not self.return_raw_preds:
@@ -689,64 +1093,66 @@ class Evaluator():
             fold = str((fold_ind % self.n_splits_) + 1)
             repeat = str((fold_ind // self.n_splits_) + 1)
 
-        try:
-            raw_prob_preds = self.model_.predict_proba(X_test)
+        raw_prob_preds, raw_preds = preds
+
+        # Get subjects positions once
+        raw = self.raw_preds_
+        inds = raw.get_positions(subjects)
+
+        if raw_prob_preds is not None:
             pred_col = eval_type + repeat + '_prob'
 
             if len(np.shape(raw_prob_preds)) == 3:
 
                 for i in range(len(raw_prob_preds)):
                     p_col = pred_col + '_class_' + str(self.classes[i])
-                    class_preds = [val[1] for val in raw_prob_preds[i]]
-                    self.raw_preds_df.loc[subjects, p_col] = class_preds
+                    raw.set(inds, p_col, np.asarray(raw_prob_preds[i])[:, 1])
 
             elif len(np.shape(raw_prob_preds)) == 2:
 
                 for i in range(np.shape(raw_prob_preds)[1]):
                     p_col = pred_col + '_class_' + str(self.classes[i])
-                    class_preds = raw_prob_preds[:, i]
-                    self.raw_preds_df.loc[subjects, p_col] = class_preds
+                    raw.set(inds, p_col, raw_prob_preds[:, i])
 
             else:
-                self.raw_preds_df.loc[subjects, pred_col] = raw_prob_preds
+                raw.set(inds, pred_col, raw_prob_preds)
 
-        except AttributeError:
-            pass
-
-        raw_preds = self.model_.predict(X_test)
         pred_col = eval_type + repeat
 
         if len(np.shape(raw_preds)) == 2:
             for i in range(np.shape(raw_preds)[1]):
                 p_col = pred_col + '_class_' + str(self.classes[i])
-                class_preds = raw_preds[:, i]
-                self.raw_preds_df.loc[subjects, p_col] = class_preds
+                raw.set(inds, p_col, raw_preds[:, i])
 
         else:
-            self.raw_preds_df.loc[subjects, pred_col] = raw_preds
+            raw.set(inds, pred_col, raw_preds)
 
-        self.raw_preds_df.loc[subjects, pred_col + '_fold'] = fold
+        raw.set(inds, pred_col + '_fold', fold, dtype=object)
 
         # Make copy of true values
         if len(np.shape(y_test)) > 1:
             for i in range(len(self.ps.target)):
-                self.raw_preds_df.loc[subjects, self.ps.target[i]] =\
-                    y_test[:, i]
+                raw.set(inds, self.ps.target[i], y_test[:, i])
 
         elif isinstance(self.ps.target, list):
             t_base_key = '_'.join(self.ps.target[0].split('_')[:-1])
-            self.raw_preds_df.loc[subjects, 'multiclass_' + t_base_key] =\
-                y_test
+            raw.set(inds, 'multiclass_' + t_base_key, y_test)
 
         else:
-            self.raw_preds_df.loc[subjects, self.ps.target] = y_test
+            raw.set(inds, self.ps.target, y_test)
+
+    def _init_trace(self):
+
+        self.trace_ = None
+        if self.trace:
+            self.trace_ = Trace()
 
-    def _init_raw_preds_df(self, subjects):
+    def _init_raw_preds(self, subjects):
 
         if self.return_raw_preds:
-            self.raw_preds_df = pd.DataFrame(index=subjects)
+            self.raw_preds_ = Raw_Preds(subjects)
         else:
-            self.raw_preds_df = None
+            self.raw_preds_ = None
 
     def _proc_X_test(self, test_data, fs=True):
 
@@ -1,11 +1,67 @@
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
+from joblib import Parallel, delayed, hash as joblib_hash
 
 from .Perm_Feat_Importance import Perm_Feat_Importance
 from sklearn.inspection import permutation_importance
 from ..helpers.ML_Helpers import get_obj_and_params
 
 
+# Kmeans summaries of the shap background data, by data and k,
+# such that they are re-used when the training set is unchanged
+_SHAP_BACKGROUNDS = OrderedDict()
+_MAX_SHAP_BACKGROUNDS = 8
+
+
+def get_shap_background(X_train, nkmean):
+
+    import shap
+
+    key = joblib_hash((X_train, nkmean))
+    if key in _SHAP_BACKGROUNDS:
+        _SHAP_BACKGROUNDS.move_to_end(key)
+        return _SHAP_BACKGROUNDS[key]
+
+    X_train_summary = shap.kmeans(X_train, nkmean)
+
+    _SHAP_BACKGROUNDS[key] = X_train_summary
+    while len(_SHAP_BACKGROUNDS) > _MAX_SHAP_BACKGROUNDS:
+        _SHAP_BACKGROUNDS.popitem(last=False)
+
+    return X_train_summary
+
+
+def get_shap_values(explainer, X, **kwargs):
+    return explainer.shap_values(X, **kwargs)
+
+
+def stack_shap_values(chunk_vals):
+    '''Stack shap values computed on chunks of subjects, where the
+    values for each chunk may be a list, one per class.'''
+
+    if isinstance(chunk_vals[0], list):
+        return [np.concatenate([vals[j] for vals in chunk_vals])
+                for j in range(len(chunk_vals[0]))]
+
+    return np.concatenate(chunk_vals)
+
+
+def expand_shap_values(shap_values, sample, n_subjects):
+    '''Expand shap values computed on just a sample of subjects
+    to all subjects, with NaN for those not in the sample.'''
+
+    if isinstance(shap_values, list):
+        return [expand_shap_values(vals, sample, n_subjects)
+                for vals in shap_values]
+
+    shap_values = np.asarray(shap_values)
+    full = np.full((n_subjects,) + shap_values.shape[1:], np.nan)
+    full[sample] = shap_values
+
+    return full
+
+
 class Feat_Importances():
 
     def __init__(self, importance_info, params, n_jobs, scorer):
@@ -17,6 +73,7 @@ class Feat_Importances():
         # Unpack params
         self.shap_params = params.shap_params
         self.n_perm = params.n_perm
+        self.perm_groups = getattr(params, 'perm_groups', None)
 
         self.inverse_global = params.inverse_global
         self.inverse_local = params.inverse_local
@@ -162,23 +219,23 @@ class Feat_Importances():
             # Reset to None once added
             self.local_df = None
 
-    def proc_importances(self, base_model, X_test, y_test=None,
-                         X_train=None, fold=0, random_state=None):
-        '''X_test should be a df, and X_train either None or as np array.'''
+    def compute_importances(self, base_model, X_test, y_test=None,
+                            X_train=None, random_state=None):
+        '''X_test should be a df, and X_train either None or as np array.
+        Returns the computed global and local feature importances, without
+        adding them to this object, see add_importances.'''
 
         if not self.valid:
             return None, None
 
         if self.name == 'base':
             feat_imps = self.get_base_feat_importances(base_model)
-            self.add_to_global(list(X_test), feat_imps)
             return feat_imps, None
 
         elif self.name == 'perm':
             feat_imps = self.get_perm_feat_importances(base_model,
-                                                       np.array(X_test),
-                                                       y_test)
-            self.add_to_global(list(X_test), feat_imps)
+                                                       X_test, y_test,
+                                                       random_state)
             return feat_imps, None
 
         elif self.name == 'sklearn perm':
@@ -186,31 +243,53 @@ class Feat_Importances():
                                                         np.array(X_test),
                                                         y_test,
                                                         random_state)
-            self.add_to_global(list(X_test), feat_imps)
             return feat_imps, None
 
         elif self.name == 'shap':
             shap_vals = self.get_shap_feature_importance(base_model, X_test,
-                                                         X_train)
+                                                         X_train,
+                                                         random_state)
             global_shap_vals = self.global_from_local(shap_vals)
+            return global_shap_vals, shap_vals
 
-            # Add to local
-            self.add_to_local(X_test, shap_vals, fold)
+    def add_importances(self, X_test, fis, fold=0):
+        '''Add global and local feature importances, as returned by
+        compute_importances, to the global and local dfs.'''
 
-            # Add to global
-            self.add_to_global(list(X_test), global_shap_vals)
-            return global_shap_vals, shap_vals
+        if not self.valid:
+            return
+
+        global_fis, local_fis = fis
+
+        # Add to local
+        if local_fis is not None:
+            self.add_to_local(X_test, local_fis, fold)
+
+        # Add to global
+        self.add_to_global(list(X_test), global_fis)
+
+    def proc_importances(self, base_model, X_test, y_test=None,
+                         X_train=None, fold=0, random_state=None):
+        '''X_test should be a df, and X_train either None or as np array.'''
+
+        fis = self.compute_importances(base_model, X_test, y_test=y_test,
+                                       X_train=X_train,
+                                       random_state=random_state)
+        self.add_importances(X_test, fis, fold)
+
+        return fis
 
     def global_from_local(self, vals):
         return self.col_abs_mean(vals)
 
     def col_abs_mean(self, vals):
 
+        # Nan-mean, as only a sample of subjects may have been explained
         if self.shap_params.avg_abs:
-            col_means = np.mean(np.abs(vals), axis=0)
+            col_means = np.nanmean(np.abs(vals), axis=0)
 
         else:
-            col_means = np.mean(vals, axis=0)
+            col_means = np.nanmean(vals, axis=0)
 
         return col_means
 
@@ -223,13 +302,28 @@ class Feat_Importances():
 
         return feat_imps
 
+    def get_perm_groups(self, feat_names):
+        '''Get perm_groups, from feature names, as indices, skipping
+        any features not present.'''
+
+        if self.perm_groups is None:
+            return None
+
+        feat_inds = {name: i for i, name in enumerate(feat_names)}
+        return [[feat_inds[name] for name in group if name in feat_inds]
+                for group in self.perm_groups]
+
     def get_perm_feat_importances(self, base_model, X_test,
-                                  y_test):
+                                  y_test, random_state=None):
+
+        perm_import =\
+            Perm_Feat_Importance(n_perm=self.n_perm,
+                                 n_jobs=self.n_jobs,
+                                 groups=self.get_perm_groups(list(X_test)),
+                                 random_state=random_state)
 
-        perm_import = Perm_Feat_Importance(n_perm=self.n_perm,
-                                           n_jobs=self.n_jobs)
         feat_imps = perm_import.compute(base_model, self.scorer,
-                                        X_test, y_test)
+                                        np.array(X_test), y_test)
         return feat_imps
 
     def get_perm_feat_importances2(self, base_model, X_test, y_test,
@@ -242,13 +336,48 @@ class Feat_Importances():
                                          random_state=random_state)
         return results.importances_mean
 
-    def get_shap_feature_importance(self, base_model, X_test, X_train):
+    def get_shap_sample(self, n_subjects, random_state):
+        '''If a subject budget is set, and less than the number
+        of subjects, get the sorted indices of a random sample.'''
+
+        max_subjects = getattr(self.shap_params, 'max_subjects', None)
+        if max_subjects is None or max_subjects >= n_subjects:
+            return None
+
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+
+        return np.sort(random_state.choice(n_subjects, max_subjects,
+                                           replace=False))
+
+    def get_shap_values(self, explainer, X_test, **kwargs):
+        '''Compute shap values for chunks of subjects in parallel.'''
+
+        n_jobs = min(self.n_jobs, len(X_test))
+        if n_jobs <= 1:
+            return explainer.shap_values(X_test, **kwargs)
+
+        chunks = np.array_split(np.arange(len(X_test)), n_jobs)
+        chunk_vals =\
+            Parallel(n_jobs=n_jobs)(delayed(get_shap_values)(
+                explainer, X_test[chunk], **kwargs) for chunk in chunks)
+
+        return stack_shap_values(chunk_vals)
+
+    def get_shap_feature_importance(self, base_model, X_test, X_train,
+                                    random_state=None):
 
         try:
             import shap
         except ImportError:
             raise ImportError('You must have shap installed to use shap')
 
+        # If set, explain just a sample of subjects
+        n_subjects = len(X_test)
+        sample = self.get_shap_sample(n_subjects, random_state)
+        if sample is not None:
+            X_test = X_test.iloc[sample]
+
         if self.flags['tree'] or self.flags['linear']:
 
             if self.flags['linear']:
@@ -273,8 +402,8 @@ class Feat_Importances():
 
                 ttl = self.shap_params.tree_tree_limit
                 shap_values =\
-                    explainer.shap_values(X_test,
-                                          tree_limit=ttl)
+                    self.get_shap_values(explainer, np.array(X_test),
+                                         tree_limit=ttl)
 
         # Kernel
         else:
@@ -282,7 +411,7 @@ class Feat_Importances():
             nkmean = self.shap_params.kernel_nkmean
 
             if nkmean is not None:
-                X_train_summary = shap.kmeans(X_train, nkmean)
+                X_train_summary = get_shap_background(X_train, nkmean)
             else:
                 X_train_summary = X_train
 
@@ -294,9 +423,12 @@ class Feat_Importances():
             kns = self.shap_params.kernel_nsamples
 
             shap_values =\
-                explainer.shap_values(np.array(X_test),
-                                      l1_reg=klr,
-                                      n_samples=kns)
+                self.get_shap_values(explainer, np.array(X_test),
+                                     l1_reg=klr,
+                                     n_samples=kns)
+
+        if sample is not None:
+            shap_values = expand_shap_values(shap_values, sample, n_subjects)
 
         return self.proc_shap_vals(shap_values)
 
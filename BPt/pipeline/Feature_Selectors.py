@@ -14,6 +14,7 @@ import nevergrad as ng
 from sklearn.base import BaseEstimator, clone
 from sklearn.feature_selection._base import SelectorMixin
 from ..helpers.ML_Helpers import proc_mapping, update_mapping
+from .Trace import traced
 
 
 class FeatureSelectorWrapper(SelectorMixin, BaseEstimator):
@@ -37,6 +38,7 @@ class FeatureSelectorWrapper(SelectorMixin, BaseEstimator):
 
         return
 
+    @traced
     def fit(self, X, y=None, mapping=None, **fit_params):
 
         # Clone base object
@@ -120,6 +122,7 @@ class FeatureSelectorWrapper(SelectorMixin, BaseEstimator):
 
         return self
 
+    @traced
     def transform(self, X):
 
         # Transform just wrapper inds
@@ -2,33 +2,128 @@ from ..helpers.ML_Helpers import (get_obj_and_params, update_mapping,
                                   proc_mapping, get_reverse_mapping)
 import numpy as np
 from .Transformers import Transformer_Wrapper
+from .Trace import traced
 from ..extensions.Loaders import Identity, SurfLabels
-from joblib import Parallel, delayed
+from ..helpers.Loader_Cache import Loader_Cache, get_loader_key
+from ..helpers.Data_File import prefetch_load
+from joblib import Parallel, delayed, effective_n_jobs
 import warnings
-from sklearn.utils.validation import check_memory
+import tempfile
+import os
 from sklearn.base import clone
 
 
-def load_and_trans(transformer, load_func, loc):
-    '''This function is designed to be able to be wrapped in a cache
-    check_memory.'''
+# Stores the outputs of subject independent loaders by subject,
+# such that they are only computed once within a call to Evaluate / Test.
+_LOADER_MEMO = {'key': None, 'outputs': {}, 'size': 0}
 
-    data = load_func(loc)
-    trans_data = np.squeeze(transformer.fit_transform(data))
-    return trans_data
+# The max total size in gigabytes of the stored outputs, unless
+# the loader sets a lower max_memory
+LOADER_MEMO_MAX_SIZE = 2
 
+# The number of subjects loaded and transformed at once by loaders
+# which support transform_batch, unless max_memory is set
+TRANSFORM_BATCH_SIZE = 50
 
-def get_trans_chunk(transformer, data_files, func):
+
+def set_loader_memo(key):
+    '''Activate the subject independent loader memo for the passed key,
+    e.g., a single call to Evaluate. If the key differs from the
+    current key, any previously stored outputs are cleared.'''
+
+    if _LOADER_MEMO['key'] != key:
+        _LOADER_MEMO['key'] = key
+        _LOADER_MEMO['outputs'] = {}
+        _LOADER_MEMO['size'] = 0
+
+
+def clear_loader_memo():
+    '''De-activate the subject independent loader memo.'''
+
+    _LOADER_MEMO['key'] = None
+    _LOADER_MEMO['outputs'] = {}
+    _LOADER_MEMO['size'] = 0
+
+
+def is_subject_independent(transformer):
+    '''Check if a loader, or if a pipeline of loaders all steps, declare
+    that their output for a subject depends only on that subject's data.'''
+
+    if hasattr(transformer, 'steps'):
+        return all(is_subject_independent(step[1])
+                   for step in transformer.steps)
+
+    return getattr(transformer, 'subject_independent', False)
+
+
+def trans(transformer, data):
+    '''Transform a single loaded file with a clone of the loader.'''
+
+    return np.squeeze(clone(transformer).fit_transform(data))
+
+
+def batch_trans(transformer, datas):
+    '''Transform a batch of loaded files, where all files with the
+    same shape are transformed at once with transform_batch.'''
+
+    trans_datas = [None for _ in range(len(datas))]
+    for shape in set([np.shape(data) for data in datas]):
+        inds = [i for i in range(len(datas)) if np.shape(datas[i]) == shape]
+        batch = np.stack([datas[i] for i in inds])
+
+        # Fit on just the first, then transform all
+        batch_transformer = clone(transformer).fit(batch[0])
+        batch_trans = batch_transformer.transform_batch(batch)
+
+        for i, trans_data in zip(inds, batch_trans):
+            trans_datas[i] = np.squeeze(trans_data)
+
+    return trans_datas
+
+
+def get_trans_chunk(transformer, data_files, cache=None,
+                    batch_size=TRANSFORM_BATCH_SIZE,
+                    prefetch=0, prefetch_n_jobs=1):
     '''This function is designed to be used for multi-processing'''
 
-    X_trans_chunk = []
-    for data_file in data_files:
-        loc = data_file.loc
-        load_func = data_file.load_func
-        trans_data = func(clone(transformer), load_func, loc)
-        X_trans_chunk.append(trans_data)
+    # Check the cache first, if any
+    X_trans_chunk = [None for _ in range(len(data_files))]
+    if cache is not None:
+        for i in range(len(data_files)):
+            X_trans_chunk[i] = cache.get(data_files[i])
+
+    to_compute = [i for i in range(len(data_files))
+                  if X_trans_chunk[i] is None]
+
+    # Load the files to compute, optionally reading ahead
+    loaded = prefetch_load([data_files[i] for i in to_compute],
+                           prefetch=prefetch,
+                           prefetch_n_jobs=prefetch_n_jobs)
+
+    # If the loader supports it, transform batches of subjects at once
+    if hasattr(transformer, 'transform_batch') and\
+       is_subject_independent(transformer):
+
+        for b in range(0, len(to_compute), batch_size):
+            inds = to_compute[b:b+batch_size]
+            datas = [next(loaded) for _ in inds]
 
-    return X_trans_chunk
+            for i, trans_data in zip(inds, batch_trans(transformer, datas)):
+                X_trans_chunk[i] = trans_data
+
+    # Otherwise, one at a time
+    else:
+        for i, data in zip(to_compute, loaded):
+            X_trans_chunk[i] = trans(transformer, data)
+
+    if cache is not None:
+        for i in to_compute:
+            cache.put(data_files[i], X_trans_chunk[i])
+
+    if cache is None:
+        return X_trans_chunk, None
+
+    return X_trans_chunk, cache.get_stats()
 
 
 class Loader_Wrapper(Transformer_Wrapper):
@@ -36,6 +131,8 @@ class Loader_Wrapper(Transformer_Wrapper):
     def __init__(self, wrapper_transformer,
                  wrapper_inds, file_mapping,
                  wrapper_n_jobs=1, cache_loc=None,
+                 cache_max_size=None, max_memory=None,
+                 memmap_dr=None, prefetch=0, prefetch_n_jobs=1,
                  **params):
 
         super().__init__(wrapper_transformer=wrapper_transformer,
@@ -44,17 +141,24 @@ class Loader_Wrapper(Transformer_Wrapper):
 
         self.file_mapping = file_mapping
         self.wrapper_n_jobs = wrapper_n_jobs
+        self.cache_max_size = cache_max_size
+        self.max_memory = max_memory
+        self.memmap_dr = memmap_dr
+        self.prefetch = prefetch
+        self.prefetch_n_jobs = prefetch_n_jobs
 
-    def _fit(self, X, y=None):
+    def _fit(self, X, y=None, fit_data=None):
 
-        fit_fm_key = X[0, self.wrapper_inds_[0]]
-        fit_data = self.file_mapping[int(fit_fm_key)].load()
+        if fit_data is None:
+            fit_fm_key = X[0, self.wrapper_inds_[0]]
+            fit_data = self.file_mapping[int(fit_fm_key)].load()
 
         self.wrapper_transformer_ = clone(self.wrapper_transformer)
         self.wrapper_transformer_.fit(fit_data, y)
 
         return self
 
+    @traced
     def fit_transform(self, X, y=None, mapping=None, **kwargs):
 
         if mapping is None:
@@ -65,10 +169,21 @@ class Loader_Wrapper(Transformer_Wrapper):
 
         # Fit a copy on the first data-point only
         # this is used for say reverse transformations
-        self._fit(X, y)
+        fit_fm_key = X[0, self.wrapper_inds_[0]]
+        fit_data = self.file_mapping[int(fit_fm_key)].load()
+        self._fit(X, y, fit_data=fit_data)
 
-        # Transform X
-        X_trans, self._X_trans_inds = self._get_X_trans(X)
+        # Reset the loader cache hits / misses
+        self.cache_stats_ = {'hits': 0, 'misses': 0}
+
+        # Rest of inds are just shifted over
+        self.rest_inds_ = [i for i in range(X.shape[1])
+                           if i not in self.wrapper_inds_]
+
+        # Transform X, setting the number of subjects per batch
+        X_trans, self._X_trans_inds = self._get_X_trans(X, fit=True,
+                                                        fit_data=fit_data)
+        n_trans = X_trans.shape[1] - len(self.rest_inds_)
 
         # Then create new mapping
         new_mapping = {}
@@ -78,48 +193,89 @@ class Loader_Wrapper(Transformer_Wrapper):
             ind = self.wrapper_inds_[c]
             new_mapping[ind] = self._X_trans_inds[c]
 
-        # Update rest of inds, as just shifted over
-        self.rest_inds_ = [i for i in range(X.shape[1])
-                           if i not in self.wrapper_inds_]
-
+        # Update rest of inds
         for c in range(len(self.rest_inds_)):
             ind = self.rest_inds_[c]
-            new_mapping[ind] = X_trans.shape[1] + c
+            new_mapping[ind] = n_trans + c
 
         self._out_mapping = new_mapping.copy()
 
         # Update mapping
         update_mapping(mapping, new_mapping)
-        return np.hstack([X_trans, X[:, self.rest_inds_]])
+        return X_trans
 
     def get_chunks(self, data_files):
 
-        per_chunk = len(data_files) // self.wrapper_n_jobs
-        chunks = [list(range(i * per_chunk, (i+1) * per_chunk))
-                  for i in range(self.wrapper_n_jobs)]
+        # Never more chunks than files, e.g., if only a few
+        # files left to compute
+        n_chunks = min(effective_n_jobs(self.wrapper_n_jobs),
+                       len(data_files))
 
-        last = chunks[-1][-1]
-        chunks[-1] += list(range(last+1, len(data_files)))
+        chunks = np.array_split(np.arange(len(data_files)), n_chunks)
         return [[data_files[i] for i in c] for c in chunks]
 
     def _get_trans_col(self, fm_keys):
 
+        # If no memo is active, or loader not subject independent
+        if _LOADER_MEMO['key'] is None or\
+           not is_subject_independent(self.wrapper_transformer):
+            return self._load_trans_col(fm_keys)
+
+        # Memo'ed outputs are stored by loader and params
+        outputs = _LOADER_MEMO['outputs'].setdefault(
+            get_loader_key(self.wrapper_transformer), {})
+
+        # Only compute the subjects not already computed
+        to_compute = list(set([int(fm_key) for fm_key in fm_keys
+                               if int(fm_key) not in outputs]))
+
+        computed = {}
+        if len(to_compute) > 0:
+            X_trans_cols = self._load_trans_col(to_compute)
+            computed = dict(zip(to_compute, X_trans_cols))
+
+        # Store the computed outputs, until the memo is full
+        max_size = LOADER_MEMO_MAX_SIZE
+        if self.max_memory is not None:
+            max_size = min(max_size, self.max_memory)
+
+        for fm_key, trans_data in computed.items():
+            size = np.asarray(trans_data).nbytes
+            if _LOADER_MEMO['size'] + size > max_size * (1024 ** 3):
+                break
+
+            outputs[fm_key] = trans_data
+            _LOADER_MEMO['size'] += size
+
+        return [outputs[int(fm_key)] if int(fm_key) in outputs
+                else computed[int(fm_key)] for fm_key in fm_keys]
+
+    def _load_trans_col(self, fm_keys):
+
         # Grab the right data files from the file mapping (casting to int!)
         data_files = [self.file_mapping[int(fm_key)] for fm_key in fm_keys]
 
         # Clone the base loader transformer
         cloned_transformer = clone(self.wrapper_transformer)
 
-        # If a caching location is passed, create new load_cand_trans_c func
+        # If a caching location is passed, use the loader cache
+        cache = None
         if self.cache_loc is not None:
-            memory = check_memory(self.cache_loc)
-            load_and_trans_c = memory.cache(load_and_trans)
-        else:
-            load_and_trans_c = load_and_trans
+            cache = Loader_Cache(self.cache_loc, cloned_transformer,
+                                 max_size=self.cache_max_size)
 
-        if self.wrapper_n_jobs == 1:
-            X_trans_cols = get_trans_chunk(cloned_transformer,
-                                           data_files, load_and_trans_c)
+        # If max_memory is set, transform as many subjects
+        # at once as fit within max_memory
+        batch_size = TRANSFORM_BATCH_SIZE
+        if self.max_memory is not None:
+            batch_size = getattr(self, 'batch_size_', 1)
+
+        if self.wrapper_n_jobs == 1 or len(data_files) < 2:
+            X_trans_chunks =\
+                [get_trans_chunk(cloned_transformer, data_files, cache,
+                                 batch_size=batch_size,
+                                 prefetch=self.prefetch,
+                                 prefetch_n_jobs=self.prefetch_n_jobs)]
         else:
             chunks = self.get_chunks(data_files)
 
@@ -128,49 +284,125 @@ class Loader_Wrapper(Transformer_Wrapper):
                     delayed(get_trans_chunk)(
                         transformer=cloned_transformer,
                         data_files=chunk,
-                        func=load_and_trans_c)
+                        cache=cache,
+                        batch_size=batch_size,
+                        prefetch=self.prefetch,
+                        prefetch_n_jobs=self.prefetch_n_jobs)
                     for chunk in chunks)
 
-            X_trans_cols = []
-            for chunk in X_trans_chunks:
-                X_trans_cols += chunk
+        X_trans_cols = []
+        for chunk, stats in X_trans_chunks:
+            X_trans_cols += chunk
+
+            # Keep track of cache hits and misses
+            if stats is not None:
+                for key in stats:
+                    self.cache_stats_[key] += stats[key]
+
+        # Once done, keep the cache under the max size, if any
+        if cache is not None:
+            cache.evict()
 
         return X_trans_cols
 
-    def _get_X_trans(self, X):
+    def _get_batch_size(self, first_datas, first_trans):
+        '''Get the number of subjects to load and transform at once,
+        based on the size of the first loaded file from each column,
+        and its transformed output.'''
+
+        per_subject = 0
+        for data, trans_data in zip(first_datas, first_trans):
+            per_subject += np.asarray(data).nbytes
+            per_subject += np.asarray(trans_data).nbytes
+
+        max_bytes = self.max_memory * (1024 ** 3)
+        return int(max(1, max_bytes // max(1, per_subject)))
 
-        # Init lists + mappings
-        X_trans, X_trans_inds = [], []
-        cnt = 0
+    def _get_out(self, shape):
+        '''Allocate the output array, optionally as memory mapped.'''
 
-        # For each column to fit_transform
-        for col in self.wrapper_inds_:
+        if self.memmap_dr is None:
+            return np.empty(shape)
 
-            # Get transformer column
-            fm_keys = [key for key in X[:, col]]
-            X_trans_cols = self._get_trans_col(fm_keys)
+        os.makedirs(self.memmap_dr, exist_ok=True)
+        fd, loc = tempfile.mkstemp(dir=self.memmap_dr, suffix='.npy')
+        os.close(fd)
 
-            # Stack + append new features
-            X_trans_cols = np.stack(X_trans_cols)
-            X_trans.append(X_trans_cols)
+        X_trans = np.lib.format.open_memmap(loc, mode='w+',
+                                            dtype='float64', shape=shape)
 
-            # Add + append inds
-            X_trans_cols_inds =\
-                [i for i in range(cnt, X_trans_cols.shape[1] + cnt)]
-            X_trans_inds.append(X_trans_cols_inds)
+        # The open memmap keeps the data, so remove the file name
+        try:
+            os.remove(loc)
+        except OSError:
+            pass
 
-            # Update cnt
-            cnt = X_trans_cols.shape[1] + cnt
+        return X_trans
+
+    def _iter_trans_batches(self, fm_keys, batch_size):
+        '''Yield the start index and transformed outputs
+        for each batch of subjects.'''
+
+        for start in range(0, len(fm_keys), batch_size):
+            yield start, self._get_trans_col(fm_keys[start:start+batch_size])
+
+    def _get_X_trans(self, X, fit=False, fit_data=None):
+        '''Returns the transformed loader columns, followed by the rest of
+        X, as a single array filled in batches of subjects. If fit, then
+        fit_data is the already loaded first file of the first column.'''
+
+        # Transform just the first subject from each column,
+        # to figure out the number of output features
+        if fit and self.max_memory is not None:
+
+            # Load the first files once, both to transform them and to
+            # measure the memory used per subject
+            first_datas = [fit_data] +\
+                [self.file_mapping[int(X[0, col])].load()
+                 for col in self.wrapper_inds_[1:]]
+            first_trans = [np.asarray(trans(self.wrapper_transformer, data))
+                           for data in first_datas]
+
+            self.batch_size_ = self._get_batch_size(first_datas, first_trans)
+
+        else:
+            first_trans = [np.asarray(self._get_trans_col([X[0, col]])[0])
+                           for col in self.wrapper_inds_]
+
+            if fit:
+                self.batch_size_ = len(X)
+
+        # Add + append inds
+        X_trans_inds, cnt = [], 0
+        for trans_data in first_trans:
+            X_trans_inds.append([i for i in range(cnt,
+                                                  trans_data.size + cnt)])
+            cnt += trans_data.size
+
+        # Pre-allocate the output, and fill in the rest of X
+        X_trans = self._get_out((len(X), cnt + len(self.rest_inds_)))
+        X_trans[:, cnt:] = X[:, self.rest_inds_]
+
+        # For each column to transform
+        for col, inds, trans_data in zip(self.wrapper_inds_, X_trans_inds,
+                                         first_trans):
+            X_trans[0, inds] = trans_data
+
+            # Fill in the rest of the subjects, one batch at a time
+            fm_keys = [key for key in X[1:, col]]
+            for start, batch in self._iter_trans_batches(fm_keys,
+                                                         self.batch_size_):
+                for i, trans_data in enumerate(batch):
+                    X_trans[start + i + 1, inds] = trans_data
 
-        # Stack final
-        X_trans = np.hstack(X_trans)
         return X_trans, X_trans_inds
 
+    @traced
     def transform(self, X):
 
         # Transform X
         X_trans, _ = self._get_X_trans(X)
-        return np.hstack([X_trans, X[:, self.rest_inds_]])
+        return X_trans
 
     def _get_new_df_names(self, base_name=None, feat_names=None):
         '''Create new feature names for the transformed features,
@@ -268,6 +500,16 @@ class Loader_Wrapper(Transformer_Wrapper):
             self.file_mapping = params.pop('file_mapping')
         if 'wrapper_n_jobs' in params:
             self.wrapper_n_jobs = params.pop('wrapper_n_jobs')
+        if 'cache_max_size' in params:
+            self.cache_max_size = params.pop('cache_max_size')
+        if 'max_memory' in params:
+            self.max_memory = params.pop('max_memory')
+        if 'memmap_dr' in params:
+            self.memmap_dr = params.pop('memmap_dr')
+        if 'prefetch' in params:
+            self.prefetch = params.pop('prefetch')
+        if 'prefetch_n_jobs' in params:
+            self.prefetch_n_jobs = params.pop('prefetch_n_jobs')
 
         return super().set_params(**params)
 
@@ -278,6 +520,11 @@ class Loader_Wrapper(Transformer_Wrapper):
         # Passing file_mapping as just a reference *should* be okay
         params['file_mapping'] = self.file_mapping
         params['wrapper_n_jobs'] = self.wrapper_n_jobs
+        params['cache_max_size'] = self.cache_max_size
+        params['max_memory'] = self.max_memory
+        params['memmap_dr'] = self.memmap_dr
+        params['prefetch'] = self.prefetch
+        params['prefetch_n_jobs'] = self.prefetch_n_jobs
 
         return params
 
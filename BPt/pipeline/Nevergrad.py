@@ -5,12 +5,21 @@ import nevergrad as ng
 
 from concurrent import futures
 import multiprocessing as mp
+from joblib import hash as joblib_hash, dump, load
+import tempfile
+import time
+from uuid import uuid4
+import os
 
 from sklearn.base import clone
 from copy import deepcopy
 
 from .base import _get_est_fit_params
+from .BPt_Pipeline import clear_prefix_memo
+from .Trace import traced, paused_trace
 from ..helpers.CV import CV as Base_CV
+from ..helpers.Shared_Array import (to_shared, from_shared,
+                                    get_temp_dr, remove_temp_dr)
 from os.path import dirname, abspath, exists
 from sklearn.base import BaseEstimator
 import warnings
@@ -31,22 +40,83 @@ class ProgressLogger():
             f.write('params,')
 
 
-def ng_cv_score(X, y, estimator, scoring, weight_scorer,
-                cv_inds, cv_subjects, mapping, fit_params, **kwargs):
+# Stores the score of each fold for each evaluated set of params,
+# by search key, and the history of (params, loss) by estimator key,
+# such that repeated candidates are not re-computed, and searches can
+# be warm started, see NevergradSearchCV.
+_SEARCH_STORE = {'scores': {}, 'history': {}}
+
+# The max number of searches, and of estimators, with stored
+# evaluations, past which the least recently used are removed
+SEARCH_STORE_MAX_SIZE = 64
+
+
+def clear_search_cache():
+    '''Clear all stored hyper-parameter search evaluations.'''
+
+    _SEARCH_STORE['scores'] = {}
+    _SEARCH_STORE['history'] = {}
+
+
+def _get_stored(store, key, default):
+    '''Get the value stored under key, or store default, marked as the
+    most recently used, removing the least recently used if over
+    SEARCH_STORE_MAX_SIZE.'''
+
+    value = store.pop(key, default)
+    store[key] = value
+
+    while len(store) > SEARCH_STORE_MAX_SIZE:
+        del store[next(iter(store))]
+
+    return value
+
+
+def _score_key(params_key, fold, train_frac=1):
+
+    if train_frac == 1:
+        return (params_key, fold)
+    return (params_key, fold, train_frac)
+
+
+def ng_cv_fold_scores(X, y, estimator, scoring, cv_inds, cv_subjects,
+                      mapping, fit_params, folds=None, train_frac=1,
+                      memo_key=None, memo_size=0, **kwargs):
+    '''Returns the loss, i.e., the negative score, for each
+    requested fold, or if folds is None, all folds. If train_frac
+    is less than 1, then only that fraction of the training subjects
+    in each fold is used. If memo_key is passed, the fitted pipeline
+    prefixes are memo'ed per fold, see BPt_Pipeline.set_prefix_memo.'''
+
+    # If passed as shared, load as memory mapped
+    X, y = from_shared(X), from_shared(y)
+
+    if folds is None:
+        folds = range(len(cv_inds))
 
     cv_scores = []
-    for i in range(len(cv_inds)):
+    for i in folds:
         tr_inds, test_inds = cv_inds[i]
+        tr_subjects = cv_subjects[i][0]
+
+        # Use the same random subsample of train subjects, per fold
+        if train_frac < 1:
+            n_keep = max(2, int(len(tr_inds) * train_frac))
+            keep = np.sort(RandomState(i).permutation(len(tr_inds))[:n_keep])
+            tr_inds, tr_subjects = np.asarray(tr_inds)[keep], tr_subjects[keep]
 
         # Clone estimator & set search params
         estimator = clone(estimator)
         estimator.set_params(**kwargs)
 
+        if memo_key is not None and hasattr(estimator, 'set_prefix_memo'):
+            estimator.set_prefix_memo((memo_key, i, train_frac), memo_size)
+
         # Adds mapping / train data index if needed
         f_params = _get_est_fit_params(
             estimator,
             mapping=mapping,
-            train_data_index=cv_subjects[i][0],
+            train_data_index=tr_subjects,
             other_params=fit_params)
 
         # Fit estimator on train
@@ -57,14 +127,53 @@ def ng_cv_score(X, y, estimator, scoring, weight_scorer,
         score = -scoring(estimator, X[test_inds], y[test_inds])
         cv_scores.append(score)
 
+    return cv_scores
+
+
+def combine_cv_scores(cv_scores, cv_inds, weight_scorer, folds=None):
+
+    if folds is None:
+        folds = range(len(cv_inds))
+
     if weight_scorer:
-        weights = [len(cv_inds[i][1]) for i
-                   in range(len(cv_inds))]
+        weights = [len(cv_inds[i][1]) for i in folds]
         return np.average(cv_scores, weights=weights)
     else:
         return np.mean(cv_scores)
 
 
+def ng_cv_score(X, y, estimator, scoring, weight_scorer,
+                cv_inds, cv_subjects, mapping, fit_params, **kwargs):
+
+    cv_scores = ng_cv_fold_scores(X, y, estimator, scoring, cv_inds,
+                                  cv_subjects, mapping, fit_params, **kwargs)
+
+    return combine_cv_scores(cv_scores, cv_inds, weight_scorer)
+
+
+class _SequentialFuture():
+    '''Computes the passed function right away, but
+    acts like a future.'''
+
+    def __init__(self, func, *args, **kwargs):
+
+        # Only the search as a whole is traced, not each candidate
+        with paused_trace():
+            self._result = func(*args, **kwargs)
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self._result
+
+
+class _SequentialExecutor():
+
+    def submit(self, func, *args, **kwargs):
+        return _SequentialFuture(func, *args, **kwargs)
+
+
 class NevergradSearchCV(BaseEstimator):
 
     needs_mapping = True
@@ -121,41 +230,42 @@ class NevergradSearchCV(BaseEstimator):
         if self.param_search._CV is None:
             self.param_search._CV = Base_CV()
 
-        self.cv_subjects, self.cv_inds =\
-            self.param_search._CV.get_cv(train_data_index,
-                                         self.param_search.splits,
-                                         self.param_search.n_repeats,
-                                         self.param_search._splits_vals,
-                                         self.param_search._random_state,
-                                         return_index='both')
-
-    def get_instrumentation(self, X, y, mapping, fit_params, client):
-
-        if client is None:
-            instrumentation =\
-                ng.p.Instrumentation(X, y, self.estimator,
-                                     self.param_search._scorer,
-                                     self.param_search.weight_scorer,
-                                     self.cv_inds,
-                                     self.cv_subjects, mapping,
-                                     fit_params, **self.param_distributions)
+        # Compute the splits once, where each subject and index split
+        # is only computed as needed, and passed as just the compact splits
+        cv_splits =\
+            self.param_search._CV.get_splits(train_data_index,
+                                             self.param_search.splits,
+                                             self.param_search.n_repeats,
+                                             self.param_search._splits_vals,
+                                             self.param_search._random_state)
+
+        self.cv_subjects = cv_splits.view(return_index=False)
+        self.cv_inds = cv_splits.view(return_index=True)
+
+    def get_score_args(self, X, y, mapping, fit_params, client,
+                       temp_dr=None):
+        '''Get the fixed args passed to ng_cv_fold_scores for
+        each candidate'''
+
+        cv_inds, cv_subjects = self.cv_inds, self.cv_subjects
+
+        # If running in a process pool, pass a shared handle to
+        # X and y, rather than a pickled copy for each candidate.
+        if client is None and temp_dr is not None:
+            X, y = to_shared(X, temp_dr, 'X'), to_shared(y, temp_dr, 'y')
 
         # If using dask client, pre-scatter some big memory fixed params
-        else:
-            X_s = client.scatter(X)
-            y_s = client.scatter(y)
-            cv_inds_s = client.scatter(self.cv_inds)
-            cv_subjects_s = client.scatter(self.cv_subjects)
+        elif client is not None:
+            X, y = client.scatter(X), client.scatter(y)
+            cv_inds = client.scatter(cv_inds)
+            cv_subjects = client.scatter(cv_subjects)
+
+        return (X, y, self.estimator, self.param_search._scorer,
+                cv_inds, cv_subjects, mapping, fit_params)
 
-            instrumentation =\
-                ng.p.Instrumentation(X_s, y_s, self.estimator,
-                                     self.param_search._scorer,
-                                     self.param_search.weight_scorer,
-                                     cv_inds_s,
-                                     cv_subjects_s, mapping,
-                                     fit_params, **self.param_distributions)
+    def get_instrumentation(self):
 
-        return instrumentation
+        return ng.p.Instrumentation(**self.param_distributions)
 
     def get_optimizer(self, instrumentation):
 
@@ -186,40 +296,294 @@ class NevergradSearchCV(BaseEstimator):
 
         return optimizer
 
-    def run_search(self, optimizer, client):
+    def _set_search_keys(self, X, y, train_data_index, mapping,
+                         fit_params):
+        '''The search key identifies the data, CV and estimator, and
+        the estimator key identifies just the estimator and params
+        searched over. The data is identified by the subjects and
+        all of X and y, such that a change to any value is a new search.
+        Each part is hashed separately, such that the key doesn't depend
+        on which parts happen to share objects, e.g., stored CV splits.'''
 
-        # _n_jobs 1, always local
-        if self.param_search._n_jobs == 1:
-            recommendation = optimizer.minimize(ng_cv_score,
-                                                batch_mode=False)
+        self.est_key_ = joblib_hash((self.estimator,
+                                     sorted(self.param_distributions)))
 
-        # If generated client
-        elif client is not None:
-            recommendation = optimizer.minimize(ng_cv_score,
-                                                executor=client,
-                                                batch_mode=False)
+        parts = (np.asarray(train_data_index), X, y, self.cv_inds,
+                 self.param_search._scorer, mapping, fit_params)
+        self.search_key_ = joblib_hash((self.est_key_,) +
+                                       tuple(joblib_hash(p) for p in parts))
 
-        # Otherwise use futures pool executor
-        else:
+    def _get_cache_locs(self):
+
+        cache_loc = self.param_search.cache_loc
+        return (os.path.join(cache_loc, 'scores_' + self.search_key_ + '.pkl'),
+                os.path.join(cache_loc, 'history_' + self.est_key_ + '.pkl'))
+
+    def _load_store(self):
+        '''Get the stored fold scores and params history for
+        this search, loading from the cache_loc if any.'''
+
+        scores = _get_stored(_SEARCH_STORE['scores'], self.search_key_, {})
+        history = _get_stored(_SEARCH_STORE['history'], self.est_key_, [])
+
+        if self.param_search.cache_loc is not None:
+            scores_loc, history_loc = self._get_cache_locs()
+
+            if os.path.exists(scores_loc):
+                scores.update(load(scores_loc))
+
+            if os.path.exists(history_loc) and len(history) == 0:
+                history += load(history_loc)
+
+        return scores, history
+
+    def _save_store(self, scores, history):
+
+        if self.param_search.cache_loc is None:
+            return
+
+        os.makedirs(self.param_search.cache_loc, exist_ok=True)
+        for obj, loc in zip([scores, history], self._get_cache_locs()):
+
+            # Write to temp file first, then move into place
+            fd, temp_loc = tempfile.mkstemp(
+                dir=self.param_search.cache_loc, suffix='.tmp')
+            os.close(fd)
+
+            dump(obj, temp_loc)
+            os.replace(temp_loc, loc)
+
+    def _warm_start(self, optimizer, history):
+        '''Suggest the best previously evaluated params first.'''
+
+        if not self.param_search.warm_start:
+            return
+
+        # Best unique params, by loss
+        best, seen = [], set()
+        for kwargs, loss in sorted(history, key=lambda h: h[1]):
+            key = joblib_hash(kwargs)
+            if key not in seen:
+                seen.add(key)
+                best.append(kwargs)
+
+            if len(best) == int(self.param_search.warm_start):
+                break
+
+        # Suggestions are last in first out, so add best last
+        for kwargs in best[::-1]:
             try:
-                with futures.ProcessPoolExecutor(
-                  max_workers=self.param_search._n_jobs,
-                  mp_context=mp.get_context(self.param_search.mp_context)) as ex:
-
-                    recommendation = optimizer.minimize(ng_cv_score,
-                                                        executor=ex,
-                                                        batch_mode=False)
-            except RuntimeError:
-                raise(RuntimeError('Try changing the mp_context'))
-
-        # Save best search search score
-        # "optimistic", "pessimistic", "average"
-        # and best params
-        self.best_search_score = optimizer.current_bests["pessimistic"].mean
+                optimizer.suggest(**kwargs)
+
+            # Skip any params no longer valid
+            except Exception:
+                pass
+
+    @traced
+    def run_search(self, optimizer, score_args, executor):
+        '''Run the search, with any already evaluated folds for a
+        candidate taken from the search cache, such that
+        only the missing folds are computed.'''
+
+        if self.param_search.cache_evals:
+            scores, history = self._load_store()
+        else:
+            scores, history = {}, []
+
+        self._warm_start(optimizer, history)
+
+        self.n_cached_ = 0
+        if self.param_search.successive_halving:
+            recommendation, self.best_search_score =\
+                self._run_halving_search(optimizer, score_args, executor,
+                                         scores, history)
+
+        else:
+            self._run_full_search(optimizer, score_args, executor,
+                                  scores, history)
+
+            recommendation = optimizer.provide_recommendation()
+
+            # Save best search search score
+            # "optimistic", "pessimistic", "average"
+            self.best_search_score =\
+                optimizer.current_bests["pessimistic"].mean
+
+        if self.param_search.cache_evals:
+            self._save_store(scores, history)
+
+        # Save best params
         self.best_params_ = recommendation.kwargs
 
         return recommendation
 
+    def _submit(self, executor, score_args, candidate, folds,
+                train_frac=1):
+        '''Submit a job computing the passed folds for a candidate.'''
+
+        return executor.submit(ng_cv_fold_scores, *score_args,
+                               folds=folds, train_frac=train_frac,
+                               memo_key=self.memo_key_,
+                               memo_size=self.param_search.prefix_cache_size,
+                               **candidate.kwargs)
+
+    def _run_full_search(self, optimizer, score_args, executor,
+                         scores, history):
+        '''Explicit ask and tell loop, where each candidate is scored
+        on all folds.'''
+
+        cv_inds = self.cv_inds
+        weight_scorer = self.param_search.weight_scorer
+        n_folds = len(cv_inds)
+
+        running = []
+        while optimizer.num_ask < optimizer.budget or len(running) > 0:
+
+            # Launch new candidates, up to the number of workers
+            while optimizer.num_ask < optimizer.budget and\
+                    len(running) < optimizer.num_workers:
+
+                candidate = optimizer.ask()
+                params_key = joblib_hash(candidate.kwargs)
+
+                # Only compute the folds not already computed
+                folds = [i for i in range(n_folds)
+                         if (params_key, i) not in scores]
+                if len(folds) == 0:
+                    self.n_cached_ += 1
+                    job = _SequentialFuture(list)
+                else:
+                    job = self._submit(executor, score_args,
+                                       candidate, folds)
+
+                running.append((candidate, params_key, folds, job))
+
+            # Tell any finished candidates, in order
+            still_running = []
+            for candidate, params_key, folds, job in running:
+
+                if not job.done():
+                    still_running.append((candidate, params_key,
+                                          folds, job))
+                    continue
+
+                for i, score in zip(folds, job.result()):
+                    scores[(params_key, i)] = score
+
+                cv_scores = [scores[(params_key, i)] for i in range(n_folds)]
+                loss = combine_cv_scores(cv_scores, cv_inds, weight_scorer)
+
+                optimizer.tell(candidate, loss)
+                history.append((candidate.kwargs, loss))
+
+            # If nothing finished, wait a little
+            if len(still_running) == len(running) and len(running) > 0:
+                time.sleep(.001)
+
+            running = still_running
+
+    def _get_rungs(self):
+        '''Get the folds and fraction of train subjects each candidate
+        is scored on at each step of successive halving.'''
+
+        n_folds = len(self.cv_inds)
+        factor = self.param_search.halving_factor
+
+        # If only a single split, use subsamples of the train subjects
+        if n_folds == 1:
+            return [([0], 1 / factor ** 2), ([0], 1 / factor), ([0], 1)]
+
+        rungs, n = [], max(1, int(self.param_search.min_folds))
+        while n < n_folds:
+            rungs.append((list(range(n)), 1))
+            n *= factor
+
+        rungs.append((list(range(n_folds)), 1))
+        return rungs
+
+    def _score_candidates(self, candidates, folds, train_frac,
+                          score_args, executor, scores):
+        '''Get the loss for each candidate on the passed folds, computing
+        any fold scores not already stored in parallel.'''
+
+        jobs, submitted = [], set()
+        for candidate in candidates:
+            params_key = joblib_hash(candidate.kwargs)
+
+            missing = [i for i in folds if
+                       _score_key(params_key, i, train_frac) not in scores]
+            if len(missing) == 0:
+                self.n_cached_ += 1
+                continue
+
+            # Repeated candidates only need to be computed once
+            if params_key in submitted:
+                continue
+            submitted.add(params_key)
+
+            job = self._submit(executor, score_args, candidate,
+                               missing, train_frac=train_frac)
+            jobs.append((params_key, missing, job))
+
+        for params_key, missing, job in jobs:
+            for i, score in zip(missing, job.result()):
+                scores[_score_key(params_key, i, train_frac)] = score
+
+        losses = []
+        for candidate in candidates:
+            params_key = joblib_hash(candidate.kwargs)
+            cv_scores = [scores[_score_key(params_key, i, train_frac)]
+                         for i in folds]
+            losses.append(combine_cv_scores(cv_scores, self.cv_inds,
+                                            self.param_search.weight_scorer,
+                                            folds=folds))
+
+        return losses
+
+    def _run_halving_search(self, optimizer, score_args, executor,
+                            scores, history):
+        '''Run the search as repeated brackets of successive halving,
+        returning the best candidate scored on all folds and its loss.'''
+
+        rungs = self._get_rungs()
+        factor = self.param_search.halving_factor
+        bracket_size = max(optimizer.num_workers,
+                           factor ** (len(rungs) - 1))
+
+        best, best_loss = None, np.inf
+        while optimizer.num_ask < optimizer.budget:
+
+            n = min(bracket_size, optimizer.budget - optimizer.num_ask)
+            candidates = [optimizer.ask() for _ in range(n)]
+
+            for r, (folds, train_frac) in enumerate(rungs):
+                losses = self._score_candidates(candidates, folds,
+                                                train_frac, score_args,
+                                                executor, scores)
+
+                # Last rung, all remaining are fully evaluated
+                if r == len(rungs) - 1:
+                    for candidate, loss in zip(candidates, losses):
+                        optimizer.tell(candidate, loss)
+                        history.append((candidate.kwargs, loss))
+
+                        if loss < best_loss:
+                            best, best_loss = candidate, loss
+                    break
+
+                # Otherwise, promote only the best to the next rung,
+                # and tell the optimizer the loss so far for the rest
+                n_keep = int(np.ceil(len(candidates) / factor))
+                order = np.argsort(losses, kind='stable')
+
+                for ind in order[n_keep:]:
+                    optimizer.tell(candidates[ind], losses[ind])
+
+                candidates = [candidates[ind] for ind in order[:n_keep]]
+
+        return best, best_loss
+
+    @traced
     def fit(self, X, y=None, mapping=None,
             train_data_index=None, **fit_params):
 
@@ -236,6 +600,14 @@ class NevergradSearchCV(BaseEstimator):
         # Set the search cv passed on passed train_data_index
         self._set_cv(train_data_index)
 
+        # Identifies this search's data for memo'ing pipeline prefixes
+        self.memo_key_ = uuid4().hex
+
+        # Set the keys used to store / look up computed scores
+        if self.param_search.cache_evals:
+            self._set_search_keys(X, y, train_data_index, mapping,
+                                  fit_params)
+
         # Check if need to make dask client
         # Criteria is greater than 1 job, and passed as dask_ip of non-None
         if self.param_search._n_jobs > 1 and self.param_search.dask_ip is not None:
@@ -244,22 +616,61 @@ class NevergradSearchCV(BaseEstimator):
         else:
             client = None
 
-        # Get the instrumentation
-        instrumentation =\
-            self.get_instrumentation(X, y, mapping=mapping,
-                                     fit_params=fit_params,
-                                     client=client)
+        # If running in a local process pool, store X and y once
+        # in a temp directory, to be memory mapped by each worker
+        temp_dr = None
+        if self.param_search._n_jobs > 1 and client is None:
+            temp_dr = get_temp_dr()
+
+        try:
+
+            # Get the fixed arguments to score each candidate
+            score_args =\
+                self.get_score_args(X, y, mapping=mapping,
+                                    fit_params=fit_params,
+                                    client=client, temp_dr=temp_dr)
+
+            # Get the optimizer
+            optimizer = self.get_optimizer(self.get_instrumentation())
+
+            # Run the search
+            if self.param_search._n_jobs == 1:
+                recommendation =\
+                    self.run_search(optimizer, score_args,
+                                    _SequentialExecutor())
+
+            elif client is not None:
+                recommendation =\
+                    self.run_search(optimizer, score_args, client)
+
+            # Otherwise use futures pool executor
+            else:
+                try:
+                    with futures.ProcessPoolExecutor(
+                      max_workers=self.param_search._n_jobs,
+                      mp_context=mp.get_context(
+                          self.param_search.mp_context)) as ex:
+
+                        recommendation =\
+                            self.run_search(optimizer, score_args, ex)
+
+                except RuntimeError:
+                    raise(RuntimeError('Try changing the mp_context'))
 
-        # Get the optimizer
-        optimizer = self.get_optimizer(instrumentation)
+        # Memo'ed prefixes are only re-used within this search,
+        # so free them once done
+        finally:
+            remove_temp_dr(temp_dr)
+            clear_prefix_memo()
 
-        # Run the search
-        recommendation = self.run_search(optimizer, client)
+            if client is not None:
+                client.run(clear_prefix_memo)
 
         # Fit best est, w/ best params
         self.fit_best_estimator(recommendation, X, y, mapping,
                                 train_data_index, fit_params)
 
+    @traced
     def fit_best_estimator(self, recommendation,  X, y, mapping,
                            train_data_index, fit_params):
 
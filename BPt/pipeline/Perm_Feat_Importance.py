@@ -1,60 +1,199 @@
-from joblib import dump, load, Parallel, delayed
-import os
-import copy
+from joblib import Parallel, delayed
 import numpy as np
+import os
+from sklearn import config_context
+from ..helpers.Shared_Array import (to_shared, from_shared,
+                                    get_temp_dr, remove_temp_dr)
+
+
+class _Stacked_Model():
+    '''Wraps a fitted model, such that the outputs of any predict
+    like method are computed just once over a stack of permuted copies
+    of X, then returned a slice at a time, one for each copy.'''
+
+    methods = ['predict', 'predict_proba', 'decision_function']
+
+    def __init__(self, model, X_stack, n_copies):
+
+        self.model = model
+        self.X_stack = X_stack
+        self.n_copies = n_copies
+        self.outputs = {}
+        self.copy = 0
+
+    def __getattr__(self, name):
+
+        if name in _Stacked_Model.methods and hasattr(self.model, name):
+            return lambda X: self._get_output(name)
+
+        return getattr(self.model, name)
+
+    def _get_output(self, method):
+
+        # Compute for the whole stack only the first time
+        if method not in self.outputs:
+            n_subjects = self.X_stack.shape[1]
+            X = self.X_stack[:self.n_copies].reshape(
+                self.n_copies * n_subjects, -1)
+
+            self.outputs[method] = getattr(self.model, method)(X)
+
+        output = self.outputs[method]
+        n_subjects = len(output) // self.n_copies
+
+        return output[self.copy * n_subjects: (self.copy+1) * n_subjects]
+
+
+def get_n_stack(X, n_tasks, max_stack_size):
+    '''Get the number of permuted copies of X to stack into one
+    predict call, with their total size at most max_stack_size
+    gigabytes.'''
+
+    n_stack = int((max_stack_size * (1024 ** 3)) // max(1, X.nbytes))
+    return max(1, min(n_stack, n_tasks))
+
+
+def get_perms(seed, group_ind, n_perm, n_subjects):
+    '''The same permutations are generated for a group regardless
+    of how the groups are split across workers.'''
+
+    rng = np.random.RandomState([seed, group_ind])
+    return [rng.permutation(n_subjects) for _ in range(n_perm)]
 
 
-def get_feat_importances(model_loc, scorer, inds, X, y, n_perm):
+def get_group_scores(model, scorer, groups, group_inds, X, y, n_perm,
+                     seed, max_stack_size):
+    '''Returns the mean permuted score for each of the passed groups of
+    feature indices, with any number of permuted copies stacked
+    into a single predict call.'''
 
-    results = {}
-    model = load(model_loc)
+    X = np.array(from_shared(X))
+    n_subjects = X.shape[0]
 
-    X_copy = X.copy()
+    # Each permutation of each group is a separate task
+    tasks = [(g, perm) for g in range(len(groups)) for perm in range(n_perm)]
+    n_stack = get_n_stack(X, len(tasks), max_stack_size)
 
-    for ind in inds:
+    # Pre-fill with un-permuted copies, then only permute
+    # and restore the group columns in each copy
+    X_stack = np.empty((n_stack,) + X.shape, dtype=X.dtype)
+    X_stack[:] = X
 
-        original = X_copy[:, ind].copy()
-        importances = []
+    scores = [[] for _ in range(len(groups))]
+    perms = {}
 
-        for perm in range(n_perm):
-            X_copy[:, ind] = np.random.permutation(X_copy[:, ind])
-            importances.append(scorer(model, X_copy, y))
+    # X was already checked when computing the baseline score,
+    # so skip re-checking each permuted copy
+    with config_context(assume_finite=True):
+        for start in range(0, len(tasks), n_stack):
+            batch = tasks[start:start + n_stack]
 
-        results[ind] = np.mean(importances)
-        X_copy[:, ind] = original
+            for i, (g, perm) in enumerate(batch):
+                if g not in perms:
+                    perms[g] = get_perms(seed, group_inds[g],
+                                         n_perm, n_subjects)
 
-    return results
+                X_stack[i][:, groups[g]] =\
+                    X[np.ix_(perms[g][perm], groups[g])]
+
+            if n_stack > 1:
+                stacked = _Stacked_Model(model, X_stack, len(batch))
+                for i, (g, _) in enumerate(batch):
+                    stacked.copy = i
+                    scores[g].append(scorer(stacked, X_stack[i], y))
+            else:
+                scores[batch[0][0]].append(scorer(model, X_stack[0], y))
+
+            # Restore
+            for i, (g, perm) in enumerate(batch):
+                X_stack[i][:, groups[g]] = X[:, groups[g]]
+
+                if perm == n_perm - 1:
+                    del perms[g]
+
+    return [np.mean(s) for s in scores]
 
 
 class Perm_Feat_Importance():
+    '''Computes permutation feature importances, as the drop in score from
+    the baseline when each feature, or group of features, is permuted.
+
+    Parameters
+    ----------
+    n_perm : int, optional
+        The number of times each feature / group is permuted.
+
+    n_jobs : int, optional
+        The number of jobs to split the features / groups across.
 
-    def __init__(self, n_perm=1, n_jobs=1, temp_dr=''):
+    temp_dr : str or None, optional
+        Where X is stored, to be shared by each job. If None,
+        a new temp directory is used.
+
+    groups : list of list of int or None, optional
+        Groups of feature indices, e.g., of highly correlated features,
+        to be permuted together. Each feature within a group is assigned
+        the importance of its group. Any features not in a group are
+        permuted by themselves.
+
+    random_state : int or None, optional
+        Seed for the permutations.
+
+    max_stack_size : float, optional
+        The maximum size, in gigabytes, of the permuted copies of X
+        passed to the model in a single predict call.
+    '''
+
+    def __init__(self, n_perm=1, n_jobs=1, temp_dr=None, groups=None,
+                 random_state=None, max_stack_size=.03):
 
         self.n_perm = n_perm
         self.n_jobs = n_jobs
         self.temp_dr = temp_dr
+        self.groups = groups
+        self.random_state = random_state
+        self.max_stack_size = max_stack_size
+
+    def get_groups(self, n_feats):
 
-    def get_chunks(self):
+        groups, grouped = [], set()
+        if self.groups is not None:
+            for group in self.groups:
+                group = [int(i) for i in group if int(i) not in grouped]
+                if len(group) > 0:
+                    groups.append(group)
+                    grouped.update(group)
 
-        per_chunk = self.X.shape[1] // self.n_jobs
-        chunks = [list(range(i * per_chunk, (i+1) * per_chunk))
-                  for i in range(self.n_jobs)]
+        # Rest as own group
+        groups += [[i] for i in range(n_feats) if i not in grouped]
 
-        last = chunks[-1][-1]
-        chunks[-1] += list(range(last+1, self.X.shape[-1]))
-        return chunks
+        return groups
+
+    def get_seed(self):
+
+        if isinstance(self.random_state, (int, np.integer)):
+            return int(self.random_state)
+
+        if self.random_state is not None:
+            return int(self.random_state.randint(2**31))
+
+        return int(np.random.randint(2**31))
 
     def compute(self, model, scorer, X, y):
 
-        self.X = X
-        self.y = y
+        X = np.asarray(X)
+        baseline_score = scorer(model, X, y)
+
+        groups = self.get_groups(X.shape[1])
+        seed = self.get_seed()
 
-        baseline_score = scorer(model, self.X, self.y)
+        n_jobs = min(self.n_jobs, len(groups))
+        if n_jobs == 1:
+            scores = get_group_scores(model, scorer, groups,
+                                      list(range(len(groups))), X, y,
+                                      self.n_perm, seed,
+                                      self.max_stack_size)
 
-        if self.n_jobs == 1:
-            scores = []
-            for ind in range(X.shape[1]):
-                scores.append(self.get_feat_importance(ind, scorer, model))
         else:
 
             changed = None
@@ -68,48 +207,36 @@ class Perm_Feat_Importance():
             except AttributeError:
                 pass
 
-            rn = str(np.random.random())
-            model_loc = os.path.join(self.temp_dr, 'temp' + rn + '.joblib')
-            dump(model, model_loc)
-            model_locs = [model_loc for i in range(self.n_jobs)]
-
-            scorers = [scorer for i in range(self.n_jobs)]
-            inds = self.get_chunks()
-            Xs = [X for i in range(self.n_jobs)]
-            ys = [y for i in range(self.n_jobs)]
-            n_perms = [self.n_perm for i in range(self.n_jobs)]
-
-            imp_dicts =\
-                Parallel(n_jobs=self.n_jobs)(delayed(get_feat_importances)
-                                                    (ml, s, i, x, y, n) for
-                                             ml, s, i, x, y, n in zip(
-                                                 model_locs,
-                                                 scorers,
-                                                 inds, Xs, ys,
-                                                 n_perms))
-
-            scores = [0 for i in range(X.shape[1])]
-            for imp_dict in imp_dicts:
-                for i in imp_dict:
-                    scores[i] = imp_dict[i]
-
-            os.remove(model_loc)
-
-            if changed is not None:
-                model.n_jobs = changed
-
-        scores = np.array(scores)
-        difs = baseline_score - scores
-        return difs
+            # Store X once, to be shared by each worker,
+            # the model is passed to each in memory
+            temp_dr = self.temp_dr
+            if temp_dr is None:
+                temp_dr = get_temp_dr()
+
+            X_s = to_shared(X, temp_dr, 'X' + str(seed))
 
-    def get_feat_importance(self, ind, scorer, model):
+            try:
+                chunks = np.array_split(np.arange(len(groups)), n_jobs)
+                chunk_scores =\
+                    Parallel(n_jobs=n_jobs)(delayed(get_group_scores)(
+                        model, scorer, [groups[g] for g in chunk],
+                        list(chunk), X_s, y, self.n_perm, seed,
+                        self.max_stack_size) for chunk in chunks)
 
-        X_copy = self.X.copy()
+            finally:
+                if self.temp_dr is None:
+                    remove_temp_dr(temp_dr)
+                else:
+                    os.remove(X_s.loc)
 
-        importances = []
-        for _ in range(self.n_perm):
+                if changed is not None:
+                    model.n_jobs = changed
 
-            X_copy[:, ind] = np.random.permutation(X_copy[:, ind])
-            importances.append(scorer(model, X_copy, self.y))
+            scores = [score for chunk in chunk_scores for score in chunk]
 
-        return np.mean(importances)
+        # Each feature gets the importance of its group
+        difs = np.zeros(X.shape[1])
+        for group, score in zip(groups, scores):
+            difs[group] = baseline_score - score
+
+        return difs
@@ -596,6 +596,12 @@ class Loaders(Pieces):
         # Extract scopes + cache loc
         passed_loader_scopes = [p.scope for p in params]
         passed_cache_locs = [p.cache_loc for p in params]
+        passed_obj_params = [{'cache_max_size': p.cache_max_size,
+                              'max_memory': p.max_memory,
+                              'memmap_dr': p.memmap_dr,
+                              'prefetch': p.prefetch,
+                              'prefetch_n_jobs': p.prefetch_n_jobs}
+                             for p in params]
 
         # Process according to passed tuples or not
         passed_loaders, passed_loader_params =\
@@ -605,7 +611,8 @@ class Loaders(Pieces):
         # in the loader wrapper.
         pass_params = {'file_mapping': self.Data_Scopes.file_mapping,
                        'wrapper_n_jobs': self.spec['n_jobs'],
-                       'cache_locs': passed_cache_locs}
+                       'cache_locs': passed_cache_locs,
+                       'obj_params': passed_obj_params}
 
         passed_loaders =\
             self._wrap_pipeline_objs(Loader_Wrapper,
@@ -4,6 +4,7 @@ from sklearn.utils.metaestimators import if_delegate_has_method
 import numpy as np
 from copy import deepcopy
 from .base import _get_est_fit_params
+from .Trace import traced
 
 
 class Scope_Model(BaseEstimator):
@@ -56,6 +57,7 @@ class Scope_Model(BaseEstimator):
 
         return
 
+    @traced
     def fit(self, X, y=None, mapping=None, train_data_index=None, **kwargs):
 
         # Set n_features in
@@ -111,16 +113,19 @@ class Scope_Model(BaseEstimator):
     def feature_importances_(self):
         return self.wrapper_model_.feature_importances_
 
+    @traced
     def predict(self, X, *args, **kwargs):
         return self.wrapper_model_.predict(X[:, self.wrapper_inds_],
                                            *args, **kwargs)
 
     @if_delegate_has_method(delegate='wrapper_model_')
+    @traced
     def predict_proba(self, X, *args, **kwargs):
         return self.wrapper_model_.predict_proba(X[:, self.wrapper_inds_],
                                                  *args, **kwargs)
 
     @if_delegate_has_method(delegate='wrapper_model_')
+    @traced
     def decision_function(self, X, *args, **kwargs):
         return self.wrapper_model_.decision_function(X[:, self.wrapper_inds_],
                                                      *args, **kwargs)
@@ -0,0 +1,316 @@
+"""
+Trace.py
+====================================
+Light-weight, opt-in instrumentation of the time and memory used
+by each step of a pipeline, see :class:`Trace`.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class _Active(threading.local):
+    '''The trace currently being recorded to, in this thread, along with
+    the fold it is being recorded for, see set_trace.'''
+
+    trace = None
+    fold = None
+    depth = 0
+    objs = ()
+
+
+_ACTIVE = _Active()
+
+
+def get_peak_rss_mb():
+    '''The peak resident memory of this process so far in MB,
+    or None if not available on this platform.'''
+
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Bytes on mac, kilobytes on linux
+    if sys.platform == 'darwin':
+        return peak / (1024 ** 2)
+    return peak / 1024
+
+
+def get_shape(obj):
+
+    shape = getattr(obj, 'shape', None)
+    if shape is None:
+        return None
+
+    return [int(s) for s in shape]
+
+
+class Trace():
+    '''Record of the wall time, CPU time, memory and output shape
+    of each traced step, e.g., each fit and transform of each
+    pipeline piece, within each fold.
+
+    Each event is stored as a dict with keys,
+
+    - 'name' : The class and method, or stage, traced.
+    - 'fold' : The fold index, or 'test'.
+    - 'start' : The unix time the step started at.
+    - 'wall_time' : In seconds.
+    - 'cpu_time' : The process CPU time in seconds.
+    - 'peak_rss_mb' : The peak resident memory of the process, in MB, \
+                      after the step.
+    - 'peak_rss_increase_mb' : How much the step raised the process \
+                               peak resident memory, in MB.
+    - 'shape' : The shape of the output, or if the output has \
+                no shape (e.g., a call to fit), of the input.
+    - 'depth' : How many traced steps this step is nested within.
+    - 'pid' : The process the step was run in.
+    '''
+
+    def __init__(self, events=None):
+
+        if events is None:
+            events = []
+
+        self.events = events
+
+    def __len__(self):
+        return len(self.events)
+
+    def __repr__(self):
+        return 'Trace(n_events=' + str(len(self.events)) + ')'
+
+    def add(self, event):
+        self.events.append(event)
+
+    def extend(self, events):
+        self.events.extend(events)
+
+    def to_df(self):
+        '''Return the events as a pandas DataFrame, one row per event.'''
+
+        return pd.DataFrame(self.events)
+
+    def summary(self):
+        '''Return a DataFrame summarizing the events by name, sorted by
+        total wall time. Note that nested steps, e.g., the
+        wrapper within a pipeline step, are each included in full.'''
+
+        df = self.to_df()
+        if len(df) == 0:
+            return df
+
+        summary = df.groupby('name').agg(
+            count=('wall_time', 'size'),
+            wall_time=('wall_time', 'sum'),
+            mean_wall_time=('wall_time', 'mean'),
+            cpu_time=('cpu_time', 'sum'),
+            peak_rss_mb=('peak_rss_mb', 'max'),
+            peak_rss_increase_mb=('peak_rss_increase_mb', 'max'))
+
+        return summary.sort_values('wall_time', ascending=False)
+
+    def to_json(self, loc=None):
+        '''Return the events as a json str, and if passed
+        a location, also save them there.'''
+
+        as_json = json.dumps({'events': self.events}, default=str)
+
+        if loc is not None:
+            with open(loc, 'w') as f:
+                f.write(as_json)
+
+        return as_json
+
+    def to_chrome_trace(self, loc=None):
+        '''Return the events in the Chrome trace event format,
+        as a dict, and if passed a location, also save them there as json.
+        The saved file can be opened with chrome://tracing or
+        https://ui.perfetto.dev, where each fold is shown as its own row.
+        '''
+
+        trace_events = []
+        for event in self.events:
+
+            tid = event['fold']
+            if not isinstance(tid, (int, np.integer)):
+                tid = -1
+
+            args = {key: event[key] for key in
+                    ['fold', 'cpu_time', 'peak_rss_mb',
+                     'peak_rss_increase_mb', 'shape']}
+
+            trace_events.append({'name': event['name'],
+                                 'cat': event['name'].split('.')[0],
+                                 'ph': 'X',
+                                 'ts': event['start'] * 1e6,
+                                 'dur': event['wall_time'] * 1e6,
+                                 'pid': event['pid'],
+                                 'tid': int(tid),
+                                 'args': args})
+
+        chrome_trace = {'traceEvents': trace_events,
+                        'displayTimeUnit': 'ms'}
+
+        if loc is not None:
+            with open(loc, 'w') as f:
+                json.dump(chrome_trace, f, default=str)
+
+        return chrome_trace
+
+    def save(self, loc):
+        '''Save the trace as json, in the Chrome trace format.'''
+
+        self.to_chrome_trace(loc)
+
+
+def set_trace(trace, fold=None):
+    '''Set the trace, or None to turn tracing off, which all traced steps
+    within this thread record to, tagged with the passed fold.'''
+
+    _ACTIVE.trace = trace
+    _ACTIVE.fold = fold
+    _ACTIVE.depth = 0
+    _ACTIVE.objs = ()
+
+
+def get_trace():
+    return _ACTIVE.trace
+
+
+@contextmanager
+def fold_trace(on, fold):
+    '''Record to a new trace for just this fold, if on, yielding
+    the trace, or None if not on.'''
+
+    if not on:
+        yield None
+        return
+
+    trace = Trace()
+    set_trace(trace, fold)
+
+    try:
+        yield trace
+    finally:
+        set_trace(None)
+
+
+@contextmanager
+def paused_trace():
+    '''Turn off tracing within this context, e.g., for the
+    many candidate fits within a parameter search.'''
+
+    trace = _ACTIVE.trace
+    _ACTIVE.trace = None
+
+    try:
+        yield
+    finally:
+        _ACTIVE.trace = trace
+
+
+def start_step(name, shape=None):
+    '''Start recording a step to the active trace, returning the event,
+    or None if not tracing. Must be followed by a call to end_step.'''
+
+    if _ACTIVE.trace is None:
+        return None
+
+    event = {'name': name, 'fold': _ACTIVE.fold, 'shape': shape,
+             'depth': _ACTIVE.depth, 'pid': os.getpid()}
+    _ACTIVE.depth += 1
+
+    event['peak_rss_mb'] = get_peak_rss_mb()
+    event['start'] = time.time()
+    event['wall_time'] = time.perf_counter()
+    event['cpu_time'] = time.process_time()
+
+    return event
+
+
+def end_step(event, shape=None):
+    '''Finish recording an event from start_step, if any, to the
+    active trace.'''
+
+    if event is None or _ACTIVE.trace is None:
+        return
+
+    event['wall_time'] = time.perf_counter() - event['wall_time']
+    event['cpu_time'] = time.process_time() - event['cpu_time']
+
+    if shape is not None:
+        event['shape'] = shape
+
+    peak_rss = event['peak_rss_mb']
+    event['peak_rss_mb'] = get_peak_rss_mb()
+    event['peak_rss_increase_mb'] = None
+    if peak_rss is not None:
+        event['peak_rss_increase_mb'] = event['peak_rss_mb'] - peak_rss
+
+    _ACTIVE.depth -= 1
+    _ACTIVE.trace.add(event)
+
+
+@contextmanager
+def trace_step(name, shape=None):
+    '''Record a step to the active trace, if any. Yields the event dict,
+    (or None if not tracing) such that the shape can be set
+    once known.'''
+
+    event = start_step(name, shape=shape)
+
+    try:
+        yield event
+    finally:
+        end_step(event)
+
+
+def traced(func):
+    '''Decorator for a fit or transform like method, recording to
+    the active trace, if any, as the class name and method name, with
+    the shape of the output, or if none, of the input X. Only the outer
+    most traced method of each object is recorded, e.g., just fit
+    when fit calls fit_transform, such that no time is counted twice.'''
+
+    @wraps(func)
+    def traced_func(self, *args, **kwargs):
+
+        # Skip when not tracing, or already within a traced
+        # method of this object
+        if _ACTIVE.trace is None or id(self) in _ACTIVE.objs:
+            return func(self, *args, **kwargs)
+
+        objs = _ACTIVE.objs
+        _ACTIVE.objs = objs + (id(self),)
+
+        name = type(self).__name__ + '.' + func.__name__
+        try:
+            with trace_step(name) as event:
+                output = func(self, *args, **kwargs)
+
+                shape = get_shape(output)
+                if shape is None:
+                    X = args[0] if len(args) > 0 else kwargs.get('X', None)
+                    shape = get_shape(X)
+                event['shape'] = shape
+
+        finally:
+            _ACTIVE.objs = objs
+
+        return output
+
+    return traced_func
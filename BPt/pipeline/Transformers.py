@@ -12,6 +12,7 @@ from sklearn.decomposition import (PCA, FactorAnalysis,
 import warnings
 from sklearn.utils.validation import check_memory
 from sklearn.base import clone
+from .Trace import traced
 
 
 def _fit_transform_single_transformer(transformer, X, y):
@@ -47,6 +48,7 @@ class Transformer_Wrapper(BaseEstimator, TransformerMixin):
 
         return
 
+    @traced
     def fit(self, X, y=None, mapping=None, **fit_params):
 
         if mapping is None:
@@ -56,6 +58,7 @@ class Transformer_Wrapper(BaseEstimator, TransformerMixin):
         self.fit_transform(X, y, mapping=mapping, **fit_params)
         return self
 
+    @traced
     def fit_transform(self, X, y=None, mapping=None, **fit_params):
 
         if mapping is None:
@@ -104,6 +107,7 @@ class Transformer_Wrapper(BaseEstimator, TransformerMixin):
         update_mapping(mapping, new_mapping)
         return np.hstack([X_trans, X[:, self.rest_inds_]])
 
+    @traced
     def transform(self, X):
 
         # Transform just wrapper inds
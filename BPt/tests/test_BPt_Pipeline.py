@@ -0,0 +1,104 @@
+from unittest import TestCase
+from BPt.pipeline.BPt_Pipeline import BPt_Pipeline
+import BPt.pipeline.BPt_Pipeline as BPt_Pipeline_Module
+
+import numpy as np
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.linear_model import Ridge
+
+
+class Counting_Scaler(BaseEstimator, TransformerMixin):
+
+    n_fits = 0
+
+    def __init__(self, scale=1):
+        self.scale = scale
+
+    def fit(self, X, y=None):
+
+        Counting_Scaler.n_fits += 1
+        self.mean_ = np.mean(X, axis=0)
+        return self
+
+    def transform(self, X):
+        return (X - self.mean_) * self.scale
+
+
+def get_pipeline(scale=1, alpha=1):
+    return BPt_Pipeline([('scaler', Counting_Scaler(scale=scale)),
+                         ('model', Ridge(alpha=alpha))])
+
+
+class Test_Prefix_Memo(TestCase):
+
+    def setUp(self):
+
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(50, 4)
+        self.y = rng.randn(50)
+        Counting_Scaler.n_fits = 0
+
+    def tearDown(self):
+        BPt_Pipeline_Module.clear_prefix_memo()
+
+    def fit(self, memo_key='fold', max_size=4, **params):
+
+        pipeline = get_pipeline(**params)
+        if memo_key is not None:
+            pipeline.set_prefix_memo(memo_key, max_size)
+
+        return pipeline.fit(self.X, self.y)
+
+    def test_memo_same_as_fit(self):
+
+        base = self.fit(memo_key=None, alpha=2)
+        self.fit()
+        memo = self.fit(alpha=2)
+
+        # The scaler should only be fit the first time
+        self.assertEqual(Counting_Scaler.n_fits, 2)
+        self.assertTrue(np.allclose(memo.predict(self.X),
+                                    base.predict(self.X)))
+
+    def test_memo_key_params(self):
+
+        self.fit()
+        self.fit(scale=2)
+        self.fit(memo_key='other_fold')
+        self.assertEqual(Counting_Scaler.n_fits, 3)
+
+    def test_memo_only_next_fit(self):
+
+        pipeline = get_pipeline()
+        pipeline.set_prefix_memo('fold', 4)
+        pipeline.fit(self.X, self.y)
+        pipeline.fit(self.X, self.y)
+
+        self.assertEqual(Counting_Scaler.n_fits, 2)
+        self.assertEqual(len(BPt_Pipeline_Module._PREFIX_MEMO), 1)
+
+    def test_memo_max_size(self):
+
+        for scale in range(4):
+            self.fit(scale=scale, max_size=2)
+        self.assertEqual(len(BPt_Pipeline_Module._PREFIX_MEMO), 2)
+
+        # Most recent should be kept, the oldest evicted
+        self.fit(scale=3, max_size=2)
+        self.assertEqual(Counting_Scaler.n_fits, 4)
+        self.fit(scale=0, max_size=2)
+        self.assertEqual(Counting_Scaler.n_fits, 5)
+
+        # Size 0 shouldn't memo
+        BPt_Pipeline_Module.clear_prefix_memo()
+        self.fit(max_size=0)
+        self.assertEqual(len(BPt_Pipeline_Module._PREFIX_MEMO), 0)
+
+    def test_clear_prefix_memo(self):
+
+        self.fit()
+        BPt_Pipeline_Module.clear_prefix_memo()
+        self.assertEqual(len(BPt_Pipeline_Module._PREFIX_MEMO), 0)
+
+        self.fit()
+        self.assertEqual(Counting_Scaler.n_fits, 2)
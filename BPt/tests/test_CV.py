@@ -0,0 +1,368 @@
+from unittest import TestCase
+from BPt import BPt_ML
+from BPt.helpers.CV import CV, CV_Splits, clear_splits_store
+import BPt.helpers.CV as CV_module
+
+import os
+import shutil
+import tempfile
+
+import pickle as pkl
+import sklearn.model_selection as MS
+import numpy as np
+import pandas as pd
+
+
+class Old_CV(CV):
+    '''Reference, computing each split directly as a list of subject
+    names, then converting to positional index, as CV did before.'''
+
+    def train_test_split(self, subjects, test_size=.2, random_state=None,
+                         return_index=False):
+
+        original_subjects, subjects, train_only = self.get_train_only(subjects)
+
+        if self.groups is not None:
+            splitter = MS.GroupShuffleSplit(n_splits=1, test_size=test_size,
+                                            random_state=random_state)
+            inds = splitter.split(subjects, groups=self.groups.loc[subjects])
+
+        elif self.stratify is not None:
+            splitter = MS.StratifiedShuffleSplit(n_splits=1,
+                                                 test_size=test_size,
+                                                 random_state=random_state)
+            inds = splitter.split(subjects, y=self.stratify.loc[subjects])
+
+        else:
+            splitter = MS.ShuffleSplit(n_splits=1, test_size=test_size,
+                                       random_state=random_state)
+            inds = splitter.split(subjects)
+
+        train, test = list(inds)[0]
+        split = (np.concatenate([subjects[train], train_only]),
+                 subjects[test])
+
+        return self.to_index(original_subjects, [split], return_index)[0]
+
+    def k_fold(self, subjects, n_splits, random_state=None,
+               return_index=False):
+
+        original_subjects, subjects, train_only = self.get_train_only(subjects)
+
+        if self.groups is not None:
+            groups = self.groups.loc[subjects]
+            unique_groups = np.unique(groups)
+
+            splitter = MS.KFold(n_splits=n_splits, shuffle=True,
+                                random_state=random_state)
+            splits = [(np.concatenate([groups.index[groups.isin(
+                       unique_groups[train])], train_only]),
+                       groups.index[groups.isin(unique_groups[test])])
+                      for train, test in splitter.split(unique_groups)]
+
+            return self.to_index(original_subjects, splits, return_index)
+
+        if self.stratify is not None:
+            splitter = MS.StratifiedKFold(n_splits=n_splits, shuffle=True,
+                                          random_state=random_state)
+            inds = splitter.split(subjects, y=self.stratify.loc[subjects])
+
+        else:
+            splitter = MS.KFold(n_splits=n_splits, shuffle=True,
+                                random_state=random_state)
+            inds = splitter.split(subjects)
+
+        splits = [(np.concatenate([subjects[train], train_only]),
+                   subjects[test]) for train, test in inds]
+
+        return self.to_index(original_subjects, splits, return_index)
+
+    def leave_one_group_out(self, subjects, groups_series,
+                            return_index=False):
+
+        original_subjects, subjects, train_only =\
+            self.get_train_only(subjects, ignore_by_group=True)
+
+        logo = MS.LeaveOneGroupOut()
+        splits = [(np.concatenate([subjects[train], train_only]),
+                   subjects[test]) for train, test in
+                  logo.split(subjects, groups=groups_series.loc[subjects])]
+
+        return self.to_index(original_subjects, splits, return_index)
+
+    def to_index(self, original_subjects, splits, return_index):
+
+        if not return_index:
+            return splits
+
+        return [tuple(np.array([original_subjects.get_loc(name)
+                                for name in s], dtype='int64')
+                      for s in split) for split in splits]
+
+    def get_cv(self, train_data_index, splits, n_repeats,
+               splits_vals=None, random_state=None, return_index=False):
+
+        subject_splits = []
+        for n in range(n_repeats):
+
+            if splits_vals is not None:
+                subject_splits += self.leave_one_group_out(
+                    train_data_index, splits_vals, return_index)
+                continue
+
+            if random_state is not None:
+                random_state += 1
+
+            if isinstance(splits, int):
+                subject_splits += self.k_fold(train_data_index, splits,
+                                              random_state, return_index)
+            else:
+                subject_splits.append(self.train_test_split(
+                    train_data_index, splits, random_state, return_index))
+
+        return subject_splits
+
+
+def get_cv_params(subjects):
+
+    rng = np.random.RandomState(0)
+    groups = pd.Series(rng.randint(0, 8, len(subjects)), index=subjects)
+    stratify = pd.Series(rng.randint(0, 2, len(subjects)), index=subjects)
+    train_only = np.array(subjects[[0, 5, 9]])
+
+    return [{}, {'groups': groups}, {'stratify': stratify},
+            {'train_only': train_only},
+            {'groups': groups, 'train_only': train_only},
+            {'stratify': stratify, 'train_only': train_only}]
+
+
+class Test_CV(TestCase):
+
+    def setUp(self):
+
+        self.subjects = pd.Index(['s' + str(i) for i in range(40)])
+        self.splits_vals = pd.Series(np.arange(40) % 5,
+                                     index=self.subjects)
+        clear_splits_store()
+
+    def tearDown(self):
+        clear_splits_store()
+
+    def assertSplitsEqual(self, splits, base_splits):
+
+        self.assertEqual(len(splits), len(base_splits))
+        for split, base_split in zip(splits, base_splits):
+            for s, base_s in zip(split, base_split):
+                self.assertEqual(list(s), list(base_s))
+
+    def test_index_same_as_names(self):
+
+        cv = CV(train_only=np.array(['s0', 's1']))
+        subject_splits, index_splits =\
+            cv.get_cv(self.subjects, 4, 2, random_state=1,
+                      return_index='both')
+
+        # By get_loc per subject, as used before
+        for names, inds in zip(subject_splits, index_splits):
+            for s, i in zip(names, inds):
+                self.assertEqual([self.subjects.get_loc(name) for name in s],
+                                 list(i))
+
+    def test_same_as_old(self):
+
+        for params in get_cv_params(self.subjects):
+            cv, old_cv = CV(**params), Old_CV(**params)
+
+            for splits, n_repeats in [(3, 1), (4, 2), (.25, 1), (.25, 3)]:
+                for return_index in [False, True]:
+                    self.assertSplitsEqual(
+                        cv.get_cv(self.subjects, splits, n_repeats,
+                                  random_state=2, return_index=return_index),
+                        old_cv.get_cv(self.subjects, splits, n_repeats,
+                                      random_state=2,
+                                      return_index=return_index))
+
+            for return_index in [False, True]:
+                self.assertSplitsEqual(
+                    cv.get_cv(self.subjects, None, 2,
+                              splits_vals=self.splits_vals,
+                              return_index=return_index),
+                    old_cv.get_cv(self.subjects, None, 2,
+                                  splits_vals=self.splits_vals,
+                                  return_index=return_index))
+
+    def test_single_split_same_as_old(self):
+
+        for params in get_cv_params(self.subjects):
+            cv, old_cv = CV(**params), Old_CV(**params)
+
+            self.assertSplitsEqual(
+                cv.k_fold(self.subjects, 3, random_state=2),
+                old_cv.k_fold(self.subjects, 3, random_state=2))
+            self.assertSplitsEqual(
+                [cv.train_test_split(self.subjects, .25, random_state=2,
+                                     return_index=True)],
+                [old_cv.train_test_split(self.subjects, .25, random_state=2,
+                                         return_index=True)])
+
+    def test_splits_view(self):
+
+        cv = CV(train_only=np.array(['s0', 's1']))
+        splits = cv.get_splits(self.subjects, 4, 2, random_state=1)
+
+        self.assertTrue(isinstance(splits, CV_Splits))
+        self.assertEqual(len(splits), 8)
+        self.assertEqual(splits.assignments.shape, (2, 40))
+        self.assertEqual(splits.assignments.dtype, np.int32)
+
+        # Train only subjects are never in a test fold
+        self.assertTrue((splits.assignments[:, :2] == -1).all())
+
+        view = splits.view(return_index=True)
+        self.assertEqual(len(view), 8)
+        self.assertSplitsEqual([view[-1]], [view[7]])
+        self.assertSplitsEqual([view[3]], [splits.get_split(3, True)])
+        with self.assertRaises(IndexError):
+            view[8]
+
+        # Each repeat, each subject tested exactly once
+        for repeat in range(2):
+            tested = np.concatenate([view[repeat * 4 + fold][1]
+                                     for fold in range(4)])
+            self.assertEqual(sorted(tested), list(range(2, 40)))
+
+        # Should pickle as just the compact splits
+        self.assertSplitsEqual(list(pkl.loads(pkl.dumps(view))), list(view))
+
+
+class Test_Splits_Store(TestCase):
+
+    def setUp(self):
+
+        self.subjects = pd.Index(['s' + str(i) for i in range(40)])
+        self.temp_dr = tempfile.mkdtemp()
+        clear_splits_store()
+
+    def tearDown(self):
+
+        clear_splits_store()
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def test_store_hit(self):
+
+        splits = CV().get_splits(self.subjects, 4, 2, random_state=1)
+        self.assertEqual(len(CV_module._SPLITS_STORE), 1)
+
+        # The same splits, from a new CV object, should be stored
+        self.assertTrue(CV().get_splits(self.subjects, 4, 2,
+                                        random_state=1) is splits)
+        self.assertEqual(len(CV_module._SPLITS_STORE), 1)
+
+        # Leave one group out is always reproducible
+        splits_vals = pd.Series(np.arange(40) % 5, index=self.subjects)
+        splits = CV().get_splits(self.subjects, None, 1,
+                                 splits_vals=splits_vals)
+        self.assertTrue(CV().get_splits(self.subjects, None, 1,
+                                        splits_vals=splits_vals) is splits)
+
+    def test_store_miss(self):
+
+        base = CV().get_splits(self.subjects, 4, 2, random_state=1)
+
+        # Anything changing the splits should be a different key
+        groups = pd.Series(np.arange(40) % 8, index=self.subjects)
+        for cv, subjects, splits, n_repeats, random_state in [
+          (CV(), self.subjects[1:], 4, 2, 1),
+          (CV(groups=groups), self.subjects, 4, 2, 1),
+          (CV(train_only=np.array(['s0'])), self.subjects, 4, 2, 1),
+          (CV(), self.subjects, 3, 2, 1),
+          (CV(), self.subjects, 4, 1, 1),
+          (CV(), self.subjects, 4, 2, 2)]:
+
+            self.assertFalse(cv.get_splits(subjects, splits, n_repeats,
+                                           random_state=random_state)
+                             is base)
+
+        self.assertEqual(len(CV_module._SPLITS_STORE), 7)
+
+        # Same when called through the single split methods,
+        # which don't increment the random state, so the first repeat
+        self.assertSplitsEqual(CV().k_fold(self.subjects, 4, random_state=2),
+                               list(base.view())[:4])
+        self.assertEqual(len(CV_module._SPLITS_STORE), 8)
+
+    def test_random_not_stored(self):
+
+        first = CV().get_splits(self.subjects, 4, 2)
+        second = CV().get_splits(self.subjects, 4, 2)
+        self.assertEqual(len(CV_module._SPLITS_STORE), 0)
+
+        # Should still be random each call
+        self.assertFalse(np.array_equal(first.assignments,
+                                        second.assignments))
+
+        CV().get_splits(self.subjects, 4, 2, random_state=1,
+                        use_store=False)
+        self.assertEqual(len(CV_module._SPLITS_STORE), 0)
+
+    def test_store_max_size(self):
+
+        max_size = CV_module.SPLITS_STORE_MAX_SIZE
+        try:
+            CV_module.SPLITS_STORE_MAX_SIZE = 3
+
+            splits = [CV().get_splits(self.subjects, 4, 1, random_state=rs)
+                      for rs in range(4)]
+            self.assertEqual(len(CV_module._SPLITS_STORE), 3)
+            self.assertFalse(any([s is splits[0] for s in
+                                  CV_module._SPLITS_STORE.values()]))
+
+            # Access should mark as most recently used
+            CV().get_splits(self.subjects, 4, 1, random_state=1)
+            CV().get_splits(self.subjects, 4, 1, random_state=4)
+            self.assertEqual(list(CV_module._SPLITS_STORE.values())[:2],
+                             [splits[3], splits[1]])
+
+            # Loaded splits also count towards the max
+            loc = os.path.join(self.temp_dr, 'splits.pkl')
+            CV_module.save_splits_store(loc)
+            CV_module.SPLITS_STORE_MAX_SIZE = 2
+            CV_module.load_splits_store(loc)
+            self.assertEqual(len(CV_module._SPLITS_STORE), 2)
+
+        finally:
+            CV_module.SPLITS_STORE_MAX_SIZE = max_size
+
+    def test_save_load_clear(self):
+
+        loc = os.path.join(self.temp_dr, 'splits.pkl')
+        base = CV().get_splits(self.subjects, 4, 2, random_state=1)
+
+        ML = BPt_ML(log_dr=None, verbose=False, notebook=False)
+        ML.Save_CV_Splits(loc)
+
+        ML.Clear_CV_Splits()
+        self.assertEqual(len(CV_module._SPLITS_STORE), 0)
+
+        ML.Load_CV_Splits(loc)
+        splits = CV().get_splits(self.subjects, 4, 2, random_state=1)
+        self.assertEqual(len(CV_module._SPLITS_STORE), 1)
+        self.assertTrue(np.array_equal(splits.assignments, base.assignments))
+        self.assertTrue(np.array_equal(splits.orders, base.orders))
+
+    def test_load_wrong_version(self):
+
+        loc = os.path.join(self.temp_dr, 'splits.pkl')
+        with open(loc, 'wb') as f:
+            pkl.dump({'version': CV_module.SPLITS_STORE_VERSION + 1,
+                      'splits': {}}, f)
+
+        with self.assertRaises(RuntimeError):
+            CV_module.load_splits_store(loc)
+
+    def assertSplitsEqual(self, splits, base_splits):
+
+        self.assertEqual(len(splits), len(base_splits))
+        for split, base_split in zip(splits, base_splits):
+            for s, base_s in zip(split, base_split):
+                self.assertEqual(list(s), list(base_s))
@@ -0,0 +1,243 @@
+from unittest import TestCase
+from BPt.helpers.Data_File import (Data_File, prefetch_load, mp_load,
+                                   load_data_file_proxies,
+                                   clear_proxy_store)
+import BPt.helpers.Data_File as Data_File_module
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+
+
+class Counting_Load():
+
+    def __init__(self, fail_on=None):
+
+        self.calls = 0
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def __call__(self, loc):
+
+        with self.lock:
+            self.calls += 1
+
+        if self.fail_on is not None and loc.endswith(self.fail_on):
+            raise IOError('Failed load')
+
+        return np.load(loc)
+
+
+class Test_Data_File(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        self.locs = []
+        for i in range(10):
+            loc = os.path.join(self.temp_dr, str(i) + '.npy')
+            np.save(loc, np.random.random(5) + i)
+            self.locs.append(loc)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def get_data_files(self, load=np.load):
+        return [Data_File(loc, load) for loc in self.locs]
+
+    def test_prefetch_load_order(self):
+
+        base = [np.load(loc) for loc in self.locs]
+        for prefetch, prefetch_n_jobs in [(0, 1), (1, 1), (3, 1), (3, 2),
+                                          (20, 4)]:
+
+            loaded = list(prefetch_load(self.get_data_files(),
+                                        prefetch=prefetch,
+                                        prefetch_n_jobs=prefetch_n_jobs))
+
+            self.assertEqual(len(loaded), len(base))
+            for data, base_data in zip(loaded, base):
+                self.assertTrue(np.array_equal(data, base_data))
+
+    def test_prefetch_read_ahead(self):
+
+        load = Counting_Load()
+        loaded = prefetch_load(self.get_data_files(load), prefetch=3,
+                               prefetch_n_jobs=2)
+
+        # Should read at most prefetch ahead of the current file
+        next(loaded)
+        time.sleep(.1)
+        self.assertEqual(load.calls, 4)
+
+        list(loaded)
+        self.assertEqual(load.calls, len(self.locs))
+
+    def test_prefetch_error(self):
+
+        load = Counting_Load(fail_on='5.npy')
+        loaded = prefetch_load(self.get_data_files(load), prefetch=2,
+                               prefetch_n_jobs=2)
+
+        for _ in range(5):
+            next(loaded)
+
+        with self.assertRaises(IOError):
+            next(loaded)
+
+    def test_mp_load(self):
+
+        reduce_funcs = [np.mean, np.max]
+        base = mp_load(self.get_data_files(), reduce_funcs)
+
+        self.assertEqual(base.shape, (len(self.locs), 2))
+        self.assertTrue(np.allclose(base[:, 0],
+                                    [np.mean(np.load(loc))
+                                     for loc in self.locs]))
+
+        prefetched = mp_load(self.get_data_files(), reduce_funcs,
+                             prefetch=3, prefetch_n_jobs=2)
+        self.assertTrue(np.array_equal(base, prefetched))
+
+
+class Test_Data_File_Proxies(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        self.load = Counting_Load()
+
+        self.file_mapping = {}
+        for i in range(8):
+            loc = os.path.join(self.temp_dr, str(i) + '.npy')
+            np.save(loc, np.random.random(5) + i)
+            self.file_mapping[i] = Data_File(loc, self.load)
+
+        # Two data file columns, sharing some files
+        rng = np.random.RandomState(0)
+        self.data = pd.DataFrame({'file1': rng.randint(0, 8, 12),
+                                  'file2': rng.randint(0, 8, 12),
+                                  'feat': rng.random(12)},
+                                 index=['s' + str(i) for i in range(12)])
+        self.reduce_funcs = [np.mean, np.max]
+
+        clear_proxy_store()
+
+    def tearDown(self):
+
+        clear_proxy_store()
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def get_proxies(self, reduce_funcs=None, **params):
+
+        if reduce_funcs is None:
+            reduce_funcs = self.reduce_funcs
+
+        return load_data_file_proxies(self.data, reduce_funcs,
+                                      ['file1', 'file2'], self.file_mapping,
+                                      **params)
+
+    def test_same_as_per_subject(self):
+
+        # Such that they can be sent to other processes
+        self.file_mapping = {key: Data_File(data_file.loc, np.load)
+                             for key, data_file in self.file_mapping.items()}
+
+        # Reference, loading and reducing each subject's file by itself
+        base = [self.data[['file1', 'file2']].applymap(
+            lambda key: func(np.load(self.file_mapping[key].loc)))
+            for func in self.reduce_funcs]
+
+        for params in [{}, {'n_jobs': 2}, {'prefetch': 2}]:
+            clear_proxy_store()
+            proxies = self.get_proxies(**params)
+
+            self.assertEqual(len(proxies), len(base))
+            for proxy, base_proxy in zip(proxies, base):
+                pd.testing.assert_frame_equal(proxy, base_proxy)
+
+    def test_each_file_loaded_once(self):
+
+        self.get_proxies()
+        n_files = len(np.unique(self.data[['file1', 'file2']]))
+        self.assertEqual(self.load.calls, n_files)
+
+    def test_store(self):
+
+        base = self.get_proxies()
+
+        # Should be stored, so not loaded again
+        self.load.calls = 0
+        proxies = self.get_proxies()
+        self.assertEqual(self.load.calls, 0)
+        for proxy, base_proxy in zip(proxies, base):
+            pd.testing.assert_frame_equal(proxy, base_proxy)
+
+        # Unless not using the store, or cleared
+        self.get_proxies(use_store=False)
+        self.assertTrue(self.load.calls > 0)
+
+        self.load.calls = 0
+        clear_proxy_store()
+        self.get_proxies()
+        self.assertTrue(self.load.calls > 0)
+
+    def test_store_by_func(self):
+
+        self.get_proxies(reduce_funcs=[lambda x: np.mean(x)])
+
+        # A different func, even w/ the same name, shouldn't be shared
+        self.load.calls = 0
+        proxy = self.get_proxies(reduce_funcs=[lambda x: np.min(x)])[0]
+        self.assertTrue(self.load.calls > 0)
+
+        self.assertEqual(proxy.loc['s0', 'file1'],
+                         np.min(self.file_mapping[
+                             self.data.loc['s0', 'file1']].load()))
+
+    def test_store_file_changed(self):
+
+        self.get_proxies()
+
+        # Rewrite a file in place, w/ a different modification time
+        data_file = self.file_mapping[self.data.loc['s0', 'file1']]
+        np.save(data_file.loc, np.random.random(5) + 100)
+        stat = os.stat(data_file.loc)
+        os.utime(data_file.loc, ns=(stat.st_atime_ns,
+                                    stat.st_mtime_ns + 10 ** 9))
+
+        # Only the changed file should be loaded again
+        self.load.calls = 0
+        proxy = self.get_proxies()[0]
+        self.assertEqual(self.load.calls, 1)
+        self.assertEqual(proxy.loc['s0', 'file1'],
+                         np.mean(np.load(data_file.loc)))
+
+    def test_store_max_size(self):
+
+        max_size = Data_File_module.PROXY_STORE_MAX_SIZE
+        try:
+            Data_File_module.PROXY_STORE_MAX_SIZE = 4
+
+            # Each file stores a value per reduce func
+            self.data = self.data.iloc[:1].assign(file1=0, file2=1)
+            self.get_proxies()
+            self.assertEqual(len(Data_File_module._PROXY_STORE), 4)
+            first_keys = list(Data_File_module._PROXY_STORE)
+
+            # File 1 is re-used, so file 0 is the least recently used
+            self.data = self.data.assign(file1=2)
+            self.get_proxies()
+
+            keys = list(Data_File_module._PROXY_STORE)
+            self.assertEqual(len(keys), 4)
+            self.assertEqual(keys[:2], first_keys[2:])
+            self.assertTrue(all([key[0] == self.file_mapping[2].loc
+                                 for key in keys[2:]]))
+
+        finally:
+            Data_File_module.PROXY_STORE_MAX_SIZE = max_size
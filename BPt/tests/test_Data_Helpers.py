@@ -0,0 +1,212 @@
+from unittest import TestCase
+from BPt.helpers.Data_Helpers import (drop_duplicate_cols,
+                                      _get_duplicate_cols_mask,
+                                      _get_keep_cols_mask,
+                                      filter_data_cols,
+                                      get_nan_quantiles)
+import BPt.helpers.Data_Helpers as Data_Helpers
+
+import numpy as np
+import numpy.ma as ma
+import pandas as pd
+
+
+def _print(*args, **kwargs):
+    pass
+
+
+def old_drop_duplicate_cols(data, corr_thresh):
+    '''Reference, comparing each pair of columns one at a time,
+    as done before.'''
+
+    for col1 in data:
+        for col2 in data:
+            if col1 != col2 and col1 in list(data) and col2 in list(data):
+
+                A, B = data[col1], data[col2]
+                a, b = ma.masked_invalid(A), ma.masked_invalid(B)
+                overlap = (~a.mask & ~b.mask)
+
+                if corr_thresh == 1:
+                    A_o, B_o = np.array(A[overlap]), np.array(B[overlap])
+                    if (A_o == B_o).all():
+                        data = data.drop(col2, axis=1)
+
+                else:
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        corr = np.corrcoef(A[overlap], B[overlap])[0][1]
+                    if corr >= corr_thresh:
+                        data = data.drop(col2, axis=1)
+
+    return data
+
+
+def get_fake_data(n=50, nan=False, seed=0):
+
+    rng = np.random.RandomState(seed)
+    base = rng.randn(n, 6)
+
+    cols = [base[:, 0], base[:, 1],
+            base[:, 0].copy(),
+            base[:, 1] * 3 + 2,
+            base[:, 2],
+            base[:, 2] + rng.randn(n) * .05,
+            np.zeros(n), -np.zeros(n),
+            base[:, 3], base[:, 4],
+            base[:, 3] + rng.randn(n) * .5,
+            base[:, 5], base[:, 5].copy()]
+    values = np.stack(cols, axis=1)
+
+    # NaN in different rows, which should be ignored when comparing
+    if nan:
+        values[rng.random(values.shape) < .1] = np.nan
+
+    return pd.DataFrame(values, columns=['c' + str(i)
+                                         for i in range(values.shape[1])])
+
+
+class Test_Drop_Duplicate_Cols(TestCase):
+
+    def check_same_as_old(self, data, corr_thresh):
+
+        base = old_drop_duplicate_cols(data, corr_thresh)
+        dropped = drop_duplicate_cols(data, corr_thresh, _print=_print)
+        self.assertEqual(list(dropped), list(base))
+
+        # Also in small blocks
+        values = data.to_numpy(dtype='float', copy=True)
+        if corr_thresh != 1:
+            keep = _get_duplicate_cols_mask(values, corr_thresh,
+                                            block_size=3)
+            self.assertEqual(list(data.columns[keep]), list(base))
+
+        return list(base)
+
+    def test_same_as_old(self):
+
+        for nan in [False, True]:
+            data = get_fake_data(nan=nan)
+            for corr_thresh in [1, .99, .9, .5]:
+                self.check_same_as_old(data, corr_thresh)
+
+        # Over a few blocks
+        data = pd.concat([get_fake_data(nan=True, seed=seed)
+                          for seed in range(3)], axis=1)
+        data.columns = ['c' + str(i) for i in range(data.shape[1])]
+        for corr_thresh in [1, .9]:
+            self.check_same_as_old(data, corr_thresh)
+
+    def test_exact(self):
+
+        kept = self.check_same_as_old(get_fake_data(), 1)
+        self.assertEqual(kept, ['c0', 'c1', 'c3', 'c4', 'c5', 'c6', 'c8',
+                                'c9', 'c10', 'c11'])
+
+        # Constant columns have no correlation
+        kept = self.check_same_as_old(get_fake_data(), .99)
+        self.assertEqual(kept, ['c0', 'c1', 'c4', 'c6', 'c7', 'c8', 'c9',
+                                'c10', 'c11'])
+
+    def test_exact_nan(self):
+
+        values = np.array([[1, 1, np.nan, 2],
+                           [2, np.nan, 2, 2],
+                           [np.nan, 3, 3, 3],
+                           [4, 4, 4, 4]], dtype=float)
+
+        keep = _get_keep_cols_mask(values.copy(), 1)
+        self.assertEqual(list(keep), [True, False, False, True])
+
+        keep = _get_duplicate_cols_mask(values.copy(), 1, block_size=1)
+        self.assertEqual(list(keep), [True, False, False, True])
+
+    def test_off(self):
+
+        data = get_fake_data()
+        for corr_thresh in [None, False]:
+            self.assertTrue(drop_duplicate_cols(data, corr_thresh,
+                                                _print=_print).equals(data))
+
+
+def get_outlier_data(n=100, p=5, seed=0):
+
+    rng = np.random.RandomState(seed)
+    values = rng.randn(n, p)
+    values[rng.random(values.shape) < .1] = np.nan
+
+    return pd.DataFrame(values, columns=['c' + str(i) for i in range(p)])
+
+
+class Test_Filter_Data_Cols(TestCase):
+
+    def filter(self, data, drop_or_na='na', **params):
+
+        params.setdefault('filter_outlier_percent', None)
+        params.setdefault('filter_outlier_std', None)
+
+        return filter_data_cols(data.copy(), drop_or_na=drop_or_na,
+                                _print=_print, **params)
+
+    def check_bounds(self, data, lower, upper):
+
+        outliers = (data < lower) | (data > upper)
+
+        # Either set to NaN, or those rows dropped
+        pd.testing.assert_frame_equal(self.filter(data, **self.params),
+                                      data.mask(outliers))
+        pd.testing.assert_frame_equal(
+            self.filter(data, drop_or_na='drop', **self.params),
+            data[~outliers.any(axis=1)])
+
+    def test_percent_bounds(self):
+
+        data = get_outlier_data()
+        self.params = {'filter_outlier_percent': 5}
+
+        # Both bounds are from the original values
+        self.check_bounds(data, data.quantile(.05), data.quantile(.95))
+
+        # Not, as before, w/ the upper bound computed
+        # after the lower outliers were set to NaN
+        lower = data.quantile(.05)
+        old_upper = data.mask(data < lower).quantile(.95)
+        self.assertFalse(np.allclose(old_upper, data.quantile(.95)))
+
+        self.params = {'filter_outlier_percent': (None, 10)}
+        self.check_bounds(data, -np.inf, data.quantile(.9))
+
+    def test_std_bounds(self):
+
+        data = get_outlier_data()
+        self.params = {'filter_outlier_std': (1, 2)}
+
+        mean, std = data.mean(), data.std()
+        self.check_bounds(data, mean - std, mean + 2 * std)
+
+    def test_chunks(self):
+
+        data = get_outlier_data(p=7)
+        base = self.filter(data, filter_outlier_percent=(1, 2))
+
+        chunk_size = Data_Helpers.FILTER_CHUNK_SIZE
+        try:
+            Data_Helpers.FILTER_CHUNK_SIZE = 3
+            pd.testing.assert_frame_equal(
+                self.filter(data, filter_outlier_percent=(1, 2)), base)
+
+        finally:
+            Data_Helpers.FILTER_CHUNK_SIZE = chunk_size
+
+    def test_nan_quantiles(self):
+
+        values = get_outlier_data(n=33).to_numpy()
+        values[:, 0] = np.nan
+        values[:5, 1] = np.nan
+
+        qs = [0, .01, .25, .5, .99, 1]
+        with np.errstate(invalid='ignore'):
+            with self.assertWarns(RuntimeWarning):
+                base = np.nanquantile(values, qs, axis=0)
+
+        self.assertTrue(np.allclose(get_nan_quantiles(values, qs), base,
+                                    equal_nan=True))
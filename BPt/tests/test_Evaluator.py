@@ -0,0 +1,213 @@
+from unittest import TestCase
+from BPt import (BPt_ML, Model_Pipeline, Model, Feat_Importance)
+from BPt.pipeline.Evaluator import Evaluator, Raw_Preds
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from types import SimpleNamespace
+
+
+def get_fake_ML(n=60, p=4, n_jobs=2):
+
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.randn(n, p),
+                      columns=['feat' + str(i) for i in range(p)])
+    df['src_subject_id'] = ['s' + str(i) for i in range(n)]
+
+    targets = pd.DataFrame({'src_subject_id': df['src_subject_id'],
+                            'target': df['feat0'] * 2 + rng.randn(n)})
+
+    ML = BPt_ML(log_dr=None, verbose=False, notebook=False, n_jobs=n_jobs)
+    ML.Load_Data(df=df)
+    ML.Load_Targets(df=targets, col_name='target', data_type='f')
+    ML.Train_Test_Split(test_size=.2, random_state=1)
+    ML.Set_Default_ML_Verbosity(progress_bar=False)
+
+    return ML
+
+
+class Test_Evaluator(TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(Test_Evaluator, self).__init__(*args, **kwargs)
+
+        self.ML = get_fake_ML()
+
+    def evaluate(self, return_raw_preds=True, **kwargs):
+
+        return self.ML.Evaluate(Model_Pipeline(model=Model('ridge')),
+                                splits=3, n_repeats=2,
+                                return_raw_preds=return_raw_preds,
+                                feat_importances=[Feat_Importance('base')],
+                                **kwargs)
+
+    def check_same_results(self, results, base):
+
+        self.assertTrue(np.allclose(results['raw_scores'],
+                                    base['raw_scores']))
+        self.assertTrue(results['raw_preds'].equals(base['raw_preds']))
+        self.assertTrue(results['FIs'][0].global_df.equals(
+            base['FIs'][0].global_df))
+
+    def test_parallel_folds_threading(self):
+
+        base = self.evaluate(fold_n_jobs=1)
+        results = self.evaluate(fold_n_jobs=2, fold_backend='threading')
+        self.check_same_results(results, base)
+
+    def test_parallel_folds_loky(self):
+
+        base = self.evaluate(fold_n_jobs=1)
+        results = self.evaluate(fold_n_jobs=2, fold_backend='loky')
+        self.check_same_results(results, base)
+
+    def test_fold_n_jobs(self):
+
+        # By default, ps should be passed on unchanged
+        ps = SimpleNamespace(n_jobs=-1)
+        self.assertEqual(self.ML._get_fold_n_jobs(ps, 1), (ps, 1))
+        self.assertEqual(ps.n_jobs, -1)
+
+        # Otherwise, the n_jobs split on a copy
+        ps = SimpleNamespace(n_jobs=4)
+        fold_ps, fold_n_jobs = self.ML._get_fold_n_jobs(ps, 2)
+        self.assertEqual((fold_ps.n_jobs, fold_n_jobs), (2, 2))
+        self.assertEqual(ps.n_jobs, 4)
+
+        fold_ps, fold_n_jobs = self.ML._get_fold_n_jobs(ps, -1)
+        self.assertEqual((fold_ps.n_jobs, fold_n_jobs), (1, 4))
+
+    def test_raw_preds_save(self):
+
+        temp_dr = tempfile.mkdtemp()
+        try:
+            loc = os.path.join(temp_dr, 'raw_preds.npz')
+            results = self.evaluate(return_raw_preds=loc)
+
+            loaded = Raw_Preds.load(loc)
+            pd.testing.assert_frame_equal(loaded, results['raw_preds'])
+
+        finally:
+            shutil.rmtree(temp_dr, ignore_errors=True)
+
+
+class Test_Raw_Preds(TestCase):
+
+    def setUp(self):
+
+        self.subjects = ['s' + str(i) for i in range(10)]
+        self.folds = [(['s3', 's1', 's8'], 0), (['s0', 's9', 's2'], 1)]
+
+    def get_raw_preds(self):
+
+        raw = Raw_Preds(self.subjects)
+        for subjects, fold in self.folds:
+            inds = raw.get_positions(subjects)
+            raw.set(inds, 'preds', np.arange(len(subjects)) + fold)
+            raw.set(inds, 'preds_fold', fold, dtype=object)
+
+        return raw
+
+    def test_same_as_loc(self):
+
+        # The label based writes, as used before
+        base = pd.DataFrame(index=self.subjects)
+        for subjects, fold in self.folds:
+            base.loc[subjects, 'preds'] = np.arange(len(subjects)) + fold
+            base.loc[subjects, 'preds_fold'] = fold
+
+        pd.testing.assert_frame_equal(self.get_raw_preds().to_df(), base,
+                                      check_dtype=False)
+
+    def test_missing_subjects(self):
+
+        with self.assertRaises(KeyError):
+            self.get_raw_preds().get_positions(['s1', 'nope'])
+
+    def test_save_load(self):
+
+        raw = self.get_raw_preds()
+        temp_dr = tempfile.mkdtemp()
+        try:
+            loc = os.path.join(temp_dr, 'raw_preds.npz')
+            raw.save(loc)
+
+            # The fold column is an object array
+            with self.assertRaises(ValueError):
+                np.load(loc)['col1']
+
+            pd.testing.assert_frame_equal(Raw_Preds.load(loc), raw.to_df())
+
+        finally:
+            shutil.rmtree(temp_dr, ignore_errors=True)
+
+
+def get_old_fold_data(data, final_subjects, target, train_subjects,
+                      test_subjects):
+    '''Reference, selecting each fold by subject label, as used before,
+    though sorted, rather than in hash order.'''
+
+    def overlap(subjects):
+        return sorted(set(subjects).intersection(final_subjects))
+
+    train_subjects = overlap(train_subjects)
+    train_targets = data.loc[train_subjects, target]
+    train_subjects = list(train_targets[~pd.isna(train_targets)].index)
+
+    all_test_subjects = overlap(test_subjects)
+    test_targets = data.loc[all_test_subjects, target]
+    test_subjects = list(test_targets[~pd.isna(test_targets)].index)
+
+    return (data.loc[train_subjects], data.loc[test_subjects],
+            all_test_subjects)
+
+
+class Test_Fold_Rows(TestCase):
+
+    def setUp(self):
+
+        rng = np.random.RandomState(0)
+        subjects = ['s' + str(i) for i in rng.permutation(30)]
+
+        self.data = pd.DataFrame(rng.randn(30, 3), index=subjects,
+                                 columns=['feat0', 'feat1', 'target'])
+        self.data.loc[['s2', 's11', 's20'], 'target'] = np.nan
+
+        self.final_subjects = set(subjects) - set(['s5', 's6'])
+
+        self.evaluator = Evaluator.__new__(Evaluator)
+        self.evaluator.all_keys = list(self.data)
+        self.evaluator.ps = SimpleNamespace(
+            target='target', _final_subjects=self.final_subjects)
+
+    def test_same_as_label_based(self):
+
+        data = self.evaluator._get_eval_data(self.data)
+        rng = np.random.RandomState(1)
+
+        for _ in range(5):
+            subjects = rng.permutation(self.data.index)
+            train_subjects, test_subjects = subjects[:20], subjects[20:]
+
+            train_data, test_data, all_test_subjects =\
+                get_old_fold_data(self.data, self.final_subjects, 'target',
+                                  train_subjects, test_subjects)
+
+            train_rows, test_rows, all_test_rows =\
+                self.evaluator._get_fold_rows(data, train_subjects,
+                                              test_subjects)
+
+            self.assertEqual(list(data.index[all_test_rows]),
+                             all_test_subjects)
+
+            for rows, base in [(train_rows, train_data),
+                               (test_rows, test_data)]:
+                self.assertEqual(list(data.index[rows]), list(base.index))
+
+                X, y = self.evaluator._get_X_y_rows(data, rows)
+                self.assertTrue(np.array_equal(
+                    X, base[['feat0', 'feat1']].to_numpy()))
+                self.assertTrue(np.array_equal(y, base['target']))
@@ -0,0 +1,136 @@
+from unittest import TestCase, skipIf
+from BPt.pipeline.Feat_Importances import (Feat_Importances,
+                                           stack_shap_values,
+                                           expand_shap_values)
+import BPt.pipeline.Feat_Importances as Feat_Importances_Module
+
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+
+try:
+    import shap
+except ImportError:
+    shap = None
+
+
+class Linear_Explainer():
+    '''Exact shap values for a linear model w/ independent features,
+    computed per subject, optionally one set per class.'''
+
+    def __init__(self, coef, mean, n_classes=None):
+
+        self.coef = coef
+        self.mean = mean
+        self.n_classes = n_classes
+
+    def shap_values(self, X, **kwargs):
+
+        vals = (np.asarray(X) - self.mean) * self.coef
+        if self.n_classes is None:
+            return vals
+
+        return [vals * (j + 1) for j in range(self.n_classes)]
+
+
+def get_feat_importances(n_jobs=1, max_subjects=None, avg_abs=False):
+
+    shap_params = SimpleNamespace(avg_abs=avg_abs, max_subjects=max_subjects)
+    params = SimpleNamespace(shap_params=shap_params, n_perm=1,
+                             inverse_global=False, inverse_local=False)
+    importance_info = {'name': 'shap', 'scopes': ['global', 'local'],
+                       'split': 'test'}
+
+    return Feat_Importances(importance_info, params, n_jobs, None)
+
+
+class Test_Shap_Chunks(TestCase):
+
+    def setUp(self):
+
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(23, 4)
+        self.explainer = Linear_Explainer(np.arange(4), self.X.mean(axis=0))
+
+    def test_stack_shap_values(self):
+
+        vals = self.explainer.shap_values(self.X)
+        chunks = np.array_split(np.arange(len(self.X)), 3)
+
+        stacked = stack_shap_values([vals[chunk] for chunk in chunks])
+        self.assertTrue(np.array_equal(stacked, vals))
+
+        # One per class
+        stacked = stack_shap_values([[vals[chunk], vals[chunk] * 2]
+                                     for chunk in chunks])
+        self.assertEqual(len(stacked), 2)
+        self.assertTrue(np.array_equal(stacked[1], vals * 2))
+
+    def test_parallel_same_as_sequential(self):
+
+        for n_classes in [None, 3]:
+            explainer = Linear_Explainer(self.explainer.coef,
+                                         self.explainer.mean,
+                                         n_classes=n_classes)
+            base = get_feat_importances(n_jobs=1).get_shap_values(
+                explainer, self.X)
+
+            for n_jobs in [2, 3]:
+                vals = get_feat_importances(n_jobs=n_jobs).get_shap_values(
+                    explainer, self.X)
+                self.assertTrue(np.array_equal(np.asarray(vals),
+                                               np.asarray(base)))
+
+    def test_shap_sample(self):
+
+        fi = get_feat_importances(max_subjects=5)
+        sample = fi.get_shap_sample(len(self.X), 0)
+
+        self.assertEqual(len(sample), 5)
+        self.assertEqual(len(set(sample)), 5)
+        self.assertTrue(np.array_equal(sample, np.sort(sample)))
+        self.assertTrue(np.array_equal(sample, fi.get_shap_sample(
+            len(self.X), np.random.RandomState(0))))
+
+        # No budget, or a budget over the number of subjects
+        self.assertTrue(get_feat_importances().get_shap_sample(
+            len(self.X), 0) is None)
+        self.assertTrue(get_feat_importances(max_subjects=50).get_shap_sample(
+            len(self.X), 0) is None)
+
+    def test_expand_shap_values(self):
+
+        vals = self.explainer.shap_values(self.X)
+        sample = np.array([1, 4, 10])
+
+        full = expand_shap_values(vals[sample], sample, len(self.X))
+        self.assertEqual(full.shape, vals.shape)
+        self.assertTrue(np.array_equal(full[sample], vals[sample]))
+        self.assertEqual(np.isnan(full[:, 0]).sum(), len(self.X) - 3)
+
+        full = expand_shap_values([vals[sample], vals[sample]], sample,
+                                  len(self.X))
+        self.assertEqual(len(full), 2)
+        self.assertTrue(np.array_equal(full[1][sample], vals[sample]))
+
+        # Global importances should then be over just the sample
+        fi = get_feat_importances(max_subjects=3, avg_abs=True)
+        self.assertTrue(np.allclose(fi.global_from_local(full[0]),
+                                    np.mean(np.abs(vals[sample]), axis=0)))
+
+    @skipIf(shap is None, 'shap is not installed')
+    def test_shap_background(self):
+
+        Feat_Importances_Module._SHAP_BACKGROUNDS.clear()
+        X_train = pd.DataFrame(np.random.random((50, 3)))
+
+        background = Feat_Importances_Module.get_shap_background(X_train, 5)
+        self.assertTrue(Feat_Importances_Module.get_shap_background(
+            X_train, 5) is background)
+        self.assertFalse(Feat_Importances_Module.get_shap_background(
+            X_train, 4) is background)
+
+        for i in range(Feat_Importances_Module._MAX_SHAP_BACKGROUNDS + 1):
+            Feat_Importances_Module.get_shap_background(X_train + i, 2)
+        self.assertEqual(len(Feat_Importances_Module._SHAP_BACKGROUNDS),
+                         Feat_Importances_Module._MAX_SHAP_BACKGROUNDS)
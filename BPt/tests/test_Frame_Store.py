@@ -0,0 +1,96 @@
+from unittest import TestCase
+from BPt import BPt_ML, Load
+from BPt.helpers.Frame_Store import save_frame, load_frame
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+def is_memmapped(arr):
+
+    while arr is not None:
+        if isinstance(arr, np.memmap):
+            return True
+        arr = getattr(arr, 'base', None)
+
+    return False
+
+
+def get_mixed_df(n=20):
+
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({'a': rng.random(n),
+                         'b': rng.randint(0, 5, n),
+                         'c': rng.random(n).astype('float32'),
+                         'd': pd.Categorical(rng.choice(['x', 'y'], n)),
+                         'e': rng.random(n),
+                         'f': ['s' + str(i) for i in range(n)],
+                         'g': pd.date_range('2020', periods=n)},
+                        index=pd.Index(['s' + str(i) for i in range(n)],
+                                       name='src_subject_id'))
+
+
+class Test_Frame_Store(TestCase):
+
+    def setUp(self):
+        self.temp_dr = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def save_load(self, df, **load_params):
+
+        dr = os.path.join(self.temp_dr, 'frame')
+        shutil.rmtree(dr, ignore_errors=True)
+
+        save_frame(df, dr)
+        return load_frame(dr, **load_params)
+
+    def test_mixed_dtypes(self):
+
+        df = get_mixed_df()
+        for mmap in [True, False]:
+            pd.testing.assert_frame_equal(self.save_load(df, mmap=mmap), df)
+
+        # Empty, and over more than one write chunk
+        pd.testing.assert_frame_equal(self.save_load(df.iloc[:0]),
+                                      df.iloc[:0])
+
+        wide = pd.DataFrame(np.random.random((5, 2500)))
+        pd.testing.assert_frame_equal(self.save_load(wide), wide)
+
+    def test_mmap(self):
+
+        df = pd.DataFrame(np.random.random((20, 5)),
+                          columns=['feat' + str(i) for i in range(5)])
+
+        loaded = self.save_load(df)
+        self.assertTrue(is_memmapped(loaded.to_numpy()))
+        self.assertFalse(is_memmapped(self.save_load(df, mmap=False)
+                                      .to_numpy()))
+
+        # Changes should only be made in memory
+        loaded.iloc[0, 0] = -1
+        pd.testing.assert_frame_equal(self.save_load(df), df)
+
+    def test_save_dr_over_file(self):
+
+        ML = BPt_ML(log_dr=None, verbose=False, notebook=False)
+        ML.Load_Data(df=get_mixed_df()[['a', 'e']].reset_index())
+
+        loc = os.path.join(self.temp_dr, 'ML')
+        for as_dr in [False, True, True]:
+            ML.Save(loc, as_dr=as_dr)
+            if as_dr:
+                self.assertTrue(os.path.isdir(loc))
+            else:
+                self.assertTrue(os.path.isfile(loc))
+
+            # Nothing else should be left
+            self.assertEqual(os.listdir(self.temp_dr), ['ML'])
+
+            loaded = Load(loc, log_dr=None, verbose=False)
+            pd.testing.assert_frame_equal(loaded.data, ML.data)
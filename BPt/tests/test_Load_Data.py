@@ -0,0 +1,222 @@
+from unittest import TestCase, skipIf
+from BPt import BPt_ML
+from BPt.helpers.Data_Helpers import compact_dtypes
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+EVENTNAMES = ['baseline_year_1_arm_1', '2_year_follow_up_y_arm_1']
+
+
+def get_fake_df(n=40):
+
+    rng = np.random.RandomState(0)
+    return pd.DataFrame({'src_subject_id': ['NDAR_' + str(i)
+                                            for i in range(n)],
+                         'eventname': rng.choice(EVENTNAMES, n),
+                         'feat_a': rng.random(n),
+                         'feat_b': rng.randint(0, 100, n),
+                         'other_c': rng.random(n),
+                         'feat_d': rng.random(n) * 1000})
+
+
+def get_ML():
+    return BPt_ML(log_dr=None, verbose=False, notebook=False)
+
+
+class Test_Load_Data(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        self.loc = os.path.join(self.temp_dr, 'data.csv')
+        self.df = get_fake_df()
+        self.df.to_csv(self.loc, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def load(self, ML=None, **params):
+
+        if ML is None:
+            ML = get_ML()
+
+        ML.Load_Data(loc=self.loc, dataset_type='custom',
+                     eventname=EVENTNAMES[0], **params)
+        return ML.data
+
+    def get_base(self, cols):
+        '''Reference, reading the full file, then filtering
+        and dropping columns, as done before.'''
+
+        base = pd.read_csv(self.loc)
+        base = base[base['eventname'] == EVENTNAMES[0]]
+        base = base.set_index('src_subject_id')[cols]
+
+        return base
+
+    def test_chunks_same_as_full(self):
+
+        base = self.get_base(['feat_a', 'feat_b', 'other_c', 'feat_d'])
+        for chunksize in [None, 1, 7, 1000]:
+            pd.testing.assert_frame_equal(self.load(chunksize=chunksize),
+                                          base)
+
+    def test_usecols(self):
+
+        base = self.get_base(['feat_a', 'feat_b', 'feat_d'])
+        for chunksize in [None, 7]:
+            pd.testing.assert_frame_equal(
+                self.load(drop_keys=['other'], chunksize=chunksize), base)
+            pd.testing.assert_frame_equal(
+                self.load(inclusion_keys=['feat'], chunksize=chunksize),
+                base)
+
+        # Keys should apply to the names after the name map
+        ML = get_ML()
+        ML.Load_Name_Map(name_map={'other_c': 'feat_c'})
+        data = self.load(ML=ML, inclusion_keys='feat_c')
+        self.assertEqual(list(data), ['feat_c'])
+
+        data = self.load(ext='_ext', drop_keys=['b_ext', 'd_ext'])
+        self.assertEqual(list(data), ['feat_a_ext', 'other_c_ext'])
+
+    def test_compact_dtypes(self):
+
+        base = self.get_base(['feat_a', 'feat_b', 'other_c', 'feat_d'])
+        for chunksize in [None, 7]:
+            data = self.load(compact_dtypes=True, chunksize=chunksize)
+
+            self.assertEqual(list(data.dtypes), [np.float32, np.uint8,
+                                                 np.float32, np.float32])
+            self.assertTrue(np.allclose(data, base, rtol=1e-6))
+
+    def test_compact_dtypes_chunks(self):
+
+        # Values which fit smaller dtypes in some chunks than others
+        df = pd.DataFrame({'src_subject_id': ['s' + str(i)
+                                              for i in range(20)],
+                           'eventname': EVENTNAMES[0],
+                           'feat_small': [1] * 10 + [1000] * 10,
+                           'feat_neg': [5] * 15 + [-5] * 5,
+                           'feat_na': [1.0] * 12 + [np.nan] * 8})
+        df.to_csv(self.loc, index=False)
+
+        base = self.load(compact_dtypes=True, drop_na=False)
+        self.assertEqual(list(base.dtypes), [np.uint16, np.int8, np.float32])
+
+        for chunksize in [1, 7, 10]:
+            data = self.load(compact_dtypes=True, drop_na=False,
+                             chunksize=chunksize)
+            pd.testing.assert_frame_equal(data, base)
+
+    def test_compact_dtypes_helper(self):
+
+        df = pd.DataFrame({'a': [1.5, 2.5], 'b': [-1, 300],
+                           'c': [0, 70000], 'd': ['x', 'y'],
+                           'e': np.array([1, 2], dtype='float32')})
+        compact = compact_dtypes(df)
+
+        self.assertEqual(list(compact.dtypes),
+                         [np.float32, np.int16, np.uint32, object,
+                          np.float32])
+        pd.testing.assert_frame_equal(compact, df, check_dtype=False)
+
+        # Empty shouldn't fail
+        self.assertEqual(len(compact_dtypes(df.iloc[:0])), 0)
+
+    @skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_pyarrow_engine(self):
+
+        pd.testing.assert_frame_equal(self.load(engine='pyarrow'),
+                                      self.load())
+
+
+class Test_Load_Data_Files(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+
+        # Each w/ different, partially overlapping subjects
+        self.locs, self.dfs = [], []
+        for i in range(3):
+            subjects = rng.choice(40, 30, replace=False)
+            df = pd.DataFrame({'src_subject_id': ['NDAR_' + str(s)
+                                                  for s in subjects],
+                               'feat_a' + str(i): rng.random(30),
+                               'feat_b' + str(i): rng.random(30)})
+
+            loc = os.path.join(self.temp_dr, str(i) + '.csv')
+            df.to_csv(loc, index=False)
+
+            self.locs.append(loc)
+            self.dfs.append(df)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def get_base(self, merge):
+        '''Reference, w/ chained merges, as done before.'''
+
+        data = self.dfs[0]
+        for df in self.dfs[1:]:
+            data = pd.merge(data, df, on='src_subject_id', how=merge)
+
+        return data.set_index('src_subject_id')
+
+    def load(self, **params):
+
+        ML = get_ML()
+        ML.Load_Data(loc=self.locs, dataset_type='custom', **params)
+        return ML.data
+
+    def test_same_as_merges(self):
+
+        for merge in ['inner', 'outer']:
+            base = self.get_base(merge)
+            for n_jobs in [1, 2]:
+                data = self.load(merge=merge, n_jobs=n_jobs, drop_na=False)
+                pd.testing.assert_frame_equal(data, base)
+
+    def test_repeated_cols(self):
+
+        # Should fall back to merges, w/ repeats kept as unique columns
+        self.dfs[1] = self.dfs[1].rename({'feat_a1': 'feat_a0'}, axis=1)
+        self.dfs[1].to_csv(self.locs[1], index=False)
+
+        base = self.get_base('inner')
+        for n_jobs in [1, 2]:
+            data = self.load(n_jobs=n_jobs)
+            pd.testing.assert_frame_equal(data, base)
+
+    def test_default_n_jobs(self):
+
+        # Should load one file at a time unless n_jobs is passed,
+        # even if the class n_jobs is higher
+        ML = BPt_ML(log_dr=None, verbose=False, notebook=False, n_jobs=2)
+
+        used_n_jobs = []
+        load_datasets = ML._load_datasets
+
+        def record_load_datasets(*args, **kwargs):
+            used_n_jobs.append(kwargs['n_jobs'])
+            return load_datasets(*args, **kwargs)
+
+        ML._load_datasets = record_load_datasets
+        ML.Load_Data(loc=self.locs, dataset_type='custom')
+        ML.Load_Data(loc=self.locs, dataset_type='custom', n_jobs=2,
+                     clear_existing=True)
+
+        self.assertEqual(used_n_jobs, [1, 2])
+        pd.testing.assert_frame_equal(ML.data, self.get_base('inner'))
@@ -0,0 +1,163 @@
+from unittest import TestCase
+from BPt.helpers.Loader_Cache import Loader_Cache, get_loader_key
+from BPt.helpers.Data_File import Data_File
+from BPt.pipeline.Loaders import Loader_Wrapper
+from BPt.extensions.Loaders import Identity
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import numpy as np
+
+
+def get_loader(file_mapping, cache_loc, **params):
+
+    return Loader_Wrapper(Identity(), wrapper_inds=[0],
+                          file_mapping=file_mapping,
+                          cache_loc=cache_loc, **params)
+
+
+class Test_Loader_Cache(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        self.cache_loc = os.path.join(self.temp_dr, 'cache')
+
+        self.data_files = []
+        for i in range(5):
+            loc = os.path.join(self.temp_dr, str(i) + '.npy')
+            np.save(loc, np.arange(10) + i)
+            self.data_files.append(Data_File(loc, np.load))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def test_hit_miss(self):
+
+        cache = Loader_Cache(self.cache_loc, Identity())
+        data_file = self.data_files[0]
+
+        self.assertTrue(cache.get(data_file) is None)
+        cache.put(data_file, data_file.load() * 2)
+
+        self.assertTrue(np.array_equal(cache.get(data_file),
+                                       data_file.load() * 2))
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_file_changed(self):
+
+        cache = Loader_Cache(self.cache_loc, Identity())
+        data_file = self.data_files[0]
+        cache.put(data_file, data_file.load())
+
+        # Changing the file should miss
+        np.save(data_file.loc, np.arange(20))
+        self.assertTrue(cache.get(data_file) is None)
+
+    def test_loader_key(self):
+
+        self.assertEqual(get_loader_key(Identity()),
+                         get_loader_key(Identity()))
+
+        loader = Loader_Wrapper(Identity(), [0], {})
+        self.assertNotEqual(get_loader_key(Identity()),
+                            get_loader_key(loader))
+
+    def test_load_funcs(self):
+
+        cache = Loader_Cache(self.cache_loc, Identity())
+        loc = self.data_files[0].loc
+
+        # Different lambdas w/ the same name shouldn't share entries
+        load1 = lambda x: np.load(x)  # noqa
+        load2 = lambda x: np.load(x) * 2  # noqa
+
+        cache.put(Data_File(loc, load1), load1(loc))
+        self.assertTrue(cache.get(Data_File(loc, load2)) is None)
+
+        cache.put(Data_File(loc, load2), load2(loc))
+        self.assertTrue(np.array_equal(cache.get(Data_File(loc, load1)),
+                                       load1(loc)))
+        self.assertTrue(np.array_equal(cache.get(Data_File(loc, load2)),
+                                       load2(loc)))
+
+    def test_closures(self):
+
+        def get_load_func(scale):
+            def load(loc):
+                return np.load(loc) * scale
+            return load
+
+        cache = Loader_Cache(self.cache_loc, Identity())
+        loc = self.data_files[0].loc
+
+        cache.put(Data_File(loc, get_load_func(1)), np.load(loc))
+        self.assertTrue(cache.get(Data_File(loc, get_load_func(2))) is None)
+        self.assertTrue(cache.get(Data_File(loc, get_load_func(1)))
+                        is not None)
+
+    def test_unhashable_closure(self):
+
+        lock = threading.Lock()
+
+        def load(loc):
+            with lock:
+                return np.load(loc)
+
+        # Should just not be cached
+        cache = Loader_Cache(self.cache_loc, Identity())
+        data_file = Data_File(self.data_files[0].loc, load)
+
+        cache.put(data_file, data_file.load())
+        self.assertTrue(cache.get(data_file) is None)
+
+    def test_evict(self):
+
+        # Each cached entry is 80 bytes + 128 header
+        max_size = 600 / (1024 ** 3)
+        cache = Loader_Cache(self.cache_loc, Identity(), max_size=max_size)
+
+        for data_file in self.data_files:
+            cache.put(data_file, data_file.load())
+            time.sleep(.01)
+
+        # Mark the first as recently used
+        cache.get(self.data_files[0])
+        cache.evict()
+
+        # Just the first and the most recently saved should be left
+        kept = [cache.get(data_file) is not None
+                for data_file in self.data_files]
+        self.assertEqual(kept, [True, False, False, False, True])
+
+    def test_no_max_size(self):
+
+        cache = Loader_Cache(self.cache_loc, Identity())
+        for data_file in self.data_files:
+            cache.put(data_file, data_file.load())
+
+        cache.evict()
+        self.assertTrue(all([cache.get(data_file) is not None
+                             for data_file in self.data_files]))
+
+    def test_loader_hit_miss_same(self):
+
+        file_mapping = {i: self.data_files[i] for i in range(5)}
+        X = np.array([[i, 1.0] for i in range(5)])
+        mapping = {0: 0, 1: 1}
+
+        loader = get_loader(file_mapping, self.cache_loc)
+        X_miss = loader.fit_transform(X, mapping=mapping.copy())
+        self.assertEqual(loader.cache_stats_['hits'], 0)
+
+        loader = get_loader(file_mapping, self.cache_loc)
+        X_hit = loader.fit_transform(X, mapping=mapping.copy())
+        self.assertEqual(loader.cache_stats_['misses'], 0)
+
+        loader = get_loader(file_mapping, None)
+        no_cache = loader.fit_transform(X, mapping=mapping.copy())
+        self.assertTrue(np.array_equal(X_miss, no_cache))
+        self.assertTrue(np.array_equal(X_hit, no_cache))
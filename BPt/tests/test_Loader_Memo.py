@@ -0,0 +1,167 @@
+from unittest import TestCase
+from BPt import BPt_ML, Model_Pipeline, Model, Loader
+from BPt.helpers.Data_File import Data_File
+from BPt.pipeline.Loaders import Loader_Wrapper
+from BPt.extensions.Loaders import Identity
+import BPt.pipeline.Loaders as Loaders
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+
+def get_memo_size():
+    return Loaders._LOADER_MEMO['size']
+
+
+class Load_Error(Exception):
+    pass
+
+
+class Counting_Load():
+
+    def __init__(self, fail_after=None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def __call__(self, loc):
+
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise Load_Error()
+
+        return np.load(loc)
+
+
+class Test_Loader_Memo(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        self.locs = []
+        for i in range(20):
+            loc = os.path.join(self.temp_dr, 's' + str(i) + '.npy')
+            np.save(loc, np.random.random(10))
+            self.locs.append(loc)
+
+    def tearDown(self):
+
+        Loaders.clear_loader_memo()
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def get_loader(self, load, **params):
+
+        file_mapping = {i: Data_File(self.locs[i], load)
+                        for i in range(len(self.locs))}
+        return Loader_Wrapper(Identity(), wrapper_inds=[0],
+                              file_mapping=file_mapping, **params)
+
+    def get_X(self):
+        return np.array([[i, 1.0] for i in range(len(self.locs))])
+
+    def test_memo(self):
+
+        load = Counting_Load()
+        loader = self.get_loader(load)
+        X = self.get_X()
+
+        Loaders.set_loader_memo('key')
+        X_trans = loader.fit_transform(X, mapping={0: 0, 1: 1})
+
+        # Should not load again
+        load.calls = 0
+        self.assertTrue(np.array_equal(loader.transform(X), X_trans))
+        self.assertEqual(load.calls, 0)
+
+        # New key should clear
+        Loaders.set_loader_memo('new_key')
+        self.assertEqual(get_memo_size(), 0)
+        loader.transform(X)
+        self.assertEqual(load.calls, len(self.locs))
+
+    def check_memo_limit(self, **params):
+
+        load = Counting_Load()
+        loader = self.get_loader(load, **params)
+        X = self.get_X()
+
+        base = self.get_loader(np.load).fit_transform(X,
+                                                      mapping={0: 0, 1: 1})
+
+        Loaders.set_loader_memo('key')
+        X_trans = loader.fit_transform(X, mapping={0: 0, 1: 1})
+        self.assertTrue(np.array_equal(X_trans, base))
+
+        # Should only store up to the limit
+        max_size = Loaders.LOADER_MEMO_MAX_SIZE
+        if params.get('max_memory') is not None:
+            max_size = min(max_size, params['max_memory'])
+        self.assertTrue(get_memo_size() <= max_size * (1024 ** 3))
+
+        load.calls = 0
+        self.assertTrue(np.array_equal(loader.transform(X), base))
+
+        return load.calls
+
+    def test_memo_max_size(self):
+
+        max_size = Loaders.LOADER_MEMO_MAX_SIZE
+        try:
+            Loaders.LOADER_MEMO_MAX_SIZE = 0
+            self.assertEqual(self.check_memo_limit(), len(self.locs))
+
+            # Room for 5 outputs
+            Loaders.LOADER_MEMO_MAX_SIZE = 400 / (1024 ** 3)
+            self.assertEqual(self.check_memo_limit(), len(self.locs) - 5)
+
+        finally:
+            Loaders.LOADER_MEMO_MAX_SIZE = max_size
+
+    def test_memo_max_memory(self):
+
+        n_calls = self.check_memo_limit(max_memory=400 / (1024 ** 3))
+        self.assertEqual(n_calls, len(self.locs) - 5)
+
+    def get_ML(self, load):
+
+        ML = BPt_ML(log_dr=None, verbose=False, notebook=False, n_jobs=1)
+        ML.Load_Data_Files(files={'file': self.locs},
+                           file_to_subject=lambda x:
+                           os.path.basename(x).replace('.npy', ''),
+                           load_func=load)
+
+        targets = pd.DataFrame({'src_subject_id': ['s' + str(i) for i in
+                                                   range(len(self.locs))],
+                                'target': np.random.random(len(self.locs))})
+        ML.Load_Targets(df=targets, col_name='target', data_type='f')
+        ML.Train_Test_Split(test_size=.2, random_state=1)
+        ML.Set_Default_ML_Verbosity(progress_bar=False)
+
+        return ML
+
+    def test_cleared_on_error(self):
+
+        ML = self.get_ML(Counting_Load(fail_after=5))
+        pipeline = Model_Pipeline(loaders=Loader('identity'),
+                                  model=Model('ridge'))
+
+        with self.assertRaises(Load_Error):
+            ML.Evaluate(pipeline, splits=2, n_repeats=2)
+
+        self.assertTrue(Loaders._LOADER_MEMO['key'] is None)
+        self.assertEqual(get_memo_size(), 0)
+
+    def test_cleared_in_workers(self):
+
+        ML = self.get_ML(np.load)
+        pipeline = Model_Pipeline(loaders=Loader('identity'),
+                                  model=Model('ridge'))
+        ML.Evaluate(pipeline, splits=2, n_repeats=2, fold_n_jobs=2)
+
+        # The re-used workers shouldn't keep any outputs
+        sizes = Parallel(n_jobs=2)(delayed(get_memo_size)()
+                                   for _ in range(4))
+        self.assertEqual(sizes, [0, 0, 0, 0])
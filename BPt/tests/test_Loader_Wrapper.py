@@ -0,0 +1,228 @@
+from unittest import TestCase
+from BPt import BPt_ML, Model_Pipeline, Model, Loader
+from BPt.helpers.Data_File import Data_File
+from BPt.pipeline.Loaders import Loader_Wrapper
+from BPt.extensions.Loaders import Identity
+import BPt.pipeline.Loaders as Loaders
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+# The size of each batch passed to Batch_Identity
+BATCH_SIZES = []
+
+
+class Batch_Identity(BaseEstimator, TransformerMixin):
+
+    subject_independent = True
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        return X.flatten()
+
+    def transform_batch(self, X):
+
+        BATCH_SIZES.append(len(X))
+        return X.reshape((len(X), -1))
+
+
+class Counting_Load():
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, loc):
+
+        self.calls += 1
+        return np.load(loc)
+
+
+class Test_Loader_Wrapper(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        self.n_subjects = 120
+
+        self.file_mapping = {}
+        for i in range(self.n_subjects):
+            loc = os.path.join(self.temp_dr, str(i) + '.npy')
+            np.save(loc, np.random.random(100))
+            self.file_mapping[i] = Data_File(loc, np.load)
+
+        self.X = np.array([[i, float(i)] for i in range(self.n_subjects)])
+
+    def tearDown(self):
+
+        BATCH_SIZES.clear()
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def get_loader(self, transformer=None, **params):
+
+        if transformer is None:
+            transformer = Identity()
+
+        return Loader_Wrapper(transformer, wrapper_inds=[0],
+                              file_mapping=self.file_mapping, **params)
+
+    def get_base(self):
+        return self.get_loader().fit_transform(self.X, mapping={0: 0, 1: 1})
+
+    def test_transform_batch_same(self):
+
+        loader = self.get_loader(Batch_Identity())
+        X_trans = loader.fit_transform(self.X, mapping={0: 0, 1: 1})
+
+        self.assertTrue(np.array_equal(X_trans, self.get_base()))
+        self.assertTrue(max(BATCH_SIZES) <= Loaders.TRANSFORM_BATCH_SIZE)
+
+    def test_batch_size_max_memory(self):
+
+        # Each subject is 800 bytes loaded + 800 transformed
+        loader = self.get_loader(Batch_Identity(),
+                                 max_memory=16000 / (1024 ** 3))
+        X_trans = loader.fit_transform(self.X, mapping={0: 0, 1: 1})
+
+        self.assertEqual(loader.batch_size_, 10)
+        self.assertEqual(max(BATCH_SIZES), 10)
+        self.assertTrue(np.array_equal(X_trans, self.get_base()))
+
+        BATCH_SIZES.clear()
+        self.assertTrue(np.array_equal(loader.transform(self.X),
+                                       self.get_base()))
+        self.assertEqual(max(BATCH_SIZES), 10)
+
+    def test_batch_size_max_memory_large(self):
+
+        # Should use larger batches than the default, if they fit
+        loader = self.get_loader(Batch_Identity(),
+                                 max_memory=160000 / (1024 ** 3))
+        X_trans = loader.fit_transform(self.X, mapping={0: 0, 1: 1})
+
+        self.assertEqual(loader.batch_size_, 100)
+        self.assertEqual(max(BATCH_SIZES), 100)
+        self.assertTrue(np.array_equal(X_trans, self.get_base()))
+
+    def test_batch_size_loads_once(self):
+
+        load = Counting_Load()
+        self.file_mapping = {key: Data_File(data_file.loc, load)
+                             for key, data_file in self.file_mapping.items()}
+
+        # Measuring the batch size shouldn't load any file again
+        for transformer in [Identity(), Batch_Identity()]:
+            load.calls = 0
+            loader = self.get_loader(transformer,
+                                     max_memory=16000 / (1024 ** 3))
+            X_trans = loader.fit_transform(self.X, mapping={0: 0, 1: 1})
+
+            self.assertEqual(load.calls, self.n_subjects)
+            self.assertEqual(loader.batch_size_, 10)
+            self.assertTrue(np.array_equal(X_trans, self.get_base()))
+
+    def get_stacked(self, X, cols):
+        '''The loader outputs stacked per subject, then the rest of X.'''
+
+        trans = [np.stack([self.file_mapping[int(key)].load()
+                           for key in X[:, col]]) for col in cols]
+        rest = [i for i in range(X.shape[1]) if i not in cols]
+
+        return np.hstack(trans + [X[:, rest]])
+
+    def test_stream_same_as_stacked(self):
+
+        self.assertTrue(np.array_equal(self.get_base(),
+                                       self.get_stacked(self.X, [0])))
+
+    def test_stream_multiple_cols(self):
+
+        # Two file columns, w/ a regular column between them
+        X = np.array([[i, float(i), self.n_subjects - i - 1]
+                      for i in range(self.n_subjects)])
+
+        loader = Loader_Wrapper(Identity(), wrapper_inds=[0, 2],
+                                file_mapping=self.file_mapping)
+        mapping = {0: 0, 1: 1, 2: 2}
+        X_trans = loader.fit_transform(X, mapping=mapping)
+
+        self.assertTrue(np.array_equal(X_trans,
+                                       self.get_stacked(X, [0, 2])))
+        self.assertTrue(np.array_equal(loader.transform(X), X_trans))
+
+        # The rest of X should be mapped to after the loader features
+        self.assertEqual(mapping[1], 200)
+
+    def test_memmap_dr(self):
+
+        memmap_dr = os.path.join(self.temp_dr, 'memmap')
+        loader = self.get_loader(memmap_dr=memmap_dr,
+                                 max_memory=16000 / (1024 ** 3))
+        X_trans = loader.fit_transform(self.X, mapping={0: 0, 1: 1})
+
+        self.assertTrue(isinstance(X_trans, np.memmap))
+        self.assertTrue(np.array_equal(X_trans, self.get_base()))
+
+        # The temp file should be removed once opened
+        self.assertEqual(os.listdir(memmap_dr), [])
+
+    def test_prefetch(self):
+
+        for transformer in [Identity(), Batch_Identity()]:
+            loader = self.get_loader(transformer, prefetch=3,
+                                     prefetch_n_jobs=2)
+            X_trans = loader.fit_transform(self.X, mapping={0: 0, 1: 1})
+
+            self.assertTrue(np.array_equal(X_trans, self.get_base()))
+            self.assertTrue(np.array_equal(loader.transform(self.X),
+                                           self.get_base()))
+
+    def get_ML(self):
+
+        locs = [self.file_mapping[i].loc for i in range(self.n_subjects)]
+        subjects = [os.path.basename(loc).replace('.npy', '')
+                    for loc in locs]
+
+        ML = BPt_ML(log_dr=None, verbose=False, notebook=False, n_jobs=1)
+        ML.Load_Data_Files(files={'file': locs},
+                           file_to_subject=lambda x:
+                           os.path.basename(x).replace('.npy', ''),
+                           load_func=np.load)
+
+        targets = pd.DataFrame({'src_subject_id': subjects,
+                                'target': np.random.random(len(locs))})
+        ML.Load_Targets(df=targets, col_name='target', data_type='f')
+        ML.Train_Test_Split(test_size=.2, random_state=1)
+        ML.Set_Default_ML_Verbosity(progress_bar=False)
+
+        return ML
+
+    def test_loader_params(self):
+
+        ML = self.get_ML()
+        memmap_dr = os.path.join(self.temp_dr, 'memmap')
+
+        results = []
+        for params in [{}, {'max_memory': 16000 / (1024 ** 3),
+                            'memmap_dr': memmap_dr}]:
+            pipeline = Model_Pipeline(loaders=Loader('identity', **params),
+                                      model=Model('ridge'))
+            results.append(ML.Evaluate(pipeline, splits=2, n_repeats=1,
+                                       return_raw_preds=True,
+                                       return_models=True))
+
+        self.assertTrue(np.allclose(results[0]['raw_scores'],
+                                    results[1]['raw_scores']))
+        self.assertTrue(results[0]['raw_preds'].equals(
+            results[1]['raw_preds']))
+
+        # Check params passed to the fitted loader
+        loader = results[1]['models'][0].steps[0][1]
+        self.assertEqual(loader.memmap_dr, memmap_dr)
+        self.assertEqual(loader.batch_size_, 10)
@@ -0,0 +1,259 @@
+from unittest import TestCase
+from BPt import (BPt_ML, Model_Pipeline, Model, Param_Search)
+import BPt.pipeline.Nevergrad as Nevergrad
+import BPt.pipeline.BPt_Pipeline as BPt_Pipeline
+
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+def get_fake_ML(n_jobs=1, n=100, p=5, shift=0, change_row=None):
+
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.randn(n, p),
+                      columns=['feat' + str(i) for i in range(p)])
+    df['feat1'] += shift
+    if change_row is not None:
+        df.loc[change_row, 'feat2'] += 1
+    df['src_subject_id'] = ['s' + str(i) for i in range(n)]
+
+    targets = pd.DataFrame({'src_subject_id': df['src_subject_id'],
+                            'target': df['feat0'] * 2 + rng.randn(n)})
+
+    ML = BPt_ML(log_dr=None, verbose=False, notebook=False, n_jobs=n_jobs)
+    ML.Load_Data(df=df)
+    ML.Load_Targets(df=targets, col_name='target', data_type='f')
+    ML.Train_Test_Split(test_size=.2, random_state=1)
+    ML.Set_Default_ML_Verbosity(progress_bar=False)
+
+    return ML
+
+
+def run_search(ML, n_iter=8, outer_splits=2, **param_search_params):
+
+    param_search = Param_Search(n_iter=n_iter, **param_search_params)
+    pipeline = Model_Pipeline(model=Model('ridge', params=1),
+                              param_search=param_search)
+
+    return ML.Evaluate(pipeline, splits=outer_splits, n_repeats=1,
+                       return_models=True)
+
+
+def get_n_cached(results):
+    return [model.n_cached_ for model in results['models']]
+
+
+class Fake_Optimizer():
+
+    def __init__(self):
+        self.suggested = []
+
+    def suggest(self, **kwargs):
+        self.suggested.append(kwargs)
+
+
+class Test_Nevergrad(TestCase):
+
+    def setUp(self):
+        Nevergrad.clear_search_cache()
+
+    def tearDown(self):
+        Nevergrad.clear_search_cache()
+
+    def test_process_pool_same_as_sequential(self):
+
+        base = run_search(get_fake_ML(n_jobs=1))
+        results = run_search(get_fake_ML(n_jobs=2))
+
+        self.assertTrue(np.allclose(results['raw_scores'],
+                                    base['raw_scores']))
+
+    def test_cache_evals(self):
+
+        ML = get_fake_ML()
+        base = run_search(ML, cache_evals=False)
+        self.assertEqual(len(Nevergrad._SEARCH_STORE['scores']), 0)
+
+        first = run_search(ML)
+        second = run_search(ML)
+
+        # All of the second search should be cached, w/ the same scores
+        self.assertEqual(get_n_cached(second), [8, 8])
+        self.assertTrue(np.allclose(first['raw_scores'],
+                                    base['raw_scores']))
+        self.assertTrue(np.allclose(second['raw_scores'],
+                                    base['raw_scores']))
+
+    def test_cache_data_changed(self):
+
+        run_search(get_fake_ML())
+
+        # Same subjects and splits, but different data, shouldn't be cached
+        results = run_search(get_fake_ML(shift=1))
+        self.assertEqual(get_n_cached(results), [0, 0])
+
+    def test_cache_loc(self):
+
+        cache_loc = tempfile.mkdtemp()
+        try:
+            ML = get_fake_ML()
+            first = run_search(ML, cache_loc=cache_loc)
+
+            # Should load from disk, e.g., in a new process
+            Nevergrad.clear_search_cache()
+            second = run_search(ML, cache_loc=cache_loc)
+
+            self.assertEqual(get_n_cached(second), [8, 8])
+            self.assertTrue(np.allclose(first['raw_scores'],
+                                        second['raw_scores']))
+
+        finally:
+            shutil.rmtree(cache_loc, ignore_errors=True)
+
+    def test_clear_search_cache(self):
+
+        run_search(get_fake_ML())
+        self.assertTrue(len(Nevergrad._SEARCH_STORE['scores']) > 0)
+
+        Nevergrad.clear_search_cache()
+        self.assertEqual(len(Nevergrad._SEARCH_STORE['scores']), 0)
+        self.assertEqual(len(Nevergrad._SEARCH_STORE['history']), 0)
+
+    def test_search_store_max_size(self):
+
+        max_size = Nevergrad.SEARCH_STORE_MAX_SIZE
+        try:
+            Nevergrad.SEARCH_STORE_MAX_SIZE = 3
+
+            store = {}
+            for key in range(5):
+                Nevergrad._get_stored(store, key, key)
+            self.assertEqual(list(store), [2, 3, 4])
+
+            # Access should mark as most recently used
+            self.assertEqual(Nevergrad._get_stored(store, 2, None), 2)
+            Nevergrad._get_stored(store, 5, 5)
+            self.assertEqual(list(store), [4, 2, 5])
+
+            # Each outer fold is a different search
+            run_search(get_fake_ML(), n_iter=2)
+            run_search(get_fake_ML(n=90), n_iter=2)
+            self.assertEqual(len(Nevergrad._SEARCH_STORE['scores']), 3)
+
+        finally:
+            Nevergrad.SEARCH_STORE_MAX_SIZE = max_size
+
+    def test_cache_one_row_changed(self):
+
+        run_search(get_fake_ML(n=500))
+
+        # The same data, even from a new ML object, should be cached
+        results = run_search(get_fake_ML(n=500))
+        self.assertEqual(get_n_cached(results), [8, 8])
+
+        # A change to any single train subject should be a different
+        # search, for the outer fold with that subject
+        results = run_search(get_fake_ML(n=500, change_row=5))
+        self.assertEqual(sorted(get_n_cached(results)), [0, 8])
+
+    def test_search_key_all_rows(self):
+
+        search = Nevergrad.NevergradSearchCV(param_search=Param_Search())
+        search.cv_inds, search.param_distributions = [], {}
+
+        X, y = np.random.random((1000, 5)), np.random.random(1000)
+        index = np.arange(1000)
+
+        search._set_search_keys(X, y, index, {}, {})
+        base_key = search.search_key_
+
+        for i in [1, 500, 998]:
+            X_changed, y_changed = X.copy(), y.copy()
+            X_changed[i, 2] += 1
+            y_changed[i] += 1
+
+            search._set_search_keys(X_changed, y, index, {}, {})
+            self.assertNotEqual(search.search_key_, base_key)
+
+            search._set_search_keys(X, y_changed, index, {}, {})
+            self.assertNotEqual(search.search_key_, base_key)
+
+        search._set_search_keys(X.copy(), y.copy(), index, {}, {})
+        self.assertEqual(search.search_key_, base_key)
+
+    def test_warm_start(self):
+
+        search = Nevergrad.NevergradSearchCV(
+            param_search=Param_Search(warm_start=2))
+        history = [({'a': 1}, .5), ({'a': 2}, .1), ({'a': 2}, .1),
+                   ({'a': 3}, .3)]
+
+        optimizer = Fake_Optimizer()
+        search._warm_start(optimizer, history)
+
+        # Best last, as suggestions are last in first out
+        self.assertEqual(optimizer.suggested, [{'a': 3}, {'a': 2}])
+
+    def get_rungs(self, n_folds, **params):
+
+        search = Nevergrad.NevergradSearchCV(
+            param_search=Param_Search(successive_halving=True, **params))
+        search.cv_inds = [None for _ in range(n_folds)]
+
+        return search._get_rungs()
+
+    def test_halving_rungs(self):
+
+        self.assertEqual(self.get_rungs(9),
+                         [([0], 1), ([0, 1, 2], 1),
+                          (list(range(9)), 1)])
+
+        self.assertEqual(self.get_rungs(5, halving_factor=2, min_folds=2),
+                         [([0, 1], 1), ([0, 1, 2, 3], 1),
+                          (list(range(5)), 1)])
+
+        # Single split should use fractions of the train subjects
+        self.assertEqual(self.get_rungs(1),
+                         [([0], 1 / 9), ([0], 1 / 3), ([0], 1)])
+
+    def check_halving_search(self, splits):
+
+        n_iter = 18
+        results = run_search(get_fake_ML(), n_iter=n_iter, splits=splits,
+                             successive_halving=True, outer_splits=.25)
+        model = results['models'][0]
+
+        # Only candidates scored on all folds are added to the history,
+        # and the best should be selected from them
+        history = Nevergrad._SEARCH_STORE['history'][model.est_key_]
+        losses = [loss for _, loss in history]
+        self.assertTrue(0 < len(losses) < n_iter)
+        self.assertEqual(model.best_search_score, min(losses))
+
+        best = [kwargs for kwargs, loss in history
+                if loss == min(losses)][0]
+        self.assertEqual(model.best_params_, best)
+
+        return model
+
+    def test_halving_search(self):
+        self.check_halving_search(splits=3)
+
+    def test_halving_search_single_split(self):
+
+        model = self.check_halving_search(splits=.25)
+
+        # Should have scored on fractions of the train subjects
+        scores = Nevergrad._SEARCH_STORE['scores'][model.search_key_]
+        train_fracs = set([key[2] for key in scores if len(key) == 3])
+        self.assertEqual(train_fracs, set([1 / 9, 1 / 3]))
+
+    def test_prefix_memo_cleared(self):
+
+        BPt_Pipeline._PREFIX_MEMO['key'] = None
+        run_search(get_fake_ML(), n_iter=2)
+
+        # Shouldn't keep any fitted prefixes once the search is done
+        self.assertEqual(len(BPt_Pipeline._PREFIX_MEMO), 0)
@@ -0,0 +1,181 @@
+from unittest import TestCase
+from BPt import BPt_ML
+from BPt.helpers.Parse_Cache import (get_cache_key, save_cached,
+                                     load_cached, cache_info, evict)
+
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+EVENTNAMES = ['baseline_year_1_arm_1', '2_year_follow_up_y_arm_1']
+
+
+def get_fake_df(n=40, seed=0):
+
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({'src_subject_id': ['NDAR_' + str(i)
+                                            for i in range(n)],
+                         'eventname': rng.choice(EVENTNAMES, n),
+                         'feat_a': rng.random(n),
+                         'feat_b': rng.random(n),
+                         'target': rng.randint(0, 2, n)})
+
+
+class Test_Parse_Cache(TestCase):
+
+    def setUp(self):
+
+        self.temp_dr = tempfile.mkdtemp()
+        self.cache_dr = os.path.join(self.temp_dr, 'cache')
+
+        self.loc = os.path.join(self.temp_dr, 'data.csv')
+        get_fake_df().to_csv(self.loc, index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dr, ignore_errors=True)
+
+    def get_ML(self, cache=True, **cache_params):
+
+        ML = BPt_ML(log_dr=None, verbose=False, notebook=False)
+        ML.Set_Default_Load_Params(dataset_type='custom',
+                                   eventname=EVENTNAMES[0])
+        if cache:
+            ML.Set_Parse_Cache(self.cache_dr, **cache_params)
+
+        return ML
+
+    def load_data(self, cache=True, **params):
+
+        params.setdefault('drop_keys', ['target'])
+
+        ML = self.get_ML(cache=cache)
+        ML.Load_Data(loc=self.loc, **params)
+        return ML.data
+
+    def get_n_cached(self):
+        return len(cache_info(self.cache_dr))
+
+    def rewrite_same_stat(self, df):
+        '''Change the file contents, but keep the same mtime and size.'''
+
+        stat = os.stat(self.loc)
+        df.to_csv(self.loc, index=False)
+        self.assertEqual(os.path.getsize(self.loc), stat.st_size)
+        os.utime(self.loc, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    def test_hit_same_as_miss(self):
+
+        base = self.load_data(cache=False)
+
+        miss = self.load_data()
+        self.assertEqual(self.get_n_cached(), 1)
+        pd.testing.assert_frame_equal(miss, base)
+
+        hit = self.load_data()
+        self.assertEqual(self.get_n_cached(), 1)
+        pd.testing.assert_frame_equal(hit, base)
+
+    def test_hit_not_parsed(self):
+
+        base = self.load_data()
+
+        # A hit should come from the cache, not the file
+        df = get_fake_df()
+        df['feat_a'] = df['feat_a'].iloc[::-1].to_numpy()
+        self.rewrite_same_stat(df)
+
+        pd.testing.assert_frame_equal(self.load_data(), base)
+        self.assertFalse(self.load_data(cache=False).equals(base))
+
+    def test_miss_on_change(self):
+
+        base = self.load_data()
+
+        # New mtime
+        df = get_fake_df(seed=1)
+        df.to_csv(self.loc, index=False)
+        os.utime(self.loc, (0, os.stat(self.loc).st_mtime + 10))
+
+        data = self.load_data()
+        pd.testing.assert_frame_equal(data, self.load_data(cache=False))
+        self.assertFalse(data.equals(base))
+
+        # Different load params
+        self.load_data(eventname=EVENTNAMES[1])
+        self.load_data(drop_keys=['feat_b'])
+        self.assertEqual(self.get_n_cached(), 4)
+
+    def test_other_loaders(self):
+
+        for cache in [False, True, True]:
+            ML = self.get_ML(cache=cache)
+            ML.Load_Targets(loc=self.loc, col_name='target',
+                            data_type='b')
+            ML.Load_Covars(loc=self.loc, col_name='feat_a', data_type='f')
+
+            if not cache:
+                base = (ML.targets, ML.covars)
+            else:
+                pd.testing.assert_frame_equal(ML.targets, base[0])
+                pd.testing.assert_frame_equal(ML.covars, base[1])
+
+        self.assertTrue(self.get_n_cached() > 0)
+
+    def test_evict(self):
+
+        self.load_data()
+        size_mb = cache_info(self.cache_dr)['size_mb'].iloc[0]
+
+        # Room for just two entries
+        for ext in ['_1', '_2']:
+            ML = self.get_ML(max_size_mb=size_mb * 2.5)
+            ML.Load_Data(loc=self.loc, drop_keys=['target'], ext=ext)
+        self.assertEqual(self.get_n_cached(), 2)
+
+        # The least recently used should be evicted first
+        ext_2, ext_1 = cache_info(self.cache_dr).index
+        self.load_data()
+        newest = cache_info(self.cache_dr).index[0]
+        self.assertEqual(self.get_n_cached(), 3)
+
+        evict(self.cache_dr, size_mb * 2.5)
+        self.assertEqual(set(cache_info(self.cache_dr).index),
+                         set([newest, ext_2]))
+
+        evict(self.cache_dr, 0)
+        self.assertEqual(self.get_n_cached(), 0)
+
+    def test_clear(self):
+
+        other_loc = os.path.join(self.temp_dr, 'other.csv')
+        get_fake_df().to_csv(other_loc, index=False)
+
+        ML = self.get_ML()
+        ML.Load_Data(loc=self.loc)
+        ML.Load_Data(loc=other_loc, ext='_other')
+        self.assertEqual(len(ML.Get_Parse_Cache_Info()), 2)
+
+        ML.Clear_Parse_Cache(loc=other_loc)
+        info = ML.Get_Parse_Cache_Info()
+        self.assertEqual(list(info['loc']), [os.path.abspath(self.loc)])
+
+        ML.Clear_Parse_Cache()
+        self.assertEqual(len(ML.Get_Parse_Cache_Info()), 0)
+
+        # Turned off
+        ML.Set_Parse_Cache(None)
+        with self.assertRaises(RuntimeError):
+            ML.Get_Parse_Cache_Info()
+
+    def test_not_a_file(self):
+
+        self.assertTrue(get_cache_key(None, {}) is None)
+        self.assertTrue(get_cache_key(os.path.join(self.temp_dr, 'nope'),
+                                      {}) is None)
+
+        save_cached(self.cache_dr, None, get_fake_df(), self.loc)
+        self.assertTrue(load_cached(self.cache_dr, None) is None)
+        self.assertEqual(self.get_n_cached(), 0)
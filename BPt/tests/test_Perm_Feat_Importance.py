@@ -0,0 +1,126 @@
+from unittest import TestCase
+from BPt.pipeline.Perm_Feat_Importance import (Perm_Feat_Importance,
+                                               get_perms, get_n_stack)
+
+import numpy as np
+from sklearn.linear_model import Ridge, LogisticRegression
+from sklearn.metrics import get_scorer
+
+
+# Count each predict like call
+N_PREDICTS = []
+
+
+class Counting_Ridge(Ridge):
+
+    def predict(self, X):
+
+        N_PREDICTS.append(len(X))
+        return super().predict(X)
+
+
+def get_naive(model, scorer, X, y, n_perm, seed, groups):
+    '''Reference, permuting a fresh copy of X for each feature / group,
+    one permutation at a time.'''
+
+    baseline_score = scorer(model, X, y)
+
+    difs = np.zeros(X.shape[1])
+    for g, group in enumerate(groups):
+        perms = get_perms(seed, g, n_perm, X.shape[0])
+
+        scores = []
+        for perm in perms:
+            X_perm = X.copy()
+            X_perm[:, group] = X[np.ix_(perm, group)]
+            scores.append(scorer(model, X_perm, y))
+
+        difs[group] = baseline_score - np.mean(scores)
+
+    return difs
+
+
+class Test_Perm_Feat_Importance(TestCase):
+
+    def setUp(self):
+
+        rng = np.random.RandomState(0)
+        self.X = rng.randn(60, 6)
+        self.y = self.X[:, 0] * 3 + self.X[:, 1] + rng.randn(60)
+        self.model = Counting_Ridge().fit(self.X, self.y)
+        self.scorer = get_scorer('r2')
+
+    def tearDown(self):
+        N_PREDICTS.clear()
+
+    def compute(self, model=None, scorer=None, y=None, **params):
+
+        if model is None:
+            model, scorer, y = self.model, self.scorer, self.y
+
+        X = self.X.copy()
+        difs = Perm_Feat_Importance(random_state=1, **params).compute(
+            model, scorer, X, y)
+
+        # X shouldn't be changed
+        self.assertTrue(np.array_equal(X, self.X))
+
+        return difs
+
+    def test_same_as_naive(self):
+
+        groups = [[i] for i in range(self.X.shape[1])]
+        naive = get_naive(self.model, self.scorer, self.X, self.y,
+                          n_perm=3, seed=1, groups=groups)
+
+        for max_stack_size in [0, .03]:
+            difs = self.compute(n_perm=3, max_stack_size=max_stack_size)
+            self.assertTrue(np.allclose(difs, naive))
+
+        # Most important first
+        self.assertEqual(np.argmax(difs), 0)
+
+    def test_stacked_predicts(self):
+
+        self.compute(n_perm=3, max_stack_size=0)
+        self.assertEqual(len(N_PREDICTS), 1 + 3 * self.X.shape[1])
+
+        # All permuted copies should fit in one predict
+        N_PREDICTS.clear()
+        self.compute(n_perm=3)
+        self.assertEqual(N_PREDICTS, [60, 60 * 3 * self.X.shape[1]])
+
+    def test_n_stack(self):
+
+        X = np.zeros((100, 10))
+        self.assertEqual(get_n_stack(X, 50, 0), 1)
+        self.assertEqual(get_n_stack(X, 50, 8000 * 4 / (1024 ** 3)), 4)
+        self.assertEqual(get_n_stack(X, 3, 1), 3)
+
+    def test_n_jobs_same(self):
+
+        base = self.compute(n_perm=2)
+        self.assertTrue(np.allclose(self.compute(n_perm=2, n_jobs=2), base))
+        self.assertTrue(np.allclose(self.compute(n_perm=2, n_jobs=4,
+                                                 max_stack_size=0), base))
+
+    def test_groups(self):
+
+        groups = [[0, 2], [1], [3], [4], [5]]
+        naive = get_naive(self.model, self.scorer, self.X, self.y,
+                          n_perm=2, seed=1, groups=groups)
+
+        difs = self.compute(n_perm=2, groups=[[0, 2]])
+        self.assertTrue(np.allclose(difs, naive))
+        self.assertEqual(difs[0], difs[2])
+
+    def test_predict_proba(self):
+
+        y = (self.y > 0).astype(int)
+        model = LogisticRegression().fit(self.X, y)
+        scorer = get_scorer('roc_auc')
+
+        naive = get_naive(model, scorer, self.X, y, n_perm=2, seed=1,
+                          groups=[[i] for i in range(self.X.shape[1])])
+        difs = self.compute(model=model, scorer=scorer, y=y, n_perm=2)
+        self.assertTrue(np.allclose(difs, naive))
@@ -0,0 +1,78 @@
+from unittest import TestCase
+from BPt.helpers.Shared_Array import (Shared_Array, get_temp_dr,
+                                      remove_temp_dr, to_shared,
+                                      from_shared)
+
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+
+class Test_Shared_Array(TestCase):
+
+    def setUp(self):
+        self.temp_dr = get_temp_dr()
+
+    def tearDown(self):
+        remove_temp_dr(self.temp_dr)
+
+    def test_array(self):
+
+        X = np.random.random((20, 5))
+        shared = to_shared(X, self.temp_dr, 'X')
+
+        self.assertTrue(isinstance(shared, Shared_Array))
+
+        loaded = from_shared(shared)
+        self.assertTrue(isinstance(loaded, np.memmap))
+        self.assertTrue(np.array_equal(loaded, X))
+
+        # Should be read only
+        with self.assertRaises(ValueError):
+            loaded[0, 0] = 1
+
+    def test_dtype(self):
+
+        X = np.arange(10)
+        loaded = from_shared(to_shared(X, self.temp_dr, dtype='float32'))
+
+        self.assertEqual(loaded.dtype, np.dtype('float32'))
+        self.assertTrue(np.array_equal(loaded, X))
+
+    def test_df(self):
+
+        df = pd.DataFrame(np.random.random((10, 3)),
+                          index=['s' + str(i) for i in range(10)],
+                          columns=['a', 'b', 'c'])
+
+        loaded = from_shared(to_shared(df, self.temp_dr, 'data'))
+        self.assertTrue(loaded.equals(df))
+
+    def test_handle_pickle(self):
+
+        X = np.random.random((1000, 100))
+        shared = to_shared(X, self.temp_dr)
+
+        # The handle should pickle as just the location
+        self.assertTrue(len(pickle.dumps(shared)) < 1000)
+        loaded = pickle.loads(pickle.dumps(shared)).load()
+        self.assertTrue(np.array_equal(loaded, X))
+
+    def test_from_shared_passthrough(self):
+
+        X = np.random.random(5)
+        self.assertTrue(from_shared(X) is X)
+
+    def test_remove_temp_dr(self):
+
+        temp_dr = get_temp_dr()
+        to_shared(np.ones(3), temp_dr)
+        self.assertTrue(os.path.exists(temp_dr))
+
+        remove_temp_dr(temp_dr)
+        self.assertFalse(os.path.exists(temp_dr))
+
+        # Should not fail if None or already removed
+        remove_temp_dr(temp_dr)
+        remove_temp_dr(None)
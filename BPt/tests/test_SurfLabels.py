@@ -0,0 +1,72 @@
+from unittest import TestCase
+from BPt.extensions.Loaders import SurfLabels
+
+import numpy as np
+
+
+def get_labels(n_vertices=200, n_labels=6, seed=0):
+
+    rng = np.random.RandomState(seed)
+    return rng.randint(0, n_labels, size=n_vertices)
+
+
+class Test_SurfLabels(TestCase):
+
+    def check_same(self, X, strategy, **params):
+
+        labels = get_labels()
+
+        # Custom functions are always computed label by label
+        loop_funcs = {'mean': np.mean, 'sum': np.sum,
+                      'std': np.std, 'var': np.var}
+        loop = SurfLabels(labels, strategy=loop_funcs[strategy], **params)
+        vec = SurfLabels(labels, strategy=strategy, **params)
+
+        self.assertTrue(vec.fit(X).vec_strategy_ is not None)
+        self.assertTrue(np.allclose(vec.transform(X),
+                                    loop.fit_transform(X)))
+
+    def test_1D(self):
+
+        X = np.random.random(200)
+        for strategy in ['mean', 'sum', 'std', 'var']:
+            self.check_same(X, strategy)
+
+    def test_2D(self):
+
+        for X in [np.random.random((5, 200)), np.random.random((200, 5))]:
+            for strategy in ['mean', 'sum', 'std', 'var']:
+                self.check_same(X, strategy)
+                self.check_same(X, strategy, vectorize=False)
+
+    def test_background_and_mask(self):
+
+        X = np.random.random(200)
+        mask = np.random.RandomState(1).randint(0, 2, size=200)
+
+        self.check_same(X, 'mean', background_label=[0, 1])
+        self.check_same(X, 'std', background_label=None)
+        self.check_same(X, 'sum', mask=mask)
+
+    def test_transform_batch(self):
+
+        labels = get_labels()
+        for strategy in ['mean', 'std', 'median']:
+            for shape in [(200,), (4, 200), (200, 4)]:
+
+                X = np.random.random((7,) + shape)
+                surf_labels = SurfLabels(labels, strategy=strategy).fit(X[0])
+
+                batch = surf_labels.transform_batch(X)
+                stacked = np.stack([surf_labels.transform(x) for x in X])
+                self.assertTrue(np.allclose(batch, stacked))
+
+    def test_large_offset_std(self):
+
+        # Centered within each label, should be numerically stable
+        X = np.random.random(200) + 1e8
+        labels = get_labels()
+
+        vec = SurfLabels(labels, strategy='std').fit_transform(X)
+        loop = SurfLabels(labels, strategy=np.std).fit_transform(X)
+        self.assertTrue(np.allclose(vec, loop, rtol=1e-4))
@@ -0,0 +1,108 @@
+from unittest import TestCase
+from BPt import BPt_ML, Model_Pipeline, Model
+from BPt.pipeline.Trace import Trace, set_trace, traced, paused_trace
+from BPt.pipeline.Transformers import Transformer_Wrapper
+
+import numpy as np
+import pandas as pd
+from sklearn.decomposition import PCA
+
+
+class Nested():
+
+    def __init__(self, inner=None):
+        self.inner = inner
+
+    @traced
+    def fit(self, X):
+
+        if self.inner is not None:
+            self.inner.fit(X)
+
+        return self.fit_transform(X)
+
+    @traced
+    def fit_transform(self, X):
+        return X[:, :1]
+
+
+def get_fake_ML(n=40, p=3):
+
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame(rng.randn(n, p),
+                      columns=['feat' + str(i) for i in range(p)])
+    df['src_subject_id'] = ['s' + str(i) for i in range(n)]
+
+    targets = pd.DataFrame({'src_subject_id': df['src_subject_id'],
+                            'target': rng.randn(n)})
+
+    ML = BPt_ML(log_dr=None, verbose=False, notebook=False, n_jobs=1)
+    ML.Load_Data(df=df)
+    ML.Load_Targets(df=targets, col_name='target', data_type='f')
+    ML.Train_Test_Split(test_size=.2, random_state=1)
+    ML.Set_Default_ML_Verbosity(progress_bar=False)
+
+    return ML
+
+
+class Test_Trace(TestCase):
+
+    def setUp(self):
+
+        self.trace = Trace()
+        set_trace(self.trace, fold=0)
+        self.X = np.random.random((10, 3))
+
+    def tearDown(self):
+        set_trace(None)
+
+    def get_names(self):
+        return [event['name'] for event in self.trace.events]
+
+    def test_nested_same_object(self):
+
+        Nested().fit(self.X)
+        self.assertEqual(self.get_names(), ['Nested.fit'])
+        self.assertEqual(self.trace.events[0]['shape'], [10, 1])
+
+        Nested().fit_transform(self.X)
+        self.assertEqual(self.get_names(), ['Nested.fit',
+                                            'Nested.fit_transform'])
+
+    def test_nested_other_object(self):
+
+        # Each object should still be recorded, by depth
+        Nested(inner=Nested()).fit(self.X)
+        self.assertEqual(self.get_names(), ['Nested.fit', 'Nested.fit'])
+        self.assertEqual([event['depth'] for event in self.trace.events],
+                         [1, 0])
+
+    def test_transformer_wrapper_fit(self):
+
+        wrapper = Transformer_Wrapper(PCA(n_components=1), wrapper_inds=[0, 1])
+        wrapper.fit(self.X, mapping={0: 0, 1: 1, 2: 2})
+        wrapper.transform(self.X)
+
+        self.assertEqual(self.get_names(), ['Transformer_Wrapper.fit',
+                                            'Transformer_Wrapper.transform'])
+
+    def test_paused(self):
+
+        with paused_trace():
+            Nested().fit(self.X)
+        self.assertEqual(len(self.trace), 0)
+
+        Nested().fit(self.X)
+        self.assertEqual(len(self.trace), 1)
+
+    def test_evaluate_trace(self):
+
+        results = get_fake_ML().Evaluate(Model_Pipeline(model=Model('ridge')),
+                                         splits=2, n_repeats=1, trace=True)
+
+        df = results['trace'].to_df()
+        self.assertEqual(set(df['fold']), set([0, 1]))
+
+        # Each traced method should be counted once per fold
+        counts = df.groupby(['fold', 'name']).size()
+        self.assertEqual(counts.max(), 1)
@@ -0,0 +1,85 @@
+"""
+datasets.py
+====================================
+Synthetic, ABCD shaped datasets used by the benchmark suite.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+
+def get_subjects(n_subjects):
+    '''ABCD style subject ids.'''
+
+    return ['NDAR_INV' + str(i).zfill(8) for i in range(n_subjects)]
+
+
+def make_data_csv(dr, n_subjects, n_features, n_eventnames=2,
+                  random_state=0):
+    '''Save a csv of continuous features, in the same format as an ABCD
+    release file, with one row per subject per eventname. Returns
+    the location of the csv and the names of the features.'''
+
+    rng = np.random.RandomState(random_state)
+
+    eventnames = ['baseline_year_1_arm_1'] +\
+        ['year_' + str(i) + '_follow_up_arm_1'
+         for i in range(1, n_eventnames)]
+
+    feat_names = ['smri_thick_cdk_' + str(i) for i in range(n_features)]
+    subjects = get_subjects(n_subjects)
+
+    dfs = []
+    for eventname in eventnames:
+        df = pd.DataFrame(rng.randn(n_subjects, n_features).astype('float32'),
+                          columns=feat_names)
+        df.insert(0, 'eventname', eventname)
+        df.insert(0, 'src_subject_id', subjects)
+        dfs.append(df)
+
+    loc = os.path.join(dr, 'data.csv')
+    pd.concat(dfs).to_csv(loc, index=False)
+
+    return loc, feat_names
+
+
+def make_targets_df(n_subjects, random_state=0):
+    '''Random continuous and binary targets, along with a site
+    variable, for the baseline eventname.'''
+
+    rng = np.random.RandomState(random_state)
+
+    target = rng.randn(n_subjects)
+    df = pd.DataFrame({'src_subject_id': get_subjects(n_subjects),
+                       'eventname': 'baseline_year_1_arm_1',
+                       'target': target,
+                       'binary_target': (target > 0).astype(int),
+                       'site_id_l': rng.randint(0, 21, size=n_subjects)})
+
+    return df
+
+
+def make_surf_files(dr, n_subjects, n_vertices, n_labels=150,
+                    random_state=0):
+    '''Save one surface .npy file per subject, along with a matching
+    parcellation. Returns a dict of file locations, the function mapping
+    a file to its subject, and the parcellation.'''
+
+    rng = np.random.RandomState(random_state)
+
+    surf_dr = os.path.join(dr, 'surf')
+    os.makedirs(surf_dr, exist_ok=True)
+
+    locs = []
+    for subject in get_subjects(n_subjects):
+        loc = os.path.join(surf_dr, subject + '.npy')
+        np.save(loc, rng.randn(n_vertices).astype('float32'))
+        locs.append(loc)
+
+    labels = rng.randint(0, n_labels, size=n_vertices)
+
+    return {'thick': locs}, file_to_subject, labels
+
+
+def file_to_subject(loc):
+    return os.path.basename(loc).replace('.npy', '')
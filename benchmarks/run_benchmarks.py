@@ -0,0 +1,440 @@
+"""
+run_benchmarks.py
+====================================
+End to end benchmark suite for BPt, run on synthetic ABCD shaped data.
+
+Each benchmark is run in its own fresh process, such that the peak
+resident memory reported is for just that benchmark. Results are saved
+as json, which can be compared against the results from another commit
+to catch regressions, e.g.,
+
+::
+
+    python benchmarks/run_benchmarks.py --out base.json
+    git checkout my-branch
+    python benchmarks/run_benchmarks.py --out new.json --compare base.json
+
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+
+from datasets import (make_data_csv, make_targets_df, make_surf_files)
+
+# Always benchmark the checked out version of BPt
+REPO_DR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_DR not in sys.path:
+    sys.path.insert(0, REPO_DR)
+
+RESULTS_VERSION = 1
+
+
+class Stage_Timer():
+    '''Records the wall and cpu time of each named stage.'''
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+
+        start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.stages[name] = {
+                'wall_time': time.perf_counter() - start,
+                'cpu_time': time.process_time() - cpu_start}
+
+
+def get_peak_rss_mb(who=resource.RUSAGE_SELF):
+
+    peak = resource.getrusage(who).ru_maxrss
+
+    # Bytes on mac, kilobytes on linux
+    if sys.platform == 'darwin':
+        return peak / (1024 ** 2)
+    return peak / 1024
+
+
+def get_ML(config):
+
+    from BPt import BPt_ML
+
+    ML = BPt_ML(log_dr=None, verbose=False, notebook=False,
+                n_jobs=config['n_jobs'], random_state=config['random_state'])
+    ML.Set_Default_ML_Verbosity(progress_bar=False)
+    ML.Set_Default_Load_Params(dataset_type='custom',
+                               eventname='baseline_year_1_arm_1')
+
+    return ML
+
+
+def load_tabular(ML, config, temp_dr, timer):
+
+    with timer.stage('make_data'):
+        loc, _ = make_data_csv(temp_dr, config['n_subjects'],
+                               config['n_features'],
+                               random_state=config['random_state'])
+        targets = make_targets_df(config['n_subjects'],
+                                  random_state=config['random_state'])
+
+    with timer.stage('Load_Data'):
+        ML.Load_Data(loc=loc)
+
+    with timer.stage('Load_Targets'):
+        ML.Load_Targets(df=targets, col_name='target', data_type='float')
+
+    with timer.stage('Load_Strat'):
+        ML.Load_Strat(df=targets, col_name='site_id_l')
+
+    with timer.stage('Prepare_All_Data'):
+        ML.Prepare_All_Data()
+
+    with timer.stage('Train_Test_Split'):
+        ML.Train_Test_Split(test_size=.2,
+                            random_state=config['random_state'])
+
+
+def evaluate(ML, config, timer, name='Evaluate', **kwargs):
+
+    from BPt import Model_Pipeline, Model
+
+    pipeline_params = {'model': Model('ridge'), 'imputers': None}
+    pipeline_params.update(kwargs.pop('pipeline_params', {}))
+
+    with timer.stage(name):
+        ML.Evaluate(Model_Pipeline(**pipeline_params),
+                    splits=config['splits'],
+                    n_repeats=config['n_repeats'], **kwargs)
+
+
+def bench_load(config, temp_dr, timer):
+    '''Loading and merging tabular data.'''
+
+    load_tabular(get_ML(config), config, temp_dr, timer)
+
+
+def bench_evaluate(config, temp_dr, timer):
+    '''Evaluate of a ridge model.'''
+
+    ML = get_ML(config)
+    load_tabular(ML, config, temp_dr, timer)
+    evaluate(ML, config, timer)
+
+    from BPt import Model_Pipeline, Model
+    with timer.stage('Test'):
+        ML.Test(Model_Pipeline(model=Model('ridge'), imputers=None))
+
+
+def bench_evaluate_search(config, temp_dr, timer):
+    '''Evaluate of a ridge model with a hyper-parameter search.'''
+
+    from BPt import Model, Param_Search
+
+    ML = get_ML(config)
+    load_tabular(ML, config, temp_dr, timer)
+
+    param_search = Param_Search(search_type='RandomSearch',
+                                n_iter=config['n_iter'], splits=3)
+    evaluate(ML, config, timer,
+             pipeline_params={'model': Model('ridge', params=1),
+                              'param_search': param_search})
+
+
+def bench_evaluate_loader(config, temp_dr, timer):
+    '''Evaluate with a SurfLabels loader over per-subject data files.'''
+
+    from BPt import Loader
+    from BPt.extensions.Loaders import SurfLabels
+
+    ML = get_ML(config)
+
+    with timer.stage('make_data'):
+        files, file_to_subject, labels =\
+            make_surf_files(temp_dr, config['n_subjects'],
+                            config['n_vertices'],
+                            random_state=config['random_state'])
+        targets = make_targets_df(config['n_subjects'],
+                                  random_state=config['random_state'])
+
+    with timer.stage('Load_Data_Files'):
+        ML.Load_Data_Files(files=files, file_to_subject=file_to_subject)
+
+    with timer.stage('Load_Targets'):
+        ML.Load_Targets(df=targets, col_name='target', data_type='float')
+
+    with timer.stage('Prepare_All_Data'):
+        ML.Prepare_All_Data()
+
+    with timer.stage('Train_Test_Split'):
+        ML.Train_Test_Split(test_size=.2,
+                            random_state=config['random_state'])
+
+    evaluate(ML, config, timer,
+             pipeline_params={'loaders': Loader(SurfLabels(labels))})
+
+
+def bench_perm_fis(config, temp_dr, timer):
+    '''Evaluate with permutation feature importances.'''
+
+    from BPt import Feat_Importance
+
+    ML = get_ML(config)
+    load_tabular(ML, config, temp_dr, timer)
+    evaluate(ML, config, timer,
+             feat_importances=Feat_Importance('perm',
+                                              n_perm=config['n_perm']))
+
+
+def bench_shap_fis(config, temp_dr, timer):
+    '''Evaluate with kernel shap feature importances.'''
+
+    from BPt import Feat_Importance, Shap_Params, Model
+
+    ML = get_ML(config)
+    load_tabular(ML, config, temp_dr, timer)
+
+    shap_params = Shap_Params(kernel_nsamples=100)
+    evaluate(ML, config, timer,
+             pipeline_params={'model': Model('svm')},
+             feat_importances=Feat_Importance('shap',
+                                              shap_params=shap_params))
+
+
+BENCHMARKS = {'load': bench_load,
+              'evaluate': bench_evaluate,
+              'evaluate_search': bench_evaluate_search,
+              'evaluate_loader': bench_evaluate_loader,
+              'perm_fis': bench_perm_fis,
+              'shap_fis': bench_shap_fis}
+
+# Any benchmarks requiring optional libraries
+REQUIRES = {'shap_fis': 'shap'}
+
+
+def run_benchmark(name, config, queue):
+    '''Run a single benchmark, in its own process.'''
+
+    warnings.filterwarnings('ignore')
+
+    temp_dr = tempfile.mkdtemp(prefix='BPt_bench_')
+    timer = Stage_Timer()
+
+    result = {'error': None}
+
+    # Import time is recorded, but not counted towards the total
+    with timer.stage('import'):
+        import BPt  # noqa: F401
+
+    start = time.perf_counter()
+
+    try:
+        BENCHMARKS[name](config, temp_dr, timer)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    finally:
+        shutil.rmtree(temp_dr, ignore_errors=True)
+
+    result['wall_time'] = time.perf_counter() - start
+    result['peak_rss_mb'] = get_peak_rss_mb()
+    result['peak_rss_children_mb'] = get_peak_rss_mb(resource.RUSAGE_CHILDREN)
+    result['stages'] = timer.stages
+
+    queue.put(result)
+
+
+def run_in_process(name, config):
+
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+
+    process = ctx.Process(target=run_benchmark, args=(name, config, queue))
+    process.start()
+
+    result = queue.get()
+    process.join()
+
+    return result
+
+
+def best_of(results):
+    '''Keep the fastest repeat, but the largest memory.'''
+
+    best = min(results, key=lambda r: r['wall_time'])
+    best['peak_rss_mb'] = max(r['peak_rss_mb'] for r in results)
+    best['repeat_wall_times'] = [r['wall_time'] for r in results]
+
+    return best
+
+
+def is_available(name):
+
+    if name not in REQUIRES:
+        return True
+
+    try:
+        __import__(REQUIRES[name])
+    except ImportError:
+        return False
+
+    return True
+
+
+def get_commit():
+
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=REPO_DR).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_meta(config):
+
+    import pandas as pd
+    import sklearn
+
+    return {'results_version': RESULTS_VERSION,
+            'commit': get_commit(),
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'config': config}
+
+
+def compare(results, base, threshold):
+    '''Print the change in time and memory relative to base, returning
+    the names of any benchmarks slower than threshold times base.'''
+
+    if base['meta']['config'] != results['meta']['config']:
+        print('Warning: comparing results run with different configs!')
+
+    print('\n{:<20}{:>12}{:>12}{:>10}{:>12}{:>12}'.format(
+        'benchmark', 'base (s)', 'new (s)', 'ratio',
+        'base (MB)', 'new (MB)'))
+
+    regressions = []
+    for name, result in results['benchmarks'].items():
+
+        base_result = base['benchmarks'].get(name)
+        if base_result is None or base_result.get('wall_time') is None or\
+                result.get('wall_time') is None:
+            continue
+
+        ratio = result['wall_time'] / max(base_result['wall_time'], 1e-9)
+        print('{:<20}{:>12.3f}{:>12.3f}{:>10.2f}{:>12.1f}{:>12.1f}'.format(
+            name, base_result['wall_time'], result['wall_time'], ratio,
+            base_result['peak_rss_mb'], result['peak_rss_mb']))
+
+        if ratio > threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def get_parser():
+
+    parser = argparse.ArgumentParser(
+        description='Run the BPt benchmark suite.')
+
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS),
+                        choices=list(BENCHMARKS),
+                        help='Which benchmarks to run, by default all.')
+    parser.add_argument('--n-subjects', type=int, default=2000)
+    parser.add_argument('--n-features', type=int, default=500)
+    parser.add_argument('--n-vertices', type=int, default=10242,
+                        help='The size of each data file.')
+    parser.add_argument('--splits', type=int, default=5)
+    parser.add_argument('--n-repeats', type=int, default=1)
+    parser.add_argument('--n-iter', type=int, default=20,
+                        help='The number of Param_Search iterations.')
+    parser.add_argument('--n-perm', type=int, default=2,
+                        help='The number of permutations per feature.')
+    parser.add_argument('--n-jobs', type=int, default=1)
+    parser.add_argument('--random-state', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='Run each benchmark this many times, '
+                        'keeping the fastest.')
+    parser.add_argument('--out', default=None,
+                        help='Save the results as json here.')
+    parser.add_argument('--compare', default=None,
+                        help='Compare against a previous results json.')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='When comparing, the time ratio over which a '
+                        'benchmark counts as a regression.')
+
+    return parser
+
+
+def main(args=None):
+
+    args = get_parser().parse_args(args)
+
+    config = {'n_subjects': args.n_subjects,
+              'n_features': args.n_features,
+              'n_vertices': args.n_vertices,
+              'splits': args.splits,
+              'n_repeats': args.n_repeats,
+              'n_iter': args.n_iter,
+              'n_perm': args.n_perm,
+              'n_jobs': args.n_jobs,
+              'random_state': args.random_state}
+
+    results = {'meta': get_meta(config), 'benchmarks': {}}
+    for name in args.benchmarks:
+
+        if not is_available(name):
+            print(name, 'skipped, requires', REQUIRES[name])
+            results['benchmarks'][name] = {'skipped': REQUIRES[name]}
+            continue
+
+        result = best_of([run_in_process(name, config)
+                          for _ in range(args.repeat)])
+        results['benchmarks'][name] = result
+
+        if result['error'] is not None:
+            print(name, 'failed:\n', result['error'])
+            continue
+
+        print('{:<20}{:>10.3f}s{:>10.1f}MB'.format(
+            name, result['wall_time'], result['peak_rss_mb']))
+        for stage, times in result['stages'].items():
+            print('    {:<26}{:>10.3f}s'.format(stage, times['wall_time']))
+
+    if args.out is not None:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            base = json.load(f)
+
+        regressions = compare(results, base, args.threshold)
+        if len(regressions) > 0:
+            print('\nRegressions:', ', '.join(regressions))
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())